@@ -1,180 +1,225 @@
-from typing import Dict, List, Any
-from datasketch import MinHash, MinHashLSH
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import numpy as np
-from itertools import combinations
-
-
-class DuplicateDetector:
-    def __init__(self, crawl_results: Dict[str, Any]):
-        self.crawl_results = crawl_results
-        self.pages = crawl_results.get("pages", [])
-        
-    def detect(self) -> Dict[str, Any]:
-        """Detect duplicate content using multiple methods"""
-        if not self.pages or len(self.pages) < 2:
-            return {
-                "duplicates": [],
-                "total_duplicates": 0,
-                "methods_used": []
-            }
-        
-        duplicates_minhash = self._detect_with_minhash()
-        duplicates_cosine = self._detect_with_cosine()
-        duplicates_jaccard = self._detect_with_jaccard()
-        
-        # Combine results (remove duplicates)
-        all_duplicates = {}
-        
-        for dup in duplicates_minhash + duplicates_cosine + duplicates_jaccard:
-            key = tuple(sorted([dup["page1"], dup["page2"]]))
-            if key not in all_duplicates or dup["similarity"] > all_duplicates[key]["similarity"]:
-                all_duplicates[key] = dup
-        
-        duplicates_list = list(all_duplicates.values())
-        duplicates_list.sort(key=lambda x: x["similarity"], reverse=True)
-        
-        return {
-            "duplicates": duplicates_list[:50],  # Top 50 duplicates
-            "total_duplicates": len(duplicates_list),
-            "methods_used": ["minhash", "cosine", "jaccard"]
-        }
-    
-    def _detect_with_minhash(self) -> List[Dict[str, Any]]:
-        """Detect duplicates using MinHash"""
-        duplicates = []
-        
-        try:
-            # Create MinHash for each page
-            minhashes = []
-            for page in self.pages:
-                text = self._get_page_text(page)
-                if not text:
-                    continue
-                
-                m = MinHash(num_perm=128)
-                # Add shingles (word sequences)
-                words = text.split()
-                for i in range(len(words) - 2):
-                    shingle = " ".join(words[i:i+3])
-                    m.update(shingle.encode('utf8'))
-                
-                minhashes.append({
-                    "minhash": m,
-                    "url": page.get("url"),
-                    "text": text
-                })
-            
-            # Compare all pairs
-            for i in range(len(minhashes)):
-                for j in range(i + 1, len(minhashes)):
-                    similarity = minhashes[i]["minhash"].jaccard(minhashes[j]["minhash"])
-                    if similarity > 0.7:  # Threshold
-                        duplicates.append({
-                            "page1": minhashes[i]["url"],
-                            "page2": minhashes[j]["url"],
-                            "similarity": round(similarity, 3),
-                            "method": "minhash"
-                        })
-        except Exception as e:
-            print(f"MinHash error: {e}")
-        
-        return duplicates
-    
-    def _detect_with_cosine(self) -> List[Dict[str, Any]]:
-        """Detect duplicates using Cosine Similarity"""
-        duplicates = []
-        
-        try:
-            # Prepare texts
-            texts = []
-            urls = []
-            for page in self.pages:
-                text = self._get_page_text(page)
-                if text and len(text) > 100:  # Minimum length
-                    texts.append(text)
-                    urls.append(page.get("url"))
-            
-            if len(texts) < 2:
-                return duplicates
-            
-            # TF-IDF vectorization
-            vectorizer = TfidfVectorizer(max_features=1000, stop_words='english')
-            tfidf_matrix = vectorizer.fit_transform(texts)
-            
-            # Calculate cosine similarity
-            similarity_matrix = cosine_similarity(tfidf_matrix)
-            
-            # Find similar pairs
-            for i in range(len(urls)):
-                for j in range(i + 1, len(urls)):
-                    similarity = similarity_matrix[i][j]
-                    if similarity > 0.7:  # Threshold
-                        duplicates.append({
-                            "page1": urls[i],
-                            "page2": urls[j],
-                            "similarity": round(similarity, 3),
-                            "method": "cosine"
-                        })
-        except Exception as e:
-            print(f"Cosine similarity error: {e}")
-        
-        return duplicates
-    
-    def _detect_with_jaccard(self) -> List[Dict[str, Any]]:
-        """Detect duplicates using Jaccard Similarity"""
-        duplicates = []
-        
-        try:
-            # Create word sets for each page
-            page_sets = []
-            for page in self.pages:
-                text = self._get_page_text(page)
-                if text:
-                    words = set(text.lower().split())
-                    if len(words) > 10:  # Minimum words
-                        page_sets.append({
-                            "words": words,
-                            "url": page.get("url")
-                        })
-            
-            # Compare all pairs
-            for i in range(len(page_sets)):
-                for j in range(i + 1, len(page_sets)):
-                    set1 = page_sets[i]["words"]
-                    set2 = page_sets[j]["words"]
-                    
-                    intersection = len(set1 & set2)
-                    union = len(set1 | set2)
-                    
-                    if union > 0:
-                        jaccard = intersection / union
-                        if jaccard > 0.7:  # Threshold
-                            duplicates.append({
-                                "page1": page_sets[i]["url"],
-                                "page2": page_sets[j]["url"],
-                                "similarity": round(jaccard, 3),
-                                "method": "jaccard"
-                            })
-        except Exception as e:
-            print(f"Jaccard similarity error: {e}")
-        
-        return duplicates
-    
-    def _get_page_text(self, page: Dict[str, Any]) -> str:
-        """Extract text content from page"""
-        text_parts = []
-        
-        if page.get("title"):
-            text_parts.append(page.get("title"))
-        if page.get("h1"):
-            text_parts.extend(page.get("h1", []))
-        if page.get("h2"):
-            text_parts.extend(page.get("h2", []))
-        if page.get("content"):
-            # Use first 2000 chars to avoid memory issues
-            text_parts.append(page.get("content", "")[:2000])
-        
-        return " ".join(text_parts)
-
+import hashlib
+from typing import Dict, List, Any, Optional, Set
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS, TfidfTransformer
+from sklearn.preprocessing import normalize
+import numpy as np
+
+from app.analysis.features import FeatureStore
+from app.analysis.minhash import MinHashSigner, jaccard, lsh_candidates
+from app.crawler.blocks import crawl_block_index
+
+
+class DuplicateDetector:
+    def __init__(self, crawl_results: Dict[str, Any], previous_state: Optional[Dict[str, Any]] = None,
+                 lsh_bands: int = 32, lsh_rows: int = 4, signer: Optional[MinHashSigner] = None,
+                 features: Optional[FeatureStore] = None):
+        self.crawl_results = crawl_results
+        self.pages = crawl_results.get("pages", [])
+        # Page texts (template boilerplate removed) and tokens, shared with
+        # the other analyzers when given
+        self.features = features or FeatureStore.for_crawl(crawl_results)
+        # MinHash and Jaccard only compare pairs sharing an LSH band. A pair at
+        # the 0.7 threshold becomes a candidate with probability
+        # 1 - (1 - 0.7 ** rows) ** bands (99.98% for 32x4); fewer bands or
+        # more rows mean fewer candidates but more misses
+        self.lsh_bands = lsh_bands
+        self.lsh_rows = lsh_rows
+        # Batch signatures (datasketch-compatible), sharded across processes on big crawls
+        self.signer = signer or MinHashSigner()
+        # Similarities computed per cosine block (rows x pages), which bounds
+        # its memory instead of materializing the full pages x pages matrix
+        self.cosine_block_size = 1_000_000
+        # State of this detector on an earlier scan of the site (see self.state):
+        # MinHash and Jaccard pairs between pages whose text hasn't changed are
+        # carried over, so only pairs involving changed pages are compared
+        self.previous_state = previous_state or {}
+        self.state: Dict[str, Any] = {"text_hashes": {}, "minhashes": {}, "word_minhashes": {}, "pairs": {}}
+        self.unchanged: Set[str] = set()
+        
+    def detect(self) -> Dict[str, Any]:
+        """Detect duplicate content using multiple methods"""
+        if not self.pages or len(self.pages) < 2:
+            return {
+                "duplicates": [],
+                "total_duplicates": 0,
+                "methods_used": []
+            }
+        
+        self.unchanged = self._unchanged_urls()
+        duplicates_minhash = self._detect_with_minhash()
+        duplicates_cosine = self._detect_with_cosine()
+        duplicates_jaccard = self._detect_with_jaccard()
+        
+        # Combine results (remove duplicates)
+        all_duplicates = {}
+        
+        for dup in duplicates_minhash + duplicates_cosine + duplicates_jaccard:
+            key = tuple(sorted([dup["page1"], dup["page2"]]))
+            if key not in all_duplicates or dup["similarity"] > all_duplicates[key]["similarity"]:
+                all_duplicates[key] = dup
+        
+        duplicates_list = list(all_duplicates.values())
+        duplicates_list.sort(key=lambda x: x["similarity"], reverse=True)
+        
+        return {
+            "duplicates": duplicates_list[:50],  # Top 50 duplicates
+            "total_duplicates": len(duplicates_list),
+            "methods_used": ["minhash", "cosine", "jaccard"],
+            # Paragraphs repeated across pages, from the crawl's block index
+            "shared_paragraphs": crawl_block_index(self.crawl_results).report()
+        }
+    
+    def _unchanged_urls(self) -> Set[str]:
+        """URLs whose detector text is identical to the previous scan's"""
+        previous_hashes = self.previous_state.get("text_hashes", {})
+        unchanged = set()
+        for url, text in zip(self.features.urls, self.features.texts):
+            text_hash = hashlib.md5(text.encode()).hexdigest()
+            self.state["text_hashes"][url] = text_hash
+            if previous_hashes.get(url) == text_hash:
+                unchanged.add(url)
+        return unchanged
+    
+    def _carried_pairs(self, method: str, unchanged: Set[str]) -> List[Dict[str, Any]]:
+        """Previous pairs of a method whose pages are both unchanged"""
+        return [dup for dup in self.previous_state.get("pairs", {}).get(method, [])
+                if dup["page1"] in unchanged and dup["page2"] in unchanged]
+    
+    def _signatures(self, urls: List[str], hashes: List[np.ndarray], state_key: str) -> np.ndarray:
+        """MinHash signature matrix with one row per url, reusing the previous
+        scan's rows for unchanged pages and signing the rest in one batch"""
+        previous = self.previous_state.get(state_key, {})
+        signatures = np.empty((len(urls), self.signer.num_perm), dtype=np.uint32)
+        fresh = []
+        for i, url in enumerate(urls):
+            row = previous.get(url) if url in self.unchanged else None
+            if row is None:
+                fresh.append(i)
+            else:
+                signatures[i] = row
+        if fresh:
+            signatures[fresh] = self.signer.signatures_from_hashes([hashes[i] for i in fresh])
+        for url, row in zip(urls, signatures):
+            self.state[state_key][url] = row
+        return signatures
+    
+    def _detect_with_minhash(self) -> List[Dict[str, Any]]:
+        """Detect duplicates using MinHash"""
+        duplicates = []
+        
+        try:
+            unchanged = self.unchanged
+            # MinHash of each page's 3-word shingles, as rows of one signature matrix
+            features = self.features
+            rows = [i for i, text in enumerate(features.texts) if text]
+            shingles = features.shingle_hashes(3)
+            urls = [features.urls[i] for i in rows]
+            signatures = self._signatures(urls, [shingles[i] for i in rows], "minhashes")
+            
+            duplicates.extend(self._carried_pairs("minhash", unchanged))
+            # Compare LSH candidate pairs not already known from the previous scan
+            skip = np.array([url in unchanged for url in urls], dtype=bool)
+            for i, j in lsh_candidates(signatures, self.lsh_bands, self.lsh_rows, skip):
+                similarity = jaccard(signatures, i, j)
+                if similarity > 0.7:  # Threshold
+                    duplicates.append({
+                        "page1": urls[i],
+                        "page2": urls[j],
+                        "similarity": round(similarity, 3),
+                        "method": "minhash"
+                    })
+            self.state["pairs"]["minhash"] = duplicates
+        except Exception as e:
+            print(f"MinHash error: {e}")
+            # Partial pairs can't be carried over; compare everything next time
+            self.state["text_hashes"].clear()
+        
+        return duplicates
+    
+    def _detect_with_cosine(self) -> List[Dict[str, Any]]:
+        """Detect duplicates using Cosine Similarity"""
+        duplicates = []
+        
+        try:
+            # Pages with enough text (minimum length)
+            rows = [i for i, text in enumerate(self.features.texts) if text and len(text) > 100]
+            urls = [self.features.urls[i] for i in rows]
+            
+            if len(rows) < 2:
+                return duplicates
+            
+            # TF-IDF of the shared token counts (what TfidfVectorizer(max_features=1000,
+            # stop_words='english') would compute from the texts)
+            counts, _ = self.features.term_counts(rows=rows, stop_words=ENGLISH_STOP_WORDS, max_features=1000)
+            tfidf_matrix = TfidfTransformer().fit_transform(counts)
+            
+            # Cosine similarity as a sparse product of L2-normalized rows (what
+            # cosine_similarity computes), one block of rows at a time, keeping
+            # only pairs above the threshold
+            vectors = normalize(tfidf_matrix).tocsr()
+            vectors_t = vectors.T.tocsr()
+            block_rows = max(1, self.cosine_block_size // len(urls))
+            for start in range(0, len(urls), block_rows):
+                block = (vectors[start:start + block_rows] @ vectors_t).tocoo()
+                rows = block.row + start
+                keep = (block.col > rows) & (block.data > 0.7)  # Threshold
+                rows, cols, similarities = rows[keep], block.col[keep], block.data[keep]
+                for k in np.lexsort((cols, rows)):
+                    duplicates.append({
+                        "page1": urls[rows[k]],
+                        "page2": urls[cols[k]],
+                        "similarity": round(similarities[k], 3),
+                        "method": "cosine"
+                    })
+        except Exception as e:
+            print(f"Cosine similarity error: {e}")
+        
+        return duplicates
+    
+    def _detect_with_jaccard(self) -> List[Dict[str, Any]]:
+        """Detect duplicates using Jaccard Similarity"""
+        duplicates = []
+        
+        try:
+            unchanged = self.unchanged
+            # Create lowercase word (term id) sets for each page, with a MinHash of each set for LSH
+            features = self.features
+            token_ids, _ = features.tokens("split_lower")
+            word_hashes = features.hashes("split_lower")
+            page_sets = []
+            for url, ids in zip(features.urls, token_ids):
+                words = np.unique(ids)
+                if len(words) > 10:  # Minimum words
+                    page_sets.append({
+                        "words": words,
+                        "url": url
+                    })
+            urls = [item["url"] for item in page_sets]
+            signatures = self._signatures(urls, [word_hashes[item["words"]] for item in page_sets], "word_minhashes")
+            
+            duplicates.extend(self._carried_pairs("jaccard", unchanged))
+            # Exact Jaccard on LSH candidate pairs not already known from the previous scan
+            skip = np.array([url in unchanged for url in urls], dtype=bool)
+            for i, j in lsh_candidates(signatures, self.lsh_bands, self.lsh_rows, skip):
+                set1 = page_sets[i]["words"]
+                set2 = page_sets[j]["words"]
+                
+                intersection = len(np.intersect1d(set1, set2, assume_unique=True))
+                union = len(set1) + len(set2) - intersection
+                
+                if union > 0:
+                    jaccard = intersection / union
+                    if jaccard > 0.7:  # Threshold
+                        duplicates.append({
+                            "page1": page_sets[i]["url"],
+                            "page2": page_sets[j]["url"],
+                            "similarity": round(jaccard, 3),
+                            "method": "jaccard"
+                        })
+            self.state["pairs"]["jaccard"] = duplicates
+        except Exception as e:
+            print(f"Jaccard similarity error: {e}")
+            # Partial pairs can't be carried over; compare everything next time
+            self.state["text_hashes"].clear()
+        
+        return duplicates
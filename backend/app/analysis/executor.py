@@ -0,0 +1,223 @@
+import asyncio
+import mmap
+import multiprocessing
+import os
+import pickle
+import tempfile
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.analysis.duplicates import DuplicateDetector
+from app.analysis.features import FeatureStore
+from app.analysis.keywords import KeywordAnalyzer
+from app.analysis.page_power import PagePowerAnalyzer
+from app.audit.seo_audit import SEOAuditor
+
+# Results each stage falls back to when its analyzer fails
+EMPTY_RESULTS: Dict[str, Dict[str, Any]] = {
+    "seo_audit": {"score": 0, "issues": [], "warnings": [], "summary": {"total_issues": 0, "total_warnings": 0, "total_pages": 0}},
+    "keywords": {"keywords": {"rake": [], "ngrams": {"unigrams": [], "bigrams": [], "trigrams": []}, "tfidf": []}, "keyword_clusters": [], "total_keywords": 0},
+    "duplicates": {"duplicates": [], "total_duplicates": 0, "methods_used": []},
+    "page_power": {"page_power": {}, "top_pages": [], "average_power": 0},
+}
+
+
+def _seo_audit(crawl_results: Dict[str, Any], **_) -> Tuple[Dict[str, Any], Any]:
+    return SEOAuditor(crawl_results).audit(), None
+
+
+def _keywords(crawl_results: Dict[str, Any], features: Optional[FeatureStore] = None,
+              **_) -> Tuple[Dict[str, Any], Any]:
+    return KeywordAnalyzer(crawl_results, features=features).analyze(), None
+
+
+def _duplicates(crawl_results: Dict[str, Any], duplicate_state: Optional[Dict[str, Any]] = None,
+                features: Optional[FeatureStore] = None, **_) -> Tuple[Dict[str, Any], Any]:
+    detector = DuplicateDetector(crawl_results, previous_state=duplicate_state, features=features)
+    return detector.detect(), detector.state
+
+
+def _page_power(crawl_results: Dict[str, Any], **_) -> Tuple[Dict[str, Any], Any]:
+    return PagePowerAnalyzer(crawl_results).analyze(), None
+
+
+# Independent analysis stages; each returns (result, state to keep for the next scan)
+STAGES: Dict[str, Callable[..., Tuple[Dict[str, Any], Any]]] = {
+    "seo_audit": _seo_audit,
+    "keywords": _keywords,
+    "duplicates": _duplicates,
+    "page_power": _page_power,
+}
+
+
+def _load_snapshot(path: str) -> Tuple[Dict[str, Any], FeatureStore]:
+    """Map a pickled (crawl results, features) snapshot and unpickle it straight from the mapping"""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        return pickle.loads(mapped)
+
+
+def _warm_up():
+    """No-op whose import loads the analyzers (sklearn, nltk) in a worker"""
+
+
+def _execute_stage(stage: str, crawl_results: Dict[str, Any], features: Optional[FeatureStore],
+                   kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one analysis stage on in-memory crawl results"""
+    start = time.perf_counter()
+    result, state = STAGES[stage](crawl_results, features=features, **kwargs)
+    return {
+        "result": result,
+        "state": state,
+        "load_seconds": 0.0,
+        "seconds": time.perf_counter() - start
+    }
+
+
+def _run_stage(stage: str, snapshot_path: str, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one analysis stage against a snapshot (in a worker process)"""
+    start = time.perf_counter()
+    crawl_results, features = _load_snapshot(snapshot_path)
+    outcome = _execute_stage(stage, crawl_results, features, kwargs)
+    outcome["load_seconds"] = time.perf_counter() - start - outcome["seconds"]
+    return outcome
+
+
+def _free_bytes(directory: str) -> int:
+    try:
+        stats = os.statvfs(directory)
+    except (AttributeError, OSError):
+        return 0
+    return stats.f_bavail * stats.f_frsize
+
+
+class AnalysisExecutor:
+    """Runs the independent post-crawl analyzers concurrently in worker processes
+
+    The crawl results are pickled once into a snapshot file that each
+    stage memory-maps in its worker, instead of pickling the pages again
+    for every analyzer. The snapshot goes to /dev/shm when it fits there
+    (so it never touches disk) and to the temp directory otherwise. It
+    also holds the scan's FeatureStore, so page text is tokenized once
+    (with template boilerplate already removed) rather than by every
+    analyzer.
+    workers=0 runs the stages on threads in this process, which still
+    keeps them off the event loop; they share the in-memory crawl results
+    and features, so no snapshot is written. If the snapshot can't be
+    written at all, the stages run that way too.
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = min(len(STAGES), os.cpu_count() or 1) if workers is None else workers
+        self.executor: Optional[Executor] = None
+
+    def start(self):
+        if self.executor is not None:
+            return
+        if self.workers <= 0:
+            self.executor = ThreadPoolExecutor(max_workers=len(STAGES), thread_name_prefix="analysis")
+        else:
+            # Same reasoning as the parser pool: never fork a process with live threads
+            start_methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver") if "forkserver" in start_methods else None
+            self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+
+    def warm_up(self):
+        """Start the workers now, so the first scan doesn't pay for their imports"""
+        self.start()
+        if isinstance(self.executor, ProcessPoolExecutor):
+            for _ in range(self.workers):
+                self.executor.submit(_warm_up)
+
+    def _write_snapshot(self, crawl_results: Dict[str, Any], features: FeatureStore) -> str:
+        """Pickle (crawl results, features) to a file; returns its path
+
+        Uses /dev/shm when the snapshot fits in its free space (Docker
+        caps it at 64 MB by default) and falls back to the temp directory
+        when it doesn't or the write fails there. A partly written file
+        is always removed.
+        """
+        data = pickle.dumps((crawl_results, features), protocol=pickle.HIGHEST_PROTOCOL)
+        directories = [tempfile.gettempdir()]
+        # Keep some headroom for other users of the shared-memory mount
+        if os.path.isdir("/dev/shm") and _free_bytes("/dev/shm") > len(data) * 1.25:
+            directories.insert(0, "/dev/shm")
+        for i, directory in enumerate(directories):
+            path = None
+            try:
+                fd, path = tempfile.mkstemp(prefix="crawl-snapshot-", suffix=".pickle", dir=directory)
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                return path
+            except OSError as e:
+                if path is not None:
+                    os.remove(path)
+                if i == len(directories) - 1:
+                    raise
+                print(f"Writing the analysis snapshot to {directory} failed ({e}), using {directories[i + 1]}")
+
+    async def analyze(self, crawl_results: Dict[str, Any],
+                      duplicate_state: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Run every stage concurrently; returns each stage's result, the new
+        duplicate state and per-stage timings"""
+        self.start()
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        features = await loop.run_in_executor(None, FeatureStore.for_crawl, crawl_results)
+        features_seconds = time.perf_counter() - start
+        snapshot_path = None
+        if isinstance(self.executor, ProcessPoolExecutor):
+            try:
+                snapshot_path = await loop.run_in_executor(None, self._write_snapshot, crawl_results, features)
+            except Exception as e:
+                print(f"Could not write the analysis snapshot ({e}), running the analyzers in this process")
+        snapshot_seconds = time.perf_counter() - start - features_seconds
+        stage_kwargs = {"duplicates": {"duplicate_state": duplicate_state}}
+
+        async def run(stage: str) -> Dict[str, Any]:
+            print(f"Running {stage} analysis...")
+            stage_start = time.perf_counter()
+            kwargs = stage_kwargs.get(stage, {})
+            try:
+                if snapshot_path is not None:
+                    outcome = await loop.run_in_executor(self.executor, _run_stage, stage, snapshot_path, kwargs)
+                else:
+                    # Threads (this executor's, or the loop's default pool when
+                    # the worker processes couldn't get a snapshot)
+                    thread_executor = None if isinstance(self.executor, ProcessPoolExecutor) else self.executor
+                    outcome = await loop.run_in_executor(
+                        thread_executor, _execute_stage, stage, crawl_results, features, kwargs
+                    )
+            except Exception as e:
+                print(f"{stage} analysis failed: {e}")
+                outcome = {"result": EMPTY_RESULTS[stage], "state": None, "load_seconds": 0.0, "seconds": 0.0}
+            outcome["wall_seconds"] = time.perf_counter() - stage_start
+            return outcome
+
+        try:
+            outcomes = dict(zip(STAGES, await asyncio.gather(*(run(stage) for stage in STAGES))))
+        finally:
+            if snapshot_path is not None:
+                os.remove(snapshot_path)
+
+        analysis: Dict[str, Any] = {stage: outcome["result"] for stage, outcome in outcomes.items()}
+        analysis["duplicate_state"] = outcomes["duplicates"]["state"]
+        analysis["timings"] = {
+            "features_seconds": round(features_seconds, 3),
+            "snapshot_seconds": round(snapshot_seconds, 3),
+            "stages": {
+                stage: {
+                    "seconds": round(outcome["seconds"], 3),
+                    "load_seconds": round(outcome["load_seconds"], 3),
+                    "wall_seconds": round(outcome["wall_seconds"], 3)
+                }
+                for stage, outcome in outcomes.items()
+            },
+            "total_seconds": round(time.perf_counter() - start, 3)
+        }
+        return analysis
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
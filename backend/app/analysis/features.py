@@ -0,0 +1,236 @@
+import re
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from app.analysis.minhash import hash_tokens
+from app.crawler.blocks import crawl_block_index, strip_blocks
+
+# Normalized tokens: lowercase runs of word characters
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def _content(page: Dict[str, Any], boilerplate: Optional[Set[int]]) -> str:
+    content = page.get("content", "")
+    if boilerplate:
+        content = strip_blocks(content, page.get("text_blocks") or (), boilerplate)
+    return content
+
+
+def page_text(page: Dict[str, Any], boilerplate: Optional[Set[int]] = None) -> str:
+    """Text analyzers read from a page: title, headings and the first 2000 content chars
+
+    Content blocks whose hash is in boilerplate are cut out first.
+    """
+    text_parts = []
+    if page.get("title"):
+        text_parts.append(page.get("title"))
+    if page.get("h1"):
+        text_parts.extend(page.get("h1", []))
+    if page.get("h2"):
+        text_parts.extend(page.get("h2", []))
+    if page.get("content"):
+        # Use first 2000 chars to avoid memory issues
+        text_parts.append(_content(page, boilerplate)[:2000])
+    return " ".join(text_parts)
+
+
+def keyword_document(page: Dict[str, Any], boilerplate: Optional[Set[int]] = None) -> str:
+    """The page's TF-IDF keyword document: title, h1s and the first 1000 content chars"""
+    doc_parts = []
+    if page.get("title"):
+        doc_parts.append(page.get("title"))
+    if page.get("h1"):
+        doc_parts.extend(page.get("h1", []))
+    if page.get("content"):
+        doc_parts.append(_content(page, boilerplate)[:1000])
+    return " ".join(doc_parts)
+
+
+def _tokenize(texts: Iterable[str], split: Callable[[str], List[str]]) -> Tuple[List[np.ndarray], List[str]]:
+    """Each text's tokens (split(text)) as ids, and the tokens by id
+
+    Ids are numbered in order of first appearance across the texts.
+    """
+    vocabulary: Dict[str, int] = {}
+    ids = [np.array([vocabulary.setdefault(token, len(vocabulary)) for token in split(text)], dtype=np.int32)
+           for text in texts]
+    return ids, list(vocabulary)
+
+
+def _words(text: str) -> List[str]:
+    return WORD_PATTERN.findall(text.lower())
+
+
+def _lower_split(text: str) -> List[str]:
+    return text.lower().split()
+
+
+# How each view of the store tokenizes (view name -> text attribute, split)
+_VIEWS: Dict[str, Tuple[str, Callable[[str], List[str]]]] = {
+    # Normalized words: keywords' n-grams, cosine similarity
+    "words": ("texts", _words),
+    # Whitespace-separated words, punctuation and case kept: MinHash shingles
+    "split": ("texts", str.split),
+    # Lowercase whitespace-separated words: Jaccard word sets
+    "split_lower": ("texts", _lower_split),
+    # Normalized words of the keyword documents: TF-IDF keywords
+    "keyword_words": ("keyword_texts", _words),
+}
+
+
+def _ngrams(sequences: Sequence[np.ndarray], n: int) -> Tuple[List[np.ndarray], np.ndarray]:
+    """Dense n-gram ids for every window of n tokens in each sequence
+
+    Ids are numbered in order of first appearance across the sequences;
+    returns the per-sequence id arrays and the (ngrams, n) token ids of
+    each n-gram.
+    """
+    windows = [np.lib.stride_tricks.sliding_window_view(sequence, n) if len(sequence) >= n
+               else np.empty((0, n), dtype=np.int32) for sequence in sequences]
+    stacked = np.concatenate(windows) if windows else np.empty((0, n), dtype=np.int32)
+    if not len(stacked):
+        return [np.empty(0, dtype=np.int64) for _ in sequences], stacked
+    members, first, inverse = np.unique(stacked, axis=0, return_index=True, return_inverse=True)
+    order = np.argsort(first, kind="stable")
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    ids = rank[inverse.ravel()]
+    return np.split(ids, np.cumsum([len(window) for window in windows])[:-1]), members[order]
+
+
+class FeatureStore:
+    """Text features of a scan's pages, built once and shared by every analyzer
+
+    Each page's text is assembled a single time and tokenized once per
+    view, each view reproducing the tokenization its analyzers have always
+    used (see _VIEWS): normalized words for keywords and cosine similarity,
+    whitespace-separated words for MinHash and Jaccard, and TF-IDF keywords'
+    own shorter documents. A view is an array of ids per page into the
+    view's vocabulary (terms are numbered in order of first appearance
+    across the crawl, so counting ids reproduces Counter's ordering). The
+    "words" view is built up front; the others, the term-frequency matrix
+    and the terms' MinHash hashes are computed on first use and cached.
+    Blocks whose hash is in boilerplate (template text, see BlockIndex) are
+    left out of every page's text.
+    """
+
+    def __init__(self, pages: Iterable[Dict[str, Any]], boilerplate: Optional[Set[int]] = None):
+        self.urls: List[str] = []
+        self.texts: List[str] = []
+        self.keyword_texts: List[str] = []
+        for page in pages:
+            self.urls.append(page.get("url"))
+            self.texts.append(page_text(page, boilerplate))
+            self.keyword_texts.append(keyword_document(page, boilerplate))
+        self._views: Dict[str, Tuple[List[np.ndarray], List[str]]] = {}
+        self._hashes: Dict[str, np.ndarray] = {}
+        self.token_ids, self.terms = self.tokens("words")
+        self._tf: Optional[csr_matrix] = None
+
+    @classmethod
+    def for_crawl(cls, crawl_results: Dict[str, Any], boilerplate_threshold: Optional[float] = 0.5) -> "FeatureStore":
+        """Features of a crawl's pages without the blocks found on more than
+        boilerplate_threshold of them (None keeps every block)"""
+        pages = crawl_results.get("pages", [])
+        boilerplate = None
+        if boilerplate_threshold is not None:
+            boilerplate = crawl_block_index(crawl_results).boilerplate(boilerplate_threshold)
+        return cls(pages, boilerplate)
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    @property
+    def tf(self) -> csr_matrix:
+        """(pages, terms) term-frequency matrix"""
+        if self._tf is None:
+            lengths = [len(ids) for ids in self.token_ids]
+            rows = np.repeat(np.arange(len(lengths)), lengths)
+            columns = np.concatenate(self.token_ids) if self.token_ids else np.empty(0, dtype=np.int32)
+            self._tf = csr_matrix((np.ones(len(columns), dtype=np.int64), (rows, columns)),
+                                  shape=(len(lengths), len(self.terms)))
+            self._tf.sum_duplicates()
+        return self._tf
+
+    def tokens(self, view: str = "words") -> Tuple[List[np.ndarray], List[str]]:
+        """Each page's token ids under view, and the view's terms by id"""
+        if view not in self._views:
+            attribute, split = _VIEWS[view]
+            self._views[view] = _tokenize(getattr(self, attribute), split)
+        return self._views[view]
+
+    def hashes(self, view: str = "words") -> np.ndarray:
+        """MinHash token hash of every term of view, by term id"""
+        if view not in self._hashes:
+            self._hashes[view] = hash_tokens(self.tokens(view)[1])
+        return self._hashes[view]
+
+    def all_token_ids(self) -> np.ndarray:
+        """Token ids of every page in crawl order, as if their texts were joined"""
+        return np.concatenate(self.token_ids) if self.token_ids else np.empty(0, dtype=np.int32)
+
+    def top_ngrams(self, n: int, limit: int) -> List[Tuple[str, int]]:
+        """The limit most frequent n-grams of the joined texts with their counts
+        (ties in order of first appearance, like Counter.most_common)"""
+        if n == 1:
+            ids, terms = self.all_token_ids(), [(term,) for term in self.terms]
+        else:
+            (ids,), members = _ngrams([self.all_token_ids()], n)
+            terms = [tuple(self.terms[t] for t in member) for member in members.tolist()]
+        counts = np.bincount(ids, minlength=len(terms))
+        top = np.argsort(-counts, kind="stable")[:limit]
+        return [(" ".join(terms[i]), int(counts[i])) for i in top if counts[i]]
+
+    def shingle_hashes(self, n: int = 3) -> List[np.ndarray]:
+        """MinHash token hashes of each page's n-word shingles ("w1 w2 w3") of
+        whitespace-separated words, hashing every distinct shingle of the crawl once"""
+        token_ids, terms = self.tokens("split")
+        ids, members = _ngrams(token_ids, n)
+        hashes = hash_tokens([" ".join(terms[t] for t in member) for member in members.tolist()])
+        return [hashes[page_ids] for page_ids in ids]
+
+    def term_counts(self, rows: Optional[Sequence[int]] = None, ngram_range: Tuple[int, int] = (1, 1),
+                    stop_words: Iterable[str] = (), min_length: int = 2, max_features: Optional[int] = None,
+                    view: str = "words") -> Tuple[csr_matrix, List[str]]:
+        """Count matrix and feature names of view's pages, as CountVectorizer builds them
+
+        Terms shorter than min_length and stop words are dropped before
+        n-grams are formed (the default token_pattern keeps 2+ character
+        words); features are sorted by name and limited to the max_features
+        most frequent. Raises ValueError when no features remain.
+        """
+        token_ids, terms = self.tokens(view)
+        rows = range(len(self)) if rows is None else rows
+        stop_words = set(stop_words)
+        keep = np.array([len(term) >= min_length and term not in stop_words for term in terms], dtype=bool)
+        sequences = [token_ids[row][keep[token_ids[row]]] for row in rows]
+
+        names: List[str] = []
+        columns: List[List[np.ndarray]] = [[] for _ in sequences]
+        for n in range(ngram_range[0], ngram_range[1] + 1):
+            ids, members = _ngrams(sequences, n)
+            for page_columns, page_ids in zip(columns, ids):
+                page_columns.append(page_ids + len(names))
+            names.extend(" ".join(terms[t] for t in member) for member in members.tolist())
+        if not names:
+            raise ValueError("empty vocabulary; perhaps the documents only contain stop words")
+
+        page_columns = [np.concatenate(parts) for parts in columns]
+        matrix_rows = np.repeat(np.arange(len(page_columns)), [len(parts) for parts in page_columns])
+        # Renumber columns in name order
+        order = np.argsort(np.array(names))
+        position = np.empty(len(order), dtype=np.int64)
+        position[order] = np.arange(len(order))
+        counts = csr_matrix((np.ones(len(matrix_rows)), (matrix_rows, position[np.concatenate(page_columns)])),
+                            shape=(len(page_columns), len(names)))
+        counts.sum_duplicates()
+        names = [names[i] for i in order]
+
+        if max_features is not None and len(names) > max_features:
+            frequencies = np.asarray(counts.sum(axis=0)).ravel()
+            kept = np.sort((-frequencies).argsort()[:max_features])
+            counts = counts[:, kept]
+            names = [names[i] for i in kept]
+        return counts, names
@@ -0,0 +1,129 @@
+import hashlib
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Same constants as datasketch.minhash, so signatures are interchangeable
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def permutations(num_perm: int = 128, seed: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    """The (a, b) permutation parameters datasketch's MinHash uses for seed"""
+    generator = np.random.RandomState(seed)
+    params = np.array([
+        (generator.randint(1, MERSENNE_PRIME, dtype=np.uint64),
+         generator.randint(0, MERSENNE_PRIME, dtype=np.uint64))
+        for _ in range(num_perm)
+    ], dtype=np.uint64).T
+    return params[0], params[1]
+
+
+def hash_tokens(tokens: Sequence[str]) -> np.ndarray:
+    """sha1_hash32 of every token (its UTF-8 bytes), as one uint64 array"""
+    digests = b"".join(hashlib.sha1(token.encode("utf8")).digest()[:4] for token in tokens)
+    return np.frombuffer(digests, dtype="<u4").astype(np.uint64)
+
+
+def _sign(documents: Sequence[np.ndarray], num_perm: int, seed: int, batch_tokens: int) -> np.ndarray:
+    """Signature matrix for documents given as token hash arrays (in this process)"""
+    a, b = permutations(num_perm, seed)
+    signatures = np.full((len(documents), num_perm), MAX_HASH, dtype=np.uint32)
+    start = 0
+    while start < len(documents):
+        # Take documents until the batch holds batch_tokens tokens, so the
+        # (tokens x num_perm) permuted matrix has bounded size
+        end, size = start, 0
+        while end < len(documents) and (end == start or size + len(documents[end]) <= batch_tokens):
+            size += len(documents[end])
+            end += 1
+        lengths = np.array([len(document) for document in documents[start:end]])
+        filled = np.flatnonzero(lengths)
+        if len(filled):
+            hashes = np.concatenate([documents[i] for i in range(start, end)]).astype(np.uint64)
+            # uint64 arithmetic wraps exactly like MinHash.update_batch
+            permuted = (hashes[:, np.newaxis] * a + b) % MERSENNE_PRIME & MAX_HASH
+            offsets = np.concatenate(([0], np.cumsum(lengths[filled])[:-1]))
+            signatures[start + filled] = np.minimum.reduceat(permuted, offsets, axis=0)
+        start = end
+    return signatures
+
+
+class MinHashSigner:
+    """Batch MinHash signatures, bit-identical to datasketch's MinHash
+
+    Row i of signatures() equals MinHash(num_perm, seed) updated with
+    document i's tokens, so thresholds tuned on datasketch still hold and
+    a row can be wrapped with MinHash(hashvalues=row) where needed.
+    Documents without tokens get the all-MAX_HASH row of an empty MinHash.
+    Token hashing is the only per-token Python work (none at all when the
+    hashes come from a FeatureStore); permutations and minimums are array
+    operations. Crawls of at least parallel_min_documents documents are
+    split across a process pool of `workers` processes.
+    """
+
+    def __init__(self, num_perm: int = 128, seed: int = 1, workers: Optional[int] = None,
+                 parallel_min_documents: int = 2000, batch_tokens: int = 65536):
+        self.num_perm = num_perm
+        self.seed = seed
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.parallel_min_documents = parallel_min_documents
+        self.batch_tokens = batch_tokens
+
+    def signatures(self, documents: List[Sequence[str]]) -> np.ndarray:
+        """(len(documents), num_perm) uint32 signature matrix"""
+        return self.signatures_from_hashes([hash_tokens(document) for document in documents])
+
+    def signatures_from_hashes(self, documents: List[np.ndarray]) -> np.ndarray:
+        """Signature matrix for documents whose tokens are already hashed
+        (see hash_tokens)"""
+        if self.workers < 2 or len(documents) < self.parallel_min_documents:
+            return _sign(documents, self.num_perm, self.seed, self.batch_tokens)
+
+        shard_size = -(-len(documents) // self.workers)
+        shards = [documents[i:i + shard_size] for i in range(0, len(documents), shard_size)]
+        # Never fork a process that may have live threads (same as the parser pool)
+        start_methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("forkserver") if "forkserver" in start_methods else None
+        with ProcessPoolExecutor(max_workers=len(shards), mp_context=context) as executor:
+            parts = executor.map(_sign, shards, [self.num_perm] * len(shards), [self.seed] * len(shards),
+                                 [self.batch_tokens] * len(shards))
+            return np.vstack(list(parts))
+
+
+def jaccard(signatures: np.ndarray, i: int, j: int) -> float:
+    """Estimated Jaccard of rows i and j, computed as MinHash.jaccard does"""
+    return float(np.count_nonzero(signatures[i] == signatures[j])) / float(signatures.shape[1])
+
+
+def lsh_candidates(signatures: np.ndarray, bands: int, rows: int,
+                   skip: Optional[np.ndarray] = None) -> List[Tuple[int, int]]:
+    """Row pairs (i < j) whose signatures agree on every row of at least one band
+
+    The same candidates MinHashLSH(params=(bands, rows)) returns. Pairs
+    where both rows are flagged in the boolean skip mask are left out.
+    """
+    count = signatures.shape[0]
+    if skip is None:
+        skip = np.zeros(count, dtype=bool)
+    candidates = set()
+    for band in range(bands):
+        keys = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+        keys = keys.view(np.dtype((np.void, keys.dtype.itemsize * rows))).ravel()
+        _, bucket, sizes = np.unique(keys, return_inverse=True, return_counts=True)
+        shared = np.flatnonzero(sizes[bucket] > 1)
+        if not len(shared):
+            continue
+        members = shared[np.argsort(bucket[shared], kind="stable")]
+        boundaries = np.flatnonzero(np.diff(bucket[members])) + 1
+        for group in np.split(members, boundaries):
+            group = group.tolist()
+            for x in range(len(group)):
+                for y in range(x + 1, len(group)):
+                    i, j = group[x], group[y]
+                    if not (skip[i] and skip[j]):
+                        candidates.add((i, j))
+    return sorted(candidates)
@@ -0,0 +1,326 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.crawler.pagetable import PageTable
+
+
+class AuditRule:
+    """One SEO check, evaluated as array predicates over the PageTable
+
+    finish() selects the matching rows and builds issue dicts for those
+    pages only, plus whatever comes from crawl-wide data such as the link
+    analysis. Each rule keeps its own issues and warnings so the audit can
+    report them in rule order.
+    """
+
+    def __init__(self):
+        self.issues: List[Dict[str, Any]] = []
+        self.warnings: List[Dict[str, Any]] = []
+
+    def finish(self, crawl_results: Dict[str, Any], table: PageTable):
+        pass
+
+
+class MissingTitleRule(AuditRule):
+    """Pages without titles"""
+
+    def finish(self, crawl_results: Dict[str, Any], table: PageTable):
+        for row in table.rows(table["title_length"] == 0):
+            page = table.pages[row]
+            self.issues.append({
+                "type": "missing_title",
+                "severity": "high",
+                "page": page.get("url"),
+                "message": "Page is missing a title tag",
+                "fix": "Add a <title> tag in the <head> section of your HTML",
+                "example": "<title>Your Page Title Here</title>",
+                "location": "HTML <head> section",
+                "impact": "Titles are crucial for SEO and appear in search results"
+            })
+
+
+class MissingMetaDescriptionRule(AuditRule):
+    """Pages without meta descriptions"""
+
+    def finish(self, crawl_results: Dict[str, Any], table: PageTable):
+        for row in table.rows(table["meta_description_length"] == 0):
+            page = table.pages[row]
+            self.warnings.append({
+                "type": "missing_meta_description",
+                "severity": "medium",
+                "page": page.get("url"),
+                "message": "Page is missing a meta description",
+                "fix": "Add a meta description tag in the <head> section",
+                "example": '<meta name="description" content="Your page description here (150-160 characters)">',
+                "location": "HTML <head> section",
+                "impact": "Meta descriptions appear in search results and can improve click-through rates"
+            })
+
+
+class ShortContentRule(AuditRule):
+    """Pages with very short content"""
+
+    def finish(self, crawl_results: Dict[str, Any], table: PageTable):
+        for row in table.rows(table["word_count"] < 300):
+            page = table.pages[row]
+            word_count = page.get("word_count", 0)
+            self.warnings.append({
+                "type": "short_content",
+                "severity": "medium",
+                "page": page.get("url"),
+                "message": f"Page has only {word_count} words (recommended: 300+)",
+                "word_count": word_count,
+                "fix": "Add more relevant content to the page. Aim for at least 300 words",
+                "location": page.get("url"),
+                "impact": "Short content may not rank well in search engines"
+            })
+
+
+class H1Rule(AuditRule):
+    """Pages with multiple or missing H1 tags"""
+
+    def finish(self, crawl_results: Dict[str, Any], table: PageTable):
+        h1_count = table["h1_count"]
+        for row in table.rows(h1_count > 1):
+            page = table.pages[row]
+            h1_tags = page.get("h1", [])
+            self.issues.append({
+                "type": "multiple_h1",
+                "severity": "high",
+                "page": page.get("url"),
+                "message": f"Page has {len(h1_tags)} H1 tags (should be 1)",
+                "h1_count": len(h1_tags),
+                "h1_tags": h1_tags,
+                "fix": "Keep only one H1 tag per page. Use H2-H6 for other headings",
+                "example": "<h1>Main Page Title</h1>\n<h2>Section Title</h2>",
+                "location": "Page body content",
+                "impact": "Multiple H1 tags can confuse search engines about page hierarchy"
+            })
+        for row in table.rows(h1_count == 0):
+            page = table.pages[row]
+            self.warnings.append({
+                "type": "missing_h1",
+                "severity": "medium",
+                "page": page.get("url"),
+                "message": "Page is missing an H1 tag",
+                "fix": "Add a single H1 tag with your main page heading",
+                "example": "<h1>Your Main Heading</h1>",
+                "location": "Page body content",
+                "impact": "H1 tags help search engines understand page structure"
+            })
+
+
+class BrokenLinksRule(AuditRule):
+    """Pages returning 4xx/5xx, then broken links found during crawling"""
+
+    STATUS_MESSAGES = {
+        404: "Page Not Found",
+        500: "Internal Server Error",
+        502: "Bad Gateway",
+        503: "Service Unavailable",
+        504: "Gateway Timeout"
+    }
+
+    def finish(self, crawl_results: Dict[str, Any], table: PageTable):
+        broken = np.isin(table["status_code"], list(self.STATUS_MESSAGES))
+        for row in table.rows(broken):
+            page = table.pages[row]
+            status_code = page.get("status_code", 200)
+            self.issues.append({
+                "type": "broken_link",
+                "severity": "high",
+                "page": page.get("url"),
+                "message": f"Page returns status code {status_code} ({self.STATUS_MESSAGES.get(status_code, 'Error')})",
+                "status_code": status_code,
+                "fix": f"Fix the {self.STATUS_MESSAGES.get(status_code, 'server error')}. Check if the page exists, server configuration, or hosting issues",
+                "location": page.get("url"),
+                "impact": "Broken pages harm user experience and SEO rankings"
+            })
+
+        link_analysis = crawl_results.get('link_analysis', {})
+        for broken_link in link_analysis.get('broken_links', []):
+            self.issues.append({
+                "type": "broken_link_detected",
+                "severity": "high",
+                "page": broken_link.get("source_page"),
+                "message": f"Broken link found: {broken_link.get('issue', 'Unknown issue')}",
+                "broken_url": broken_link.get("url"),
+                "anchor_text": broken_link.get("anchor_text", "No text"),
+                "location": broken_link.get("location", "Unknown"),
+                "fix": broken_link.get("reason", "Fix or remove this link"),
+                "impact": "Broken links create poor user experience"
+            })
+
+
+class RedirectRule(AuditRule):
+    """Pages answering with a redirect (3xx status codes)"""
+
+    REDIRECT_CODES = (301, 302, 307, 308)
+
+    def finish(self, crawl_results: Dict[str, Any], table: PageTable):
+        for row in table.rows(np.isin(table["status_code"], self.REDIRECT_CODES)):
+            page = table.pages[row]
+            status_code = page.get("status_code", 200)
+            self.warnings.append({
+                "type": "redirect",
+                "severity": "medium",
+                "page": page.get("url"),
+                "message": f"Page redirects with status {status_code}",
+                "status_code": status_code
+            })
+
+
+class CanonicalRule(AuditRule):
+    """Canonical tags pointing at a different path"""
+
+    def finish(self, crawl_results: Dict[str, Any], table: PageTable):
+        for row in table.rows(table["canonical_mismatch"] == 1):
+            page = table.pages[row]
+            page_url = page.get("url", "")
+            canonical = page.get("canonical", "")
+            self.warnings.append({
+                "type": "canonical_mismatch",
+                "severity": "low",
+                "page": page_url,
+                "message": f"Canonical URL differs from page URL",
+                "canonical": canonical
+            })
+
+
+class PageDepthRule(AuditRule):
+    """Histogram of URL path depths; warns when many pages are deep"""
+
+    def finish(self, crawl_results: Dict[str, Any], table: PageTable):
+        depths, first_rows, counts = np.unique(table["depth"], return_index=True, return_counts=True)
+        # Keyed in order of first appearance, like a dict filled page by page
+        order = np.argsort(first_rows)
+        depth_distribution = dict(zip(depths[order].tolist(), counts[order].tolist()))
+        deep_pages = int(counts[depths > 3].sum())
+        if deep_pages > len(table) * 0.3:
+            self.warnings.append({
+                "type": "deep_pages",
+                "severity": "low",
+                "message": f"{deep_pages} pages are more than 3 levels deep",
+                "depth_distribution": depth_distribution
+            })
+
+
+class DuplicateTitleRule(AuditRule):
+    """Titles used on more than one page"""
+
+    def finish(self, crawl_results: Dict[str, Any], table: PageTable):
+        titles = table.values["title"]
+        for title_id, count, rows in table.groups("title_id"):
+            self.issues.append({
+                "type": "duplicate_title",
+                "severity": "high",
+                "message": f"Title '{titles[title_id][:50]}...' is used on {count} pages",
+                "pages": [table.pages[row].get("url") for row in rows]  # First 5
+            })
+
+
+class DuplicateMetaDescriptionRule(AuditRule):
+    """Meta descriptions used on more than one page"""
+
+    def finish(self, crawl_results: Dict[str, Any], table: PageTable):
+        for _, count, rows in table.groups("meta_description_id"):
+            self.warnings.append({
+                "type": "duplicate_meta_description",
+                "severity": "medium",
+                "message": f"Meta description is duplicated on {count} pages",
+                "pages": [table.pages[row].get("url") for row in rows]  # First 5
+            })
+
+
+class UntitledLinksRule(AuditRule):
+    """Links without anchor text, grouped by source page"""
+
+    def finish(self, crawl_results: Dict[str, Any], table: PageTable):
+        link_analysis = crawl_results.get("link_analysis", {})
+        by_page: Dict[str, List[Any]] = {}
+        for link in link_analysis.get("untitled_links", [])[:50]:  # Limit to 50
+            by_page.setdefault(link.get("source_page", "Unknown"), []).append(link)
+
+        for page_url, links in list(by_page.items())[:10]:  # Top 10 pages
+            self.warnings.append({
+                "type": "untitled_links",
+                "severity": "low",
+                "page": page_url,
+                "message": f"Found {len(links)} links without anchor text on this page",
+                "untitled_count": len(links),
+                "fix": "Add descriptive anchor text to all links. Avoid 'click here' or empty links",
+                "example": '<a href="/page">Descriptive Link Text</a>',
+                "location": page_url,
+                "impact": "Links without text are not accessible and provide no context"
+            })
+
+
+class ImageAltRule(AuditRule):
+    """Images without alt text"""
+
+    def finish(self, crawl_results: Dict[str, Any], table: PageTable):
+        missing_alt = table["missing_alt"]
+        for row in table.rows(missing_alt > 0):
+            page = table.pages[row]
+            missing = int(missing_alt[row])
+            self.warnings.append({
+                "type": "missing_image_alt",
+                "severity": "medium",
+                "page": page.get("url"),
+                "message": f"Found {missing} images without alt text",
+                "missing_alt_count": missing,
+                "fix": "Add alt attributes to all images for accessibility and SEO",
+                "example": '<img src="image.jpg" alt="Description of image">',
+                "location": page.get("url"),
+                "impact": "Images without alt text are not accessible and miss SEO opportunities"
+            })
+
+
+# Report order of the audit's issues and warnings
+RULES = (
+    MissingTitleRule,
+    MissingMetaDescriptionRule,
+    ShortContentRule,
+    H1Rule,
+    BrokenLinksRule,
+    RedirectRule,
+    CanonicalRule,
+    PageDepthRule,
+    DuplicateTitleRule,
+    DuplicateMetaDescriptionRule,
+    UntitledLinksRule,
+    ImageAltRule,
+)
+
+
+class RuleEngine:
+    """Runs every rule over a PageTable
+
+    Pages can be fed as the crawler produces them (e.g. from
+    WebsiteCrawler.iter_crawl), or a table the crawler already built can be
+    passed in; finish() then evaluates the rules (afresh on every call).
+    """
+
+    def __init__(self, rules: Optional[Tuple[type, ...]] = None, table: Optional[PageTable] = None):
+        self.rules: List[AuditRule] = [rule() for rule in (rules or RULES)]
+        self.table = table if table is not None else PageTable()
+
+    @property
+    def pages_seen(self) -> int:
+        return len(self.table)
+
+    def feed(self, page: Dict[str, Any]):
+        self.table.append(page)
+
+    def finish(self, crawl_results: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        issues: List[Dict[str, Any]] = []
+        warnings: List[Dict[str, Any]] = []
+        for rule in self.rules:
+            # Rules append to their lists, so a second finish() starts over
+            rule.issues.clear()
+            rule.warnings.clear()
+            rule.finish(crawl_results, self.table)
+            issues.extend(rule.issues)
+            warnings.extend(rule.warnings)
+        return issues, warnings
@@ -0,0 +1,170 @@
+import hashlib
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app.crawler.simhash import WORD_PATTERN
+
+
+def block_hash(text: str) -> Optional[int]:
+    """Stable 64-bit hash of a block's normalized words (None when it has none)
+
+    Case, punctuation and whitespace differences don't change the hash.
+    """
+    words = WORD_PATTERN.findall(text.lower())
+    if not words:
+        return None
+    return int.from_bytes(hashlib.blake2b(" ".join(words).encode("utf8"), digest_size=8).digest(), "little")
+
+
+def hash_blocks(text: str, spans: Iterable[Tuple[int, int]]) -> List[Tuple[int, int, int]]:
+    """(hash, start, end) of every content block of text that has words"""
+    blocks = []
+    for start, end in spans:
+        hashed = block_hash(text[start:end])
+        if hashed is not None:
+            blocks.append((hashed, start, end))
+    return blocks
+
+
+def strip_blocks(content: str, blocks: Iterable[Tuple[int, int, int]], dropped: Set[int]) -> str:
+    """content without the blocks whose hash is in dropped
+
+    Blocks are (hash, start, end) spans in the page's full text, of which
+    content is a prefix; spans past its end are ignored.
+    """
+    parts = []
+    position = 0
+    for hashed, start, end in blocks:
+        if hashed in dropped and start < len(content):
+            parts.append(content[position:start])
+            position = end
+    if not parts:
+        return content
+    parts.append(content[position:])
+    return "".join(parts)
+
+
+class BlockIndex:
+    """Block -> pages inverted index of a scan's text blocks
+
+    Each page's paragraphs, list items and similar blocks are hashed at
+    parse time (PageRecord.text_blocks); the crawler appends pages as it
+    emits them. Block ids are assigned in order of first appearance, and
+    each block keeps the pages it occurs on. Blocks on most pages are
+    template boilerplate that analyzers can drop before shingling; blocks
+    shared by a few pages make up the shared-paragraphs report.
+    """
+
+    def __init__(self):
+        self.pages: List[Dict[str, Any]] = []
+        self.ids: Dict[int, int] = {}  # Block hash -> block id
+        self.hashes: List[int] = []
+        self.postings: List[List[int]] = []  # Block id -> page rows
+        self.first_spans: List[Tuple[int, int, int]] = []  # Block id -> (row, start, end) of its first occurrence
+        self.page_blocks: List[np.ndarray] = []  # Page row -> distinct block ids
+
+    @classmethod
+    def from_pages(cls, pages) -> "BlockIndex":
+        index = cls()
+        for page in pages:
+            index.append(page)
+        return index
+
+    def append(self, page: Dict[str, Any]):
+        row = len(self.pages)
+        self.pages.append(page)
+        block_ids = []
+        for hashed, start, end in page.get("text_blocks") or ():
+            block_id = self.ids.get(hashed)
+            if block_id is None:
+                block_id = self.ids[hashed] = len(self.hashes)
+                self.hashes.append(hashed)
+                self.postings.append([])
+                self.first_spans.append((row, start, end))
+            postings = self.postings[block_id]
+            if not postings or postings[-1] != row:
+                postings.append(row)
+                block_ids.append(block_id)
+        self.page_blocks.append(np.array(block_ids, dtype=np.int64))
+
+    def __len__(self) -> int:
+        return len(self.pages)
+
+    def page_counts(self) -> np.ndarray:
+        """Number of pages each block id occurs on"""
+        return np.array([len(postings) for postings in self.postings], dtype=np.int64)
+
+    def boilerplate_ids(self, threshold: float = 0.5, min_pages: int = 5) -> np.ndarray:
+        """Ids of blocks on more than threshold of the pages (and on at least min_pages)"""
+        counts = self.page_counts()
+        return np.flatnonzero((counts > threshold * len(self.pages)) & (counts >= min_pages))
+
+    def boilerplate(self, threshold: float = 0.5, min_pages: int = 5) -> Set[int]:
+        """Hashes of the boilerplate blocks, for strip_blocks"""
+        return {self.hashes[block_id] for block_id in self.boilerplate_ids(threshold, min_pages).tolist()}
+
+    def text(self, block_id: int) -> str:
+        """The block's text where it first occurred ('' when past the stored content)"""
+        row, start, end = self.first_spans[block_id]
+        return (self.pages[row].get("content") or "")[start:end]
+
+    def report(self, threshold: float = 0.5, min_pages: int = 5, min_words: int = 5, limit: int = 50,
+               mostly_shared: float = 0.8) -> Dict[str, Any]:
+        """Shared-paragraphs report
+
+        Lists non-boilerplate blocks of at least min_words words found on
+        two or more pages (most widely shared first) and the pages where at
+        least mostly_shared of their non-boilerplate blocks also occur on
+        other pages.
+        """
+        counts = self.page_counts()
+        boilerplate = np.zeros(len(counts), dtype=bool)
+        boilerplate[self.boilerplate_ids(threshold, min_pages)] = True
+        shared = np.flatnonzero((counts >= 2) & ~boilerplate)
+        shared = shared[np.argsort(-counts[shared], kind="stable")]
+
+        paragraphs = []
+        total_shared = 0
+        for block_id in shared.tolist():
+            text = self.text(block_id)
+            if len(WORD_PATTERN.findall(text)) < min_words:
+                continue
+            total_shared += 1
+            if len(paragraphs) < limit:
+                paragraphs.append({
+                    "text": text[:300],
+                    "pages_count": int(counts[block_id]),
+                    "pages": [self.pages[row].get("url") for row in self.postings[block_id][:10]]
+                })
+
+        mostly_shared_pages = []
+        for row, block_ids in enumerate(self.page_blocks):
+            own = block_ids[~boilerplate[block_ids]]
+            if not len(own):
+                continue
+            ratio = float(np.count_nonzero(counts[own] >= 2)) / len(own)
+            if ratio >= mostly_shared:
+                mostly_shared_pages.append({
+                    "page": self.pages[row].get("url"),
+                    "blocks": len(own),
+                    "shared_ratio": round(ratio, 3)
+                })
+
+        return {
+            "total_blocks": len(self.hashes),
+            "boilerplate_blocks": int(boilerplate.sum()),
+            "shared_paragraphs": paragraphs,
+            "total_shared_paragraphs": total_shared,
+            "mostly_shared_pages": mostly_shared_pages[:50],  # Limit to 50
+            "total_mostly_shared_pages": len(mostly_shared_pages)
+        }
+
+
+def crawl_block_index(crawl_results: Dict[str, Any]) -> BlockIndex:
+    """The crawler's block index when it covers the crawl's pages, else one built now"""
+    pages = crawl_results.get("pages", [])
+    index = crawl_results.get("block_index")
+    if index is None or len(index) != len(pages):
+        index = BlockIndex.from_pages(pages)
+    return index
@@ -0,0 +1,422 @@
+import asyncio
+import os
+import pickle
+import time
+import uuid
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+import httpx
+
+from app.crawler.parsing import parse_page
+from app.crawler.records import PageRecord
+from app.crawler.scheduler import HostScheduler
+from app.crawler.urlnorm import UrlNormalizer
+
+# Redis is only needed for distributed crawls
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    redis = None
+    REDIS_AVAILABLE = False
+
+
+def get_redis(url: Optional[str] = None):
+    """Redis client for the distributed frontier (REDIS_URL by default)"""
+    if not REDIS_AVAILABLE:
+        raise RuntimeError("Distributed crawling requires the redis package")
+    return redis.Redis.from_url(url or os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+
+
+def _crc32(value: str) -> int:
+    # Stable across processes and machines, unlike hash()
+    return zlib.crc32(value.encode("utf-8"))
+
+
+class RedisFrontier:
+    """Host-sharded crawl frontier and visited set in Redis
+
+    Each host owns host_shards consecutive shards (out of `shards`), and a
+    URL lands in one of them by hash, so a big site spreads over several
+    workers while small hosts stay together. Every shard has its own queue
+    and visited set. A worker leases a shard while it processes a batch;
+    the batch is moved to a per-shard list, so if the worker dies its lease
+    expires and the next worker to lease the shard picks the batch up
+    again. Per-host politeness across the cluster comes from a shared
+    per-second request counter (host_rate).
+    """
+
+    def __init__(self, client, crawl_id: str):
+        self.client = client
+        self.crawl_id = crawl_id
+        self.prefix = f"crawl:{crawl_id}:"
+        self._config: Optional[Dict[str, Any]] = None
+
+    def key(self, name: str) -> str:
+        return self.prefix + name
+
+    # Setup and configuration
+
+    def create(self, start_url: str, base_domain: str, max_pages: int, max_depth: int = 15,
+               shards: int = 16, host_shards: int = 16, host_rate: int = 20, batch_size: int = 20,
+               lease_ttl: int = 120):
+        """Reset the crawl's keys and seed the frontier with start_url"""
+        self.delete()
+        config = {
+            "base_domain": base_domain, "max_pages": max_pages, "max_depth": max_depth,
+            "shards": shards, "host_shards": min(host_shards, shards), "host_rate": host_rate,
+            "batch_size": batch_size, "lease_ttl": lease_ttl
+        }
+        self.client.hset(self.key("config"), mapping={key: str(value) for key, value in config.items()})
+        self._config = None
+        self.push([(start_url, 0)])
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        if self._config is None:
+            raw = {key.decode(): value.decode() for key, value in self.client.hgetall(self.key("config")).items()}
+            if not raw:
+                raise KeyError(f"Unknown distributed crawl: {self.crawl_id}")
+            self._config = {
+                key: raw[key] if key == "base_domain" else int(raw[key])
+                for key in ("base_domain", "max_pages", "max_depth", "shards", "host_shards", "host_rate",
+                            "batch_size", "lease_ttl")
+            }
+        return self._config
+
+    def shard_for(self, url: str) -> int:
+        config = self.config
+        sub_shard = _crc32(url) % config["host_shards"]
+        return (_crc32(urlparse(url).netloc) + sub_shard) % config["shards"]
+
+    def delete(self):
+        keys = list(self.client.scan_iter(match=self.prefix + "*"))
+        if keys:
+            self.client.delete(*keys)
+
+    # Frontier
+
+    @staticmethod
+    def _encode(url: str, depth: int) -> str:
+        return f"{depth} {url}"
+
+    @staticmethod
+    def _decode(item: bytes) -> Tuple[str, int]:
+        depth, url = item.decode("utf-8").split(" ", 1)
+        return url, int(depth)
+
+    def push(self, entries: List[Tuple[str, int]], pipe=None):
+        """Append (url, depth) entries to their shard queues"""
+        target = pipe if pipe is not None else self.client.pipeline(transaction=False)
+        for url, depth in entries:
+            target.rpush(self.key(f"queue:{self.shard_for(url)}"), self._encode(url, depth))
+        if pipe is None:
+            target.execute()
+
+    def lease(self, shard: int, worker_id: str) -> bool:
+        return bool(self.client.set(self.key(f"lease:{shard}"), worker_id, nx=True, ex=self.config["lease_ttl"]))
+
+    def renew(self, shard: int):
+        self.client.expire(self.key(f"lease:{shard}"), self.config["lease_ttl"])
+
+    def take_batch(self, shard: int) -> List[Tuple[str, int]]:
+        """Move up to batch_size entries into the shard's in-progress list
+
+        An existing in-progress list belongs to a worker whose lease
+        expired, so it is returned again instead.
+        """
+        batch_key = self.key(f"batch:{shard}")
+        orphaned = self.client.lrange(batch_key, 0, -1)
+        if orphaned:
+            return [self._decode(item) for item in orphaned]
+        pipe = self.client.pipeline(transaction=True)
+        for _ in range(self.config["batch_size"]):
+            pipe.lmove(self.key(f"queue:{shard}"), batch_key, "LEFT", "RIGHT")
+        return [self._decode(item) for item in pipe.execute() if item is not None]
+
+    def is_visited(self, urls: List[str]) -> List[bool]:
+        pipe = self.client.pipeline(transaction=False)
+        for url in urls:
+            pipe.sismember(self.key(f"visited:{self.shard_for(url)}"), url)
+        return [bool(found) for found in pipe.execute()]
+
+    def host_wait(self, host: str) -> float:
+        """Count a request to host against the cluster-wide per-second budget
+
+        Returns 0 when the request may go ahead, else the seconds until the
+        next one-second window.
+        """
+        window = int(time.time())
+        key = self.key(f"rate:{host}:{window}")
+        pipe = self.client.pipeline(transaction=False)
+        pipe.incr(key)
+        pipe.expire(key, 2)
+        count, _ = pipe.execute()
+        if count <= self.config["host_rate"]:
+            return 0.0
+        return max(0.0, window + 1 - time.time())
+
+    def reserve_budget(self, count: int) -> int:
+        """Claim up to count pages of the max_pages budget; returns how many were granted"""
+        if count == 0:
+            return 0
+        total = self.client.incrby(self.key("budget"), count)
+        return max(0, min(count, self.config["max_pages"] - (total - count)))
+
+    def budget_exhausted(self) -> bool:
+        return int(self.client.get(self.key("budget")) or 0) >= self.config["max_pages"]
+
+    def commit(self, shard: int, worker_id: str, visited: List[str], pages: List[PageRecord],
+               new_entries: List[Tuple[str, int]]):
+        """Atomically record a finished batch and release the shard"""
+        pipe = self.client.pipeline(transaction=True)
+        if visited:
+            pipe.sadd(self.key(f"visited:{shard}"), *visited)
+        if pages:
+            pipe.rpush(self.key("results"), *[zlib.compress(pickle.dumps(page, pickle.HIGHEST_PROTOCOL), 1)
+                                              for page in pages])
+        self.push(new_entries, pipe)
+        pipe.delete(self.key(f"batch:{shard}"))
+        pipe.execute()
+        # Only drop the lease if it is still ours (it may have expired and moved on)
+        lease_key = self.key(f"lease:{shard}")
+        if self.client.get(lease_key) == worker_id.encode():
+            self.client.delete(lease_key)
+
+    def pending_shards(self) -> List[int]:
+        """Shards with queued or orphaned entries"""
+        shards = range(self.config["shards"])
+        pipe = self.client.pipeline(transaction=False)
+        for shard in shards:
+            pipe.llen(self.key(f"queue:{shard}"))
+            pipe.exists(self.key(f"batch:{shard}"))
+        counts = pipe.execute()
+        return [shard for shard in shards if counts[2 * shard] or counts[2 * shard + 1]]
+
+    def is_done(self) -> bool:
+        """True once no shard is leased and nothing is left to fetch"""
+        shards = range(self.config["shards"])
+        pipe = self.client.pipeline(transaction=True)
+        pipe.exists(*[self.key(f"lease:{shard}") for shard in shards])
+        pipe.exists(*[self.key(f"batch:{shard}") for shard in shards])
+        for shard in shards:
+            pipe.llen(self.key(f"queue:{shard}"))
+        pipe.get(self.key("budget"))
+        leased, batches, *queued, budget = pipe.execute()
+        if leased or batches:
+            return False
+        return sum(queued) == 0 or int(budget or 0) >= self.config["max_pages"]
+
+    def pop_results(self, count: int = 100) -> List[PageRecord]:
+        items = self.client.lpop(self.key("results"), count) or []
+        return [pickle.loads(zlib.decompress(item)) for item in items]
+
+    def stats(self) -> Dict[str, Any]:
+        shards = range(self.config["shards"])
+        pipe = self.client.pipeline(transaction=False)
+        for shard in shards:
+            pipe.llen(self.key(f"queue:{shard}"))
+        pipe.get(self.key("budget"))
+        *queued, budget = pipe.execute()
+        return {"queued": sum(queued), "pages_claimed": int(budget or 0)}
+
+
+async def _off_loop(method, *args):
+    """Run a blocking Redis round-trip on a thread, so fetches in flight keep going"""
+    return await asyncio.get_running_loop().run_in_executor(None, method, *args)
+
+
+class FrontierWorker:
+    """Pulls URL batches from a RedisFrontier, fetches and parses them, and pushes back results
+
+    Run one per process (e.g. inside a Celery task); several workers on
+    several machines can serve the same crawl. Frontier calls run on
+    threads, off the event loop, and each leased shard's lease is renewed
+    by a heartbeat task rather than after every fetch.
+    """
+
+    def __init__(self, frontier: RedisFrontier, concurrency: int = 10, max_shards: int = 4,
+                 idle_sleep: float = 0.2, normalizer: Optional[UrlNormalizer] = None):
+        self.frontier = frontier
+        self.concurrency = concurrency  # Concurrent fetches across all leased shards
+        self.max_shards = max_shards  # Shards leased at once
+        self.idle_sleep = idle_sleep
+        self.normalizer = normalizer or UrlNormalizer()
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.scheduler = HostScheduler()
+        self.client: Optional[httpx.AsyncClient] = None
+        self.semaphore: Optional[asyncio.Semaphore] = None
+        self.pages_fetched = 0
+
+    async def run(self) -> int:
+        """Process batches until the crawl is finished; returns pages fetched"""
+        self.client = httpx.AsyncClient(timeout=30.0, follow_redirects=True)
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        active: Dict[int, asyncio.Task] = {}
+        try:
+            config = await _off_loop(lambda: self.frontier.config)
+            shards = config["shards"]
+            # Start at a different shard in each worker to spread the load
+            offset = _crc32(self.worker_id) % shards
+            while True:
+                if len(active) < self.max_shards and not await _off_loop(self.frontier.budget_exhausted):
+                    pending = set(await _off_loop(self.frontier.pending_shards))
+                    for index in range(shards):
+                        shard = (offset + index) % shards
+                        if len(active) >= self.max_shards:
+                            break
+                        if (shard in pending and shard not in active
+                                and await _off_loop(self.frontier.lease, shard, self.worker_id)):
+                            active[shard] = asyncio.create_task(self._process_shard(shard))
+                if active:
+                    done, _ = await asyncio.wait(active.values(), timeout=self.idle_sleep,
+                                                 return_when=asyncio.FIRST_COMPLETED)
+                    for shard, task in list(active.items()):
+                        if task in done:
+                            del active[shard]
+                            task.result()
+                    continue
+                if await _off_loop(self.frontier.is_done):
+                    return self.pages_fetched
+                await asyncio.sleep(self.idle_sleep)
+        finally:
+            for task in active.values():
+                task.cancel()
+            await asyncio.gather(*active.values(), return_exceptions=True)
+            await self.client.aclose()
+            self.client = None
+
+    async def _heartbeat(self, shard: int, interval: float):
+        """Keep the shard's lease alive while its batch is processed"""
+        while True:
+            await asyncio.sleep(interval)
+            await _off_loop(self.frontier.renew, shard)
+
+    async def _process_shard(self, shard: int):
+        config = self.frontier.config
+        heartbeat = asyncio.create_task(self._heartbeat(shard, config["lease_ttl"] / 3))
+        try:
+            await self._process_batch(shard, config)
+        finally:
+            heartbeat.cancel()
+            await asyncio.gather(heartbeat, return_exceptions=True)
+
+    async def _process_batch(self, shard: int, config: Dict[str, Any]):
+        batch = await _off_loop(self.frontier.take_batch, shard)
+        # Dedupe within the batch and against the shard's visited set
+        candidates = list(dict.fromkeys(url for url, depth in batch if depth <= config["max_depth"]))
+        depths = {}
+        for url, depth in batch:
+            depths.setdefault(url, depth)
+        visited = await _off_loop(self.frontier.is_visited, candidates)
+        candidates = [url for url, seen in zip(candidates, visited) if not seen]
+
+        claimed = candidates[:await _off_loop(self.frontier.reserve_budget, len(candidates))]
+
+        async def fetch(url: str):
+            async with self.semaphore:
+                return await self._fetch_page(url, config["base_domain"])
+
+        fetched = await asyncio.gather(*[fetch(url) for url in claimed])
+        pages = []
+        new_entries = []
+        for url, page in zip(claimed, fetched):
+            if page is None:
+                continue
+            depth = depths[url]
+            page.crawl_depth = depth
+            if depth < config["max_depth"]:
+                # Frontier candidates: in-site targets no worker has visited yet.
+                # The record's internal_links are left to the coordinator.
+                targets = list(set(link.target for link in page.links if link.target))
+                visited = await _off_loop(self.frontier.is_visited, targets)
+                candidates = [target for target, seen in zip(targets, visited) if not seen]
+                new_entries.extend((target, depth + 1) for target in candidates[:20])
+            pages.append(page)
+
+        await _off_loop(self.frontier.commit, shard, self.worker_id, claimed, pages, new_entries)
+        self.pages_fetched += len(pages)
+
+    async def _fetch_page(self, url: str, base_domain: str) -> Optional[PageRecord]:
+        host = urlparse(url).netloc
+        # Wait until the cluster-wide per-second budget for the host has room
+        while True:
+            wait = await _off_loop(self.frontier.host_wait, host)
+            if not wait:
+                break
+            await asyncio.sleep(wait)
+        async with self.scheduler.request(host) as outcome:
+            start_time = time.time()
+            try:
+                response = await self.client.get(url)
+            except httpx.TimeoutException as e:
+                outcome.timed_out = True
+                print(f"HTTP fetch failed for {url}: {e}")
+                return None
+            except Exception as e:
+                print(f"HTTP fetch failed for {url}: {e}")
+                return None
+            outcome.status_code = response.status_code
+        # Error pages are parsed too, like the single-process crawler does
+        page = parse_page(url, response.text, response.status_code, base_domain, self.normalizer)
+        page.load_time = time.time() - start_time
+        return page
+
+
+class DistributedCrawl:
+    """Coordinates a distributed crawl and assembles its results
+
+    The coordinator seeds the Redis frontier, then collects page records
+    pushed back by workers and adds them to a local WebsiteCrawler
+    (WebsiteCrawler.add_page), so results have exactly the single-process
+    shape, page table and block index included.
+    """
+
+    def __init__(self, client, crawl_id: str, max_pages: int = 100, max_depth: int = 15,
+                 shards: int = 16, host_shards: int = 16, host_rate: int = 20, batch_size: int = 20,
+                 poll_interval: float = 0.2):
+        # Imported here to avoid a circular import with spider.py
+        from app.crawler.spider import WebsiteCrawler
+
+        self.frontier = RedisFrontier(client, crawl_id)
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.shards = shards
+        self.host_shards = host_shards
+        self.host_rate = host_rate
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.crawler = WebsiteCrawler(max_pages=max_pages, max_depth=max_depth, parse_workers=0)
+
+    def start(self, start_url: str):
+        normalizer = self.crawler.normalizer
+        self.crawler.base_domain = normalizer.origin(start_url)
+        self.frontier.create(normalizer.normalize(start_url), self.crawler.base_domain, self.max_pages,
+                             self.max_depth, self.shards, self.host_shards, self.host_rate, self.batch_size)
+
+    async def _collect(self) -> int:
+        pages = await _off_loop(self.frontier.pop_results)
+        for page in pages:
+            # A batch whose lease expired mid-way is taken and committed again
+            # by another worker, so the same page can arrive twice
+            if page.url in self.crawler.url_to_page:
+                continue
+            await self.crawler.add_page(page)
+        return len(pages)
+
+    async def collect(self) -> Dict[str, Any]:
+        """Gather pages from workers until the frontier drains, then build results"""
+        try:
+            while True:
+                if await self._collect():
+                    continue
+                if await _off_loop(self.frontier.is_done):
+                    # Workers commit results before releasing their lease
+                    while await self._collect():
+                        pass
+                    break
+                await asyncio.sleep(self.poll_interval)
+            return self.crawler.build_results()
+        finally:
+            await _off_loop(self.frontier.delete)
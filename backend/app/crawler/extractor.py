@@ -0,0 +1,176 @@
+from typing import Dict, List, Any, Optional
+from lxml import etree
+
+# Subtrees dropped from body text, links, images and anchor targets
+# (title, meta, canonical and headings are still read from them)
+REMOVED_TAGS = frozenset(("script", "style", "nav", "footer", "header"))
+
+# Tags whose strings never count as page text
+STRING_CONTAINER_TAGS = frozenset(("script", "style", "template"))
+
+# Elements whose text forms one content block (a paragraph, list item, cell...);
+# blocks nested in another block belong to the outer one
+BLOCK_TAGS = frozenset(("p", "li", "blockquote", "pre", "dd", "dt", "td", "th", "figcaption"))
+
+
+def _empty_extraction() -> Dict[str, Any]:
+    return {
+        "title": "",
+        "meta_description": "",
+        "canonical": "",
+        "h1": [],
+        "h2": [],
+        "text": "",
+        "links": [],
+        "images": [],
+        "blocks": [],
+        "anchor_targets": set()
+    }
+
+
+def extract_html(html: str) -> Dict[str, Any]:
+    """Extract page fields from HTML in a single walk of the lxml tree
+
+    Returns title, meta description, raw canonical href, h1/h2 texts, body
+    text, links as (href, text, title, sourceline) tuples, images as
+    (src, alt) tuples, the (start, end) character spans of the text's
+    content blocks (see BLOCK_TAGS) and the set of id/name values usable
+    as #fragment targets.
+    """
+    result = _empty_extraction()
+    if not html:
+        return result
+
+    try:
+        parser = etree.HTMLParser(recover=True)
+        parser.feed(html)
+        root = parser.close()
+    except (etree.LxmlError, ValueError) as e:
+        print(f"Error parsing HTML: {e}")
+        return result
+    if root is None:
+        return result
+
+    body_text: List[str] = []
+    # (first, end) body_text indexes of each outermost block
+    block_pieces: List[tuple] = []
+    block_start: Optional[int] = None
+    links: List[tuple] = result["links"]
+    images: List[tuple] = result["images"]
+    anchor_targets = result["anchor_targets"]
+    h1_parts: List[List[str]] = []
+    h2_parts: List[List[str]] = []
+    title_parts: Optional[List[str]] = None
+    meta_description: Optional[str] = None
+    canonical: Optional[str] = None
+    # Collectors for the text of currently open elements. Headings and the
+    # title see removed subtrees too, link text does not.
+    open_any: List[List[str]] = []
+    open_visible: List[List[str]] = []
+
+    def emit(text: Optional[str], removed: bool, contained: bool):
+        if not text or contained:
+            return
+        text = text.strip()
+        if not text:
+            return
+        for parts in open_any:
+            parts.append(text)
+        if not removed:
+            for parts in open_visible:
+                parts.append(text)
+            body_text.append(text)
+
+    def walk(element, removed: bool, contained: bool):
+        nonlocal title_parts, meta_description, canonical, block_start
+
+        tag = element.tag
+        if not isinstance(tag, str):
+            # Comments, processing instructions and entities carry no text
+            return
+
+        removed = removed or tag in REMOVED_TAGS
+        contained = contained or tag in STRING_CONTAINER_TAGS
+        collectors = []
+        visible_collector = None
+
+        if tag == "title":
+            if title_parts is None:
+                title_parts = []
+                collectors.append(title_parts)
+        elif tag == "h1" or tag == "h2":
+            parts = []
+            (h1_parts if tag == "h1" else h2_parts).append(parts)
+            collectors.append(parts)
+        elif tag == "meta":
+            if meta_description is None and element.get("name") == "description":
+                meta_description = element.get("content", "")
+        elif tag == "link":
+            if canonical is None and "canonical" in element.get("rel", "").split():
+                canonical = element.get("href", "")
+
+        if not removed:
+            element_id = element.get("id")
+            if element_id is not None:
+                anchor_targets.add(element_id)
+            element_name = element.get("name")
+            if element_name is not None:
+                anchor_targets.add(element_name)
+
+            if tag == "a":
+                href = element.get("href")
+                if href is not None:
+                    visible_collector = []
+                    links.append((href, visible_collector, element.get("title", ""), element.sourceline))
+            elif tag == "img":
+                src = element.get("src") or element.get("data-src") or element.get("data-lazy-src")
+                if src:
+                    images.append((src, element.get("alt", "")))
+
+        opens_block = block_start is None and tag in BLOCK_TAGS and not removed and not contained
+        if opens_block:
+            block_start = len(body_text)
+        open_any.extend(collectors)
+        if visible_collector is not None:
+            open_visible.append(visible_collector)
+
+        emit(element.text, removed, contained)
+        for child in element:
+            walk(child, removed, contained)
+            emit(child.tail, removed, contained)
+
+        if visible_collector is not None:
+            open_visible.pop()
+        for _ in collectors:
+            open_any.pop()
+        if opens_block:
+            if len(body_text) > block_start:
+                block_pieces.append((block_start, len(body_text)))
+            block_start = None
+
+    walk(root, False, False)
+
+    result["title"] = "".join(title_parts) if title_parts else ""
+    result["meta_description"] = meta_description or ""
+    result["canonical"] = canonical or ""
+    result["h1"] = ["".join(parts) for parts in h1_parts]
+    result["h2"] = ["".join(parts) for parts in h2_parts]
+    result["text"] = " ".join(body_text)
+    # Pieces are joined with single spaces, so a block spans from its first
+    # piece's offset to the end of its last piece
+    offsets = []
+    position = 0
+    for piece in body_text:
+        offsets.append(position)
+        position += len(piece) + 1
+    result["blocks"] = [(offsets[first], offsets[end - 1] + len(body_text[end - 1])) for first, end in block_pieces]
+    result["links"] = [(href, "".join(parts), title, line) for href, parts, title, line in links]
+    return result
+
+
+def has_anchor_target(extraction: Dict[str, Any], target_id: str) -> bool:
+    """Whether a #fragment link resolves to an element id or name on the page"""
+    # An empty fragment ("#") points at the top of the page
+    if not target_id:
+        return True
+    return target_id in extraction["anchor_targets"]
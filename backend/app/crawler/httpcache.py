@@ -0,0 +1,307 @@
+import calendar
+import email.utils
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import time
+import zlib
+from typing import Any, Dict, Optional
+
+from app.crawler.records import PageRecord
+
+
+def parse_cache_control(value: str) -> Dict[str, Optional[str]]:
+    """Cache-Control directives as {name: argument or None}"""
+    directives = {}
+    for part in value.split(","):
+        name, _, argument = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip('"') or None
+    return directives
+
+
+def _http_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        parsed = email.utils.parsedate(value)
+    except (TypeError, ValueError):
+        return None
+    return calendar.timegm(parsed) if parsed else None
+
+
+def freshness_lifetime(headers: Dict[str, str]) -> Optional[float]:
+    """Seconds a response may be reused without revalidation
+
+    None means it must not be stored at all (no-store). Responses without
+    max-age or Expires get 0, so they are always revalidated - a crawler
+    must not miss content changes to save a round trip.
+    """
+    directives = parse_cache_control(headers.get("cache-control", ""))
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0.0
+    for name in ("s-maxage", "max-age"):
+        # A directive without a (numeric) value counts as absent
+        if (directives.get(name) or "").isdigit():
+            return float(directives[name])
+    expires = _http_date(headers.get("expires"))
+    if expires is not None:
+        date = _http_date(headers.get("date")) or time.time()
+        return max(0.0, expires - date)
+    return 0.0
+
+
+class CacheEntry:
+    """Index row for one cached URL"""
+
+    __slots__ = ("url", "body_hash", "status_code", "headers", "stored_at", "lifetime")
+
+    def __init__(self, url: str, body_hash: str, status_code: int, headers: Dict[str, str],
+                 stored_at: float, lifetime: float):
+        self.url = url
+        self.body_hash = body_hash
+        self.status_code = status_code
+        self.headers = headers
+        self.stored_at = stored_at
+        self.lifetime = lifetime
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() - self.stored_at < self.lifetime
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers for revalidating this entry"""
+        headers = {}
+        if self.headers.get("etag"):
+            headers["If-None-Match"] = self.headers["etag"]
+        if self.headers.get("last-modified"):
+            headers["If-Modified-Since"] = self.headers["last-modified"]
+        return headers
+
+
+class HttpCache:
+    """Disk-backed HTTP cache with conditional revalidation and LRU eviction
+
+    Bodies are stored zlib-compressed under the SHA-256 of their content,
+    so identical pages share one file; a SQLite index maps URLs to bodies,
+    headers and freshness. Each URL can also keep the parsed PageRecord of
+    its body, so a 304 skips reparsing as well as the download. Total size
+    is bounded by max_bytes, evicting least recently used URLs first.
+    Counters cover the lifetime of this instance (one scan).
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 512 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(directory, "bodies"), exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(directory, "index.sqlite"), timeout=30.0)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                url TEXT PRIMARY KEY, body_hash TEXT, status_code INTEGER, headers TEXT,
+                stored_at REAL, lifetime REAL, last_access REAL, record BLOB, record_key TEXT,
+                size INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS entries_body ON entries (body_hash);
+            CREATE INDEX IF NOT EXISTS entries_access ON entries (last_access);
+            CREATE TABLE IF NOT EXISTS bodies (hash TEXT PRIMARY KEY, size INTEGER);
+        """)
+        self.conn.commit()
+        self.total_bytes = (
+            (self.conn.execute("SELECT SUM(size) FROM bodies").fetchone()[0] or 0)
+            + (self.conn.execute("SELECT SUM(size) FROM entries").fetchone()[0] or 0)
+        )
+        self.hits = 0  # Served fresh from cache, no request made
+        self.revalidated = 0  # 304 Not Modified
+        self.misses = 0  # Not cached, or changed since it was
+        self.evictions = 0
+        self.bytes_saved = 0
+        # Applies a lowered max_bytes straight away
+        self._evict()
+
+    def _body_path(self, body_hash: str) -> str:
+        return os.path.join(self.directory, "bodies", body_hash[:2], body_hash)
+
+    # Lookup
+
+    def lookup(self, url: str) -> Optional[CacheEntry]:
+        row = self.conn.execute(
+            "SELECT body_hash, status_code, headers, stored_at, lifetime FROM entries WHERE url = ?", (url,)
+        ).fetchone()
+        if row is None:
+            return None
+        return CacheEntry(url, row[0], row[1], json.loads(row[2]), row[3], row[4])
+
+    def read_body(self, entry: CacheEntry) -> Optional[bytes]:
+        """The cached body, or None if its file went missing"""
+        try:
+            with open(self._body_path(entry.body_hash), "rb") as f:
+                return zlib.decompress(f.read())
+        except (OSError, zlib.error):
+            return None
+
+    def read_record(self, entry: CacheEntry, record_key: str) -> Optional[PageRecord]:
+        """The parsed record for the entry's body, if parsed under the same record_key"""
+        row = self.conn.execute(
+            "SELECT record FROM entries WHERE url = ? AND record_key = ?", (entry.url, record_key)
+        ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        try:
+            record = pickle.loads(zlib.decompress(row[0]))
+        except Exception:
+            # Written by an incompatible version of the parser; just reparse
+            return None
+        if any(not hasattr(record, name) for name in type(record).__slots__):
+            # Parsed before some field existed (e.g. simhash); reparse to fill it in
+            return None
+        return record
+
+    def hit(self, entry: CacheEntry, body_size: int):
+        """Count a fresh hit and mark the entry as recently used"""
+        self.hits += 1
+        self.bytes_saved += body_size
+        self.conn.execute("UPDATE entries SET last_access = ? WHERE url = ?", (time.time(), entry.url))
+        self.conn.commit()
+
+    def miss(self):
+        self.misses += 1
+
+    # Writes
+
+    def store(self, url: str, status_code: int, headers: Dict[str, str], body: bytes) -> bool:
+        """Cache a full response; returns False when it isn't cacheable"""
+        headers = {name.lower(): value for name, value in headers.items()}
+        lifetime = freshness_lifetime(headers)
+        if status_code != 200 or lifetime is None:
+            self.delete(url)
+            return False
+        kept = {name: headers[name] for name in ("etag", "last-modified", "cache-control", "expires", "date",
+                                                 "content-type") if name in headers}
+        if lifetime == 0 and "etag" not in kept and "last-modified" not in kept:
+            # Nothing to revalidate with, so it would never be served
+            self.delete(url)
+            return False
+
+        body_hash = hashlib.sha256(body).hexdigest()
+        if self.conn.execute("SELECT 1 FROM bodies WHERE hash = ?", (body_hash,)).fetchone() is None:
+            compressed = zlib.compress(body, 6)
+            path = self._body_path(body_hash)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename, so a concurrent reader never sees half a body
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(compressed)
+            os.replace(tmp_path, path)
+            self.conn.execute("INSERT OR IGNORE INTO bodies (hash, size) VALUES (?, ?)", (body_hash, len(compressed)))
+            self.total_bytes += len(compressed)
+
+        old = self.conn.execute("SELECT body_hash, size FROM entries WHERE url = ?", (url,)).fetchone()
+        now = time.time()
+        if old is not None and old[0] == body_hash:
+            # Same body (e.g. a server that ignores validators): keep the parsed record
+            self.conn.execute(
+                "UPDATE entries SET headers = ?, stored_at = ?, lifetime = ?, last_access = ? WHERE url = ?",
+                (json.dumps(kept), now, lifetime, now, url)
+            )
+            self.conn.commit()
+            return True
+        self.conn.execute(
+            "INSERT OR REPLACE INTO entries (url, body_hash, status_code, headers, stored_at, lifetime, last_access,"
+            " record, record_key, size) VALUES (?, ?, ?, ?, ?, ?, ?, NULL, NULL, 0)",
+            (url, body_hash, status_code, json.dumps(kept), now, lifetime, now)
+        )
+        if old is not None:
+            self.total_bytes -= old[1]
+            if old[0] != body_hash:
+                self._release_body(old[0])
+        self.conn.commit()
+        self._evict()
+        return True
+
+    def refresh(self, entry: CacheEntry, headers: Dict[str, str], body_size: int):
+        """Record a 304: update validators/freshness from the new headers and keep the body"""
+        self.revalidated += 1
+        self.bytes_saved += body_size
+        updated = dict(entry.headers)
+        for name, value in headers.items():
+            if name.lower() in ("etag", "last-modified", "cache-control", "expires", "date"):
+                updated[name.lower()] = value
+        lifetime = freshness_lifetime(updated)
+        now = time.time()
+        self.conn.execute(
+            "UPDATE entries SET headers = ?, stored_at = ?, lifetime = ?, last_access = ? WHERE url = ?",
+            (json.dumps(updated), now, lifetime or 0.0, now, entry.url)
+        )
+        self.conn.commit()
+
+    def store_record(self, url: str, page: PageRecord, record_key: str):
+        """Attach the parsed record of url's cached body"""
+        record = zlib.compress(pickle.dumps(page, pickle.HIGHEST_PROTOCOL), 1)
+        old = self.conn.execute("SELECT size FROM entries WHERE url = ?", (url,)).fetchone()
+        if old is None:
+            return
+        self.conn.execute(
+            "UPDATE entries SET record = ?, record_key = ?, size = ? WHERE url = ?",
+            (record, record_key, len(record), url)
+        )
+        self.total_bytes += len(record) - old[0]
+        self.conn.commit()
+        self._evict()
+
+    def delete(self, url: str):
+        old = self.conn.execute("SELECT body_hash, size FROM entries WHERE url = ?", (url,)).fetchone()
+        if old is None:
+            return
+        self.conn.execute("DELETE FROM entries WHERE url = ?", (url,))
+        self.total_bytes -= old[1]
+        self._release_body(old[0])
+        self.conn.commit()
+
+    def _release_body(self, body_hash: str):
+        """Remove a body once no entry refers to it"""
+        if self.conn.execute("SELECT 1 FROM entries WHERE body_hash = ? LIMIT 1", (body_hash,)).fetchone():
+            return
+        row = self.conn.execute("SELECT size FROM bodies WHERE hash = ?", (body_hash,)).fetchone()
+        if row is None:
+            return
+        self.conn.execute("DELETE FROM bodies WHERE hash = ?", (body_hash,))
+        self.total_bytes -= row[0]
+        try:
+            os.remove(self._body_path(body_hash))
+        except OSError:
+            pass
+
+    def _evict(self):
+        """Drop least recently used URLs until the cache fits in max_bytes"""
+        while self.total_bytes > self.max_bytes:
+            rows = self.conn.execute("SELECT url FROM entries ORDER BY last_access LIMIT 64").fetchall()
+            if not rows:
+                break
+            for (url,) in rows:
+                self.delete(url)
+                self.evictions += 1
+                if self.total_bytes <= self.max_bytes:
+                    break
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.revalidated + self.misses
+        return {
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.revalidated) / lookups, 3) if lookups else 0,
+            "evictions": self.evictions,
+            "bytes_saved": self.bytes_saved,
+            "size_bytes": self.total_bytes
+        }
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
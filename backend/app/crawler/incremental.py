@@ -0,0 +1,177 @@
+import copy
+import gzip
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set
+from urllib.parse import urljoin
+
+import httpx
+from lxml import etree
+
+from app.crawler.records import PageRecord
+from app.crawler.urlnorm import UrlNormalizer
+
+
+def parse_lastmod(value: str) -> Optional[float]:
+    """W3C datetime from a sitemap <lastmod> as a UTC timestamp
+
+    Date-only values count as the end of that day, so a page edited later
+    the same day is never mistaken for unchanged.
+    """
+    value = value.strip()
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if len(value) == 10:
+        parsed += timedelta(days=1)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def parse_sitemap(content: bytes) -> Dict[str, Any]:
+    """Page URLs with their lastmod (or None) and nested sitemap URLs"""
+    if content[:2] == b"\x1f\x8b":
+        content = gzip.decompress(content)
+    root = etree.fromstring(content, etree.XMLParser(recover=True, resolve_entities=False, no_network=True))
+    pages: Dict[str, Optional[float]] = {}
+    sitemaps: List[str] = []
+    if root is None:
+        return {"pages": pages, "sitemaps": sitemaps}
+    # Match on local names so any sitemap namespace (or none) works
+    for element in root.iter("{*}url", "{*}sitemap"):
+        loc = lastmod = None
+        for child in element:
+            name = etree.QName(child).localname if isinstance(child.tag, str) else ""
+            if name == "loc" and child.text:
+                loc = child.text.strip()
+            elif name == "lastmod" and child.text:
+                lastmod = parse_lastmod(child.text)
+        if not loc:
+            continue
+        if etree.QName(element).localname == "sitemap":
+            sitemaps.append(loc)
+        else:
+            pages[loc] = lastmod
+    return {"pages": pages, "sitemaps": sitemaps}
+
+
+async def fetch_sitemap_lastmod(get: Callable[[str], Awaitable[httpx.Response]], origin: str,
+                                normalizer: UrlNormalizer, max_sitemaps: int = 50) -> Dict[str, float]:
+    """lastmod timestamps for every page listed in the site's sitemaps
+
+    Sitemaps come from robots.txt Sitemap: lines, falling back to
+    /sitemap.xml; sitemap indexes are followed up to max_sitemaps files.
+    """
+    queue: List[str] = []
+    try:
+        robots = await get(urljoin(origin, "/robots.txt"))
+        if robots.status_code == 200:
+            for line in robots.text.splitlines():
+                name, _, value = line.partition(":")
+                if name.strip().lower() == "sitemap" and value.strip():
+                    queue.append(value.strip())
+    except Exception as e:
+        print(f"Could not read robots.txt: {e}")
+    if not queue:
+        queue.append(urljoin(origin, "/sitemap.xml"))
+
+    lastmods: Dict[str, float] = {}
+    seen: Set[str] = set()
+    while queue and len(seen) < max_sitemaps:
+        sitemap_url = queue.pop(0)
+        if sitemap_url in seen:
+            continue
+        seen.add(sitemap_url)
+        try:
+            response = await get(sitemap_url)
+            if response.status_code != 200:
+                continue
+            sitemap = parse_sitemap(response.content)
+        except Exception as e:
+            print(f"Could not read sitemap {sitemap_url}: {e}")
+            continue
+        queue.extend(sitemap["sitemaps"])
+        for url, lastmod in sitemap["pages"].items():
+            if lastmod is not None:
+                lastmods[normalizer.normalize(url)] = lastmod
+    return lastmods
+
+
+# Parsed fields that must match for a page to keep its previous record
+_PAGE_FIELDS = ("status_code", "content_hash", "title", "meta_description", "canonical", "h1", "h2",
+                "simhash", "text_blocks")
+# Parsed link fields (issue and reason come later, from link checking)
+_LINK_FIELDS = ("url", "href", "anchor_text", "title", "internal", "location", "target")
+_IMAGE_FIELDS = ("url", "alt")
+
+
+def _fields(record: Any, names: Iterable[str]) -> tuple:
+    # getattr: records pickled before a field existed never match a fresh parse
+    return tuple(getattr(record, name, None) for name in names)
+
+
+def same_page(old: PageRecord, page: PageRecord) -> bool:
+    """Whether two parses of a page agree on everything parsed from it: text,
+    title, meta description, canonical, headings, links and images"""
+    return (_fields(old, _PAGE_FIELDS) == _fields(page, _PAGE_FIELDS)
+            and len(old.links) == len(page.links)
+            and all(_fields(a, _LINK_FIELDS) == _fields(b, _LINK_FIELDS) for a, b in zip(old.links, page.links))
+            and len(old.images) == len(page.images)
+            and all(_fields(a, _IMAGE_FIELDS) == _fields(b, _IMAGE_FIELDS) for a, b in zip(old.images, page.images)))
+
+
+class PreviousScan:
+    """Pages of an earlier scan of the same site, for incremental re-crawls
+
+    The crawler seeds its frontier from the previous URL set. A page whose
+    sitemap lastmod predates the previous crawl is reused without being
+    fetched; a fetched page whose status and parsed fields (see same_page)
+    are all unchanged keeps its old record. Reused records are shallow copies, so the
+    previous scan's results are never modified.
+    """
+
+    def __init__(self, pages: Iterable[PageRecord], crawled_at: float):
+        self.pages: Dict[str, PageRecord] = {page.url: page for page in pages}
+        self.crawled_at = crawled_at
+        self.lastmod: Dict[str, float] = {}
+        self.reused_unfetched = 0
+        self.unchanged = 0
+        self.changed_urls: Set[str] = set()
+        self.new_urls: Set[str] = set()
+
+    def seeds(self) -> List[PageRecord]:
+        """Previous pages in breadth-first (depth) order"""
+        return sorted(self.pages.values(), key=lambda page: page.crawl_depth or 0)
+
+    def reuse_unfetched(self, url: str) -> Optional[PageRecord]:
+        """A copy of url's old record when the sitemap says it hasn't changed since"""
+        page = self.pages.get(url)
+        lastmod = self.lastmod.get(url)
+        if page is None or lastmod is None or lastmod > self.crawled_at:
+            return None
+        self.reused_unfetched += 1
+        return copy.copy(page)
+
+    def reuse_unchanged(self, page: PageRecord) -> PageRecord:
+        """The old record (copied) when page matches it, else page itself"""
+        old = self.pages.get(page.url)
+        if old is None:
+            self.new_urls.add(page.url)
+            return page
+        if same_page(old, page):
+            self.unchanged += 1
+            return copy.copy(old)
+        self.changed_urls.add(page.url)
+        return page
+
+    def stats(self, current_urls: Iterable[str]) -> Dict[str, Any]:
+        removed = set(self.pages) - set(current_urls)
+        return {
+            "reused_unfetched": self.reused_unfetched,
+            "unchanged": self.unchanged,
+            "changed": len(self.changed_urls),
+            "new": len(self.new_urls),
+            "removed": len(removed),
+            "sitemap_urls": len(self.lastmod)
+        }
@@ -0,0 +1,160 @@
+from array import array
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+
+class StringTable:
+    """Bidirectional string <-> int32 id table"""
+
+    def __init__(self, strings: Optional[List[str]] = None):
+        self.strings: List[str] = []
+        self.ids: Dict[str, int] = {}
+        for string in strings or []:
+            self.intern(string)
+
+    def intern(self, string: str) -> int:
+        string_id = self.ids.get(string)
+        if string_id is None:
+            string_id = len(self.strings)
+            self.ids[string] = string_id
+            self.strings.append(string)
+        return string_id
+
+    def lookup(self, string: str) -> Optional[int]:
+        return self.ids.get(string)
+
+    def __getitem__(self, string_id: int) -> str:
+        return self.strings[string_id]
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+    def to_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Pack all strings into one UTF-8 blob plus offsets"""
+        encoded = [string.encode("utf-8") for string in self.strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(data) for data in encoded], out=offsets[1:])
+        blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        return blob, offsets
+
+    @classmethod
+    def from_arrays(cls, blob: np.ndarray, offsets: np.ndarray) -> "StringTable":
+        data = blob.tobytes()
+        return cls([data[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)])
+
+
+class LinkGraph:
+    """Internal link graph with URLs interned to int32 ids
+
+    Edges are appended during the crawl and compressed into CSR form
+    (indptr + sorted neighbour/anchor arrays) on first query, both by
+    source (out-links) and by target (in-links/backlinks).
+    """
+
+    def __init__(self):
+        self.urls = StringTable()
+        self.texts = StringTable([""])  # Anchor texts and link titles; id 0 is the empty string
+        self._src = array("i")
+        self._dst = array("i")
+        self._anchor = array("i")
+        self._title = array("i")
+        self._out: Optional[Tuple[np.ndarray, ...]] = None
+        self._in: Optional[Tuple[np.ndarray, ...]] = None
+
+    @property
+    def num_edges(self) -> int:
+        return len(self._src)
+
+    def add_edge(self, src_url: str, dst_url: str, anchor_text: str = "", title: str = ""):
+        self._src.append(self.urls.intern(src_url))
+        self._dst.append(self.urls.intern(dst_url))
+        self._anchor.append(self.texts.intern(anchor_text))
+        self._title.append(self.texts.intern(title))
+        self._out = self._in = None
+
+    def _edge_arrays(self) -> Tuple[np.ndarray, ...]:
+        return tuple(np.frombuffer(buf, dtype=np.int32) if len(buf) else np.zeros(0, dtype=np.int32)
+                     for buf in (self._src, self._dst, self._anchor, self._title))
+
+    def _compress(self, keys: np.ndarray, *values: np.ndarray) -> Tuple[np.ndarray, ...]:
+        # Stable sort keeps edges to the same node in insertion order
+        order = np.argsort(keys, kind="stable")
+        indptr = np.zeros(len(self.urls) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(keys, minlength=len(self.urls)), out=indptr[1:])
+        return (indptr,) + tuple(value[order] for value in values)
+
+    def _out_csr(self) -> Tuple[np.ndarray, ...]:
+        if self._out is None:
+            src, dst, anchor, title = self._edge_arrays()
+            self._out = self._compress(src, dst, anchor, title)
+        return self._out
+
+    def _in_csr(self) -> Tuple[np.ndarray, ...]:
+        if self._in is None:
+            src, dst, anchor, title = self._edge_arrays()
+            self._in = self._compress(dst, src, anchor, title)
+        return self._in
+
+    def in_degree(self) -> np.ndarray:
+        """In-link count for every URL id"""
+        return np.diff(self._in_csr()[0])
+
+    def out_degree(self) -> np.ndarray:
+        """Out-link count for every URL id"""
+        return np.diff(self._out_csr()[0])
+
+    def in_links(self, url: str) -> np.ndarray:
+        """Ids of the URLs linking to url (one entry per link)"""
+        url_id = self.urls.lookup(url)
+        if url_id is None:
+            return np.zeros(0, dtype=np.int32)
+        indptr, src = self._in_csr()[:2]
+        return src[indptr[url_id]:indptr[url_id + 1]]
+
+    def out_links(self, url: str) -> np.ndarray:
+        """Ids of the URLs url links to (one entry per link)"""
+        url_id = self.urls.lookup(url)
+        if url_id is None:
+            return np.zeros(0, dtype=np.int32)
+        indptr, dst = self._out_csr()[:2]
+        return dst[indptr[url_id]:indptr[url_id + 1]]
+
+    def backlinks(self, url: str) -> List[Tuple[str, str, str]]:
+        """(from_url, anchor_text, title) for every link pointing at url"""
+        url_id = self.urls.lookup(url)
+        if url_id is None:
+            return []
+        indptr, src, anchor, title = self._in_csr()
+        start, end = indptr[url_id], indptr[url_id + 1]
+        urls, texts = self.urls.strings, self.texts.strings
+        return [(urls[s], texts[a], texts[t])
+                for s, a, t in zip(src[start:end].tolist(), anchor[start:end].tolist(), title[start:end].tolist())]
+
+    def linked_urls(self) -> List[str]:
+        """URLs with at least one in-link, in id order"""
+        return [self.urls[url_id] for url_id in np.flatnonzero(self.in_degree()).tolist()]
+
+    def save(self, path: str):
+        """Save the graph as a single .npz file"""
+        src, dst, anchor, title = self._edge_arrays()
+        url_blob, url_offsets = self.urls.to_arrays()
+        text_blob, text_offsets = self.texts.to_arrays()
+        np.savez_compressed(
+            path,
+            src=src, dst=dst, anchor=anchor, title=title,
+            url_blob=url_blob, url_offsets=url_offsets,
+            text_blob=text_blob, text_offsets=text_offsets
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "LinkGraph":
+        """Load a graph written by save()"""
+        with np.load(path) as data:
+            graph = cls()
+            graph.urls = StringTable.from_arrays(data["url_blob"], data["url_offsets"])
+            graph.texts = StringTable.from_arrays(data["text_blob"], data["text_offsets"])
+            graph._src = array("i", data["src"].astype(np.int32).tobytes())
+            graph._dst = array("i", data["dst"].astype(np.int32).tobytes())
+            graph._anchor = array("i", data["anchor"].astype(np.int32).tobytes())
+            graph._title = array("i", data["title"].astype(np.int32).tobytes())
+        return graph
@@ -1,3 +1,3 @@
-# Middleware for Scrapy (if needed for advanced crawling)
-# Currently using direct Playwright/httpx approach, but keeping this for future use
-
+# Middleware for Scrapy (if needed for advanced crawling)
+# Currently using direct Playwright/httpx approach, but keeping this for future use
+
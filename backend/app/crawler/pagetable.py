@@ -0,0 +1,99 @@
+from typing import Any, Dict, List
+from urllib.parse import urlparse
+
+import numpy as np
+
+
+class PageTable:
+    """Columnar view of the crawled pages for vectorized audit checks
+
+    Everything the checks need from a page is reduced to one row of
+    integers when the page is appended: counts, lengths, flags, and ids
+    for titles and meta descriptions (interned in first-seen order, -1
+    when empty). The crawler appends pages as it emits them, so building
+    the table overlaps with fetching; the columns are materialized as
+    NumPy arrays on first use. Checks select rows with array predicates
+    and only look a page up to build the issue dict of a matching row.
+    """
+
+    COLUMNS = ("word_count", "status_code", "depth", "h1_count", "title_length",
+               "meta_description_length", "missing_alt", "canonical_mismatch",
+               "title_id", "meta_description_id")
+
+    def __init__(self):
+        self.pages: List[Dict[str, Any]] = []
+        # Interned titles and meta descriptions; a value's id is its index
+        self.values: Dict[str, List[str]] = {"title": [], "meta_description": []}
+        self._value_ids: Dict[str, Dict[str, int]] = {"title": {}, "meta_description": {}}
+        self._rows: List[tuple] = []
+        self._arrays: Dict[str, np.ndarray] = {}
+
+    @classmethod
+    def from_pages(cls, pages) -> "PageTable":
+        table = cls()
+        for page in pages:
+            table.append(page)
+        return table
+
+    def _value_id(self, field: str, value: str) -> int:
+        if not value:
+            return -1
+        ids = self._value_ids[field]
+        value_id = ids.get(value)
+        if value_id is None:
+            value_id = ids[value] = len(ids)
+            self.values[field].append(value)
+        return value_id
+
+    def append(self, page: Dict[str, Any]):
+        get = page.get
+        url = get("url", "")
+        title = get("title", "")
+        meta_description = get("meta_description", "")
+        canonical = get("canonical", "")
+        path = urlparse(url).path
+        self.pages.append(page)
+        self._rows.append((
+            get("word_count") or 0,
+            get("status_code", 200) or 0,
+            len([p for p in path.split('/') if p]),
+            len(get("h1", [])),
+            len(title.strip()) if title else 0,
+            len(meta_description.strip()) if meta_description else 0,
+            sum(1 for img in get("images", []) if not img.get("alt") or not img.get("alt").strip()),
+            bool(canonical and canonical != url and urlparse(canonical).path != path),
+            self._value_id("title", title),
+            self._value_id("meta_description", meta_description)
+        ))
+        self._arrays = {}
+
+    def __len__(self) -> int:
+        return len(self.pages)
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        if not self._arrays:
+            matrix = np.array(self._rows, dtype=np.int64).reshape(len(self._rows), len(self.COLUMNS))
+            self._arrays = {name: matrix[:, i] for i, name in enumerate(self.COLUMNS)}
+        return self._arrays[column]
+
+    def rows(self, mask: np.ndarray) -> List[int]:
+        """Row numbers where mask holds, in crawl order"""
+        return np.flatnonzero(mask).tolist()
+
+    def groups(self, column: str, min_size: int = 2, limit: int = 5) -> List[tuple]:
+        """(id, size, first `limit` rows) for every id in an id column shared
+        by at least min_size rows, in order of first appearance"""
+        ids = self[column]
+        present = ids[ids >= 0]
+        if not len(present):
+            return []
+        counts = np.bincount(present)
+        shared = np.flatnonzero(counts >= min_size)
+        if not len(shared):
+            return []
+        rows = np.flatnonzero(np.isin(ids, shared))
+        # Stable sort keeps each group's rows in crawl order
+        rows = rows[np.argsort(ids[rows], kind="stable")]
+        starts = np.searchsorted(ids[rows], shared)
+        return [(int(value), int(counts[value]), rows[start:start + min(limit, counts[value])].tolist())
+                for value, start in zip(shared, starts)]
@@ -0,0 +1,186 @@
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import sys
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+from urllib.parse import urljoin
+
+from app.crawler.blocks import hash_blocks
+from app.crawler.extractor import extract_html, has_anchor_target
+from app.crawler.records import PageRecord, LinkRecord, ImageRecord
+from app.crawler.simhash import simhash
+from app.crawler.urlnorm import UrlNormalizer
+
+# Normalizer used inside worker processes, set once by the pool initializer
+# so its LRU cache survives across pages
+_worker_normalizer: Optional[UrlNormalizer] = None
+
+
+def _init_worker(normalizer: UrlNormalizer):
+    global _worker_normalizer
+    _worker_normalizer = normalizer
+
+
+def _parse_in_worker(url: str, html: str, status_code: int, base_domain: str) -> PageRecord:
+    return parse_page(url, html, status_code, base_domain, _worker_normalizer)
+
+
+def _element_location(sourceline: Optional[int]) -> str:
+    """Get approximate location of element in HTML"""
+    if sourceline:
+        return f"Line {sourceline}"
+    return "Unknown location"
+
+
+def parse_page(url: str, html: str, status_code: int, base_domain: str,
+               normalizer: Optional[UrlNormalizer] = None) -> PageRecord:
+    """Parse HTML into a compact, picklable page record
+
+    Runs without any crawler state so it can execute in a worker process.
+    Each LinkRecord carries its normalized in-site target (if any) and the
+    issue/reason for broken links.
+    """
+    extraction = extract_html(html)
+    normalizer = normalizer or UrlNormalizer()
+    base_netloc = normalizer.netloc(base_domain)
+
+    canonical_url = extraction["canonical"]
+    if canonical_url and not canonical_url.startswith('http'):
+        canonical_url = urljoin(url, canonical_url)
+
+    # Content extraction (script, style, nav, footer and header are excluded)
+    text_content = extraction["text"]
+
+    links = []
+    for href, link_text, link_title, sourceline in extraction["links"]:
+        absolute_url = urljoin(url, href)
+
+        link_netloc = normalizer.netloc(absolute_url)
+        is_internal = link_netloc == base_netloc or not link_netloc
+
+        target = None
+        if is_internal:
+            normalized = normalizer.normalize(absolute_url)
+            if normalized.startswith(base_domain):
+                target = normalized
+
+        # Check for broken links (empty href, javascript:, mailto:, etc.)
+        issue = reason = None
+        if href and href.startswith('#'):
+            # Anchor link - check if target exists on page
+            target_id = href[1:]
+            if not has_anchor_target(extraction, target_id):
+                issue = "Broken anchor link"
+                reason = f"Target '{target_id}' not found on page"
+        elif not href:
+            issue = "Empty href"
+            reason = "Link has no href attribute"
+
+        links.append(LinkRecord(absolute_url, href, link_text, link_title, is_internal, url,
+                                _element_location(sourceline), target, issue, reason))
+
+    images = [ImageRecord(urljoin(url, img_src), alt_text, url) for img_src, alt_text in extraction["images"]]
+
+    return PageRecord(
+        url=url,
+        status_code=status_code,
+        title=extraction["title"],
+        meta_description=extraction["meta_description"],
+        canonical=canonical_url,
+        h1=extraction["h1"],
+        h2=extraction["h2"][:20],  # Increased limit
+        content=text_content[:10000],  # Increased content length
+        word_count=len(text_content.split()),
+        # Content hash for duplicate detection
+        content_hash=hashlib.md5(text_content.encode()).hexdigest(),
+        links=links,
+        images=images,
+        simhash=simhash(text_content),
+        text_blocks=hash_blocks(text_content, extraction["blocks"])
+    )
+
+
+def _gil_disabled() -> bool:
+    """True on free-threaded Python builds running without the GIL"""
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return is_gil_enabled is not None and not is_gil_enabled()
+
+
+class ParserPool:
+    """Runs parse_page off the event loop
+
+    Uses a process pool by default and a thread pool on free-threaded
+    builds, where threads parse in parallel without pickling. workers=0
+    parses inline on the event loop. A process pool that breaks (a worker
+    killed, e.g. by the OOM killer, or the pool failing to start) is
+    rebuilt once; if it breaks again, parsing falls back to inline.
+    """
+
+    def __init__(self, workers: Optional[int] = None, use_threads: Optional[bool] = None,
+                 normalizer: Optional[UrlNormalizer] = None):
+        if workers is None:
+            workers = min(4, os.cpu_count() or 1)
+        self.workers = max(0, workers)
+        self.normalizer = normalizer or UrlNormalizer()
+        self.use_threads = _gil_disabled() if use_threads is None else use_threads
+        self.executor: Optional[Executor] = None
+        self.rebuilt = False
+
+    def start(self):
+        if self.executor is not None or self.workers == 0:
+            return
+        if self.use_threads:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="parser")
+        else:
+            # Forking a process that already runs threads (e.g. Playwright's
+            # driver) can deadlock the child, so fork from a clean server
+            start_methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver") if "forkserver" in start_methods else None
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(self.normalizer,)
+            )
+
+    async def parse(self, url: str, html: str, status_code: int, base_domain: str) -> PageRecord:
+        """Parse a page in the pool (or inline when the pool is disabled)"""
+        if self.executor is None:
+            return parse_page(url, html, status_code, base_domain, self.normalizer)
+        loop = asyncio.get_running_loop()
+        if self.use_threads:
+            return await loop.run_in_executor(
+                self.executor, parse_page, url, html, status_code, base_domain, self.normalizer
+            )
+        executor = self.executor
+        try:
+            return await loop.run_in_executor(executor, _parse_in_worker, url, html, status_code, base_domain)
+        except BrokenProcessPool as e:
+            # Every parse in flight fails together; only the first replaces the pool
+            if self.executor is executor:
+                self._replace_broken_pool(e)
+            return await self.parse(url, html, status_code, base_domain)
+
+    def _replace_broken_pool(self, error: BrokenProcessPool):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.executor = None
+        if self.rebuilt:
+            print(f"Parser pool broke again ({error}), parsing in the crawler process from now on")
+            self.workers = 0
+            return
+        print(f"Parser pool broke ({error}), starting a new one")
+        self.rebuilt = True
+        try:
+            self.start()
+        except Exception as e:
+            print(f"Could not start a new parser pool ({e}), parsing in the crawler process from now on")
+            self.executor = None
+            self.workers = 0
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
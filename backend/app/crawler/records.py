@@ -0,0 +1,215 @@
+import sys
+from typing import Dict, List, Any, Optional, Tuple
+
+
+class Record:
+    """Slotted record that still reads like the dicts analyzers expect
+
+    Subclasses list their dict keys in _keys; both stored slots and derived
+    properties can be keys. Conversion to plain dicts only happens at the
+    API boundary (see serialize_crawl_results).
+    """
+    __slots__ = ()
+    _keys: Tuple[str, ...] = ()
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._keys:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key not in self._keys:
+            return default
+        value = getattr(self, key, None)
+        return default if value is None else value
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._keys
+
+    def keys(self) -> Tuple[str, ...]:
+        return self._keys
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({getattr(self, 'url', '')!r})"
+
+
+class LinkRecord(Record):
+    """A single <a href> found on a page"""
+    __slots__ = ("url", "href", "anchor_text", "title", "internal", "source_page",
+                 "location", "target", "issue", "reason")
+    _keys = ("url", "href", "anchor_text", "title", "is_untitled", "internal",
+             "source_page", "location", "issue", "reason")
+
+    def __init__(self, url: str, href: str, anchor_text: str, title: str, internal: bool,
+                 source_page: str, location: str, target: Optional[str] = None,
+                 issue: Optional[str] = None, reason: Optional[str] = None):
+        self.url = url
+        self.href = href
+        self.anchor_text = anchor_text
+        self.title = title
+        self.internal = internal
+        self.source_page = source_page
+        self.location = location
+        self.target = target  # Normalized in-site URL this link points at, if any
+        self.issue = issue  # Set for broken links
+        self.reason = reason
+
+    @property
+    def is_untitled(self) -> bool:
+        return not self.anchor_text or self.anchor_text.strip() == ""
+
+    def intern(self):
+        """Share URL strings with every other record that mentions them"""
+        self.url = sys.intern(self.url)
+        self.source_page = sys.intern(self.source_page)
+        if self.target is not None:
+            self.target = sys.intern(self.target)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "href": self.href,
+            "anchor_text": self.anchor_text,
+            "title": self.title,
+            "is_untitled": self.is_untitled,
+            "internal": self.internal,
+            "source_page": self.source_page,
+            "location": self.location
+        }
+
+    def to_broken_dict(self) -> Dict[str, Any]:
+        return {**self.to_dict(), "issue": self.issue, "reason": self.reason}
+
+
+class ImageRecord(Record):
+    """A single <img> found on a page"""
+    __slots__ = ("url", "alt", "page_url")
+    _keys = ("url", "alt", "page_url")
+
+    def __init__(self, url: str, alt: str, page_url: str):
+        self.url = url
+        self.alt = alt
+        self.page_url = page_url
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"url": self.url, "alt": self.alt, "page_url": self.page_url}
+
+
+class PageRecord(Record):
+    """A crawled page; link lists are derived views over a single links list"""
+    __slots__ = ("url", "status_code", "title", "meta_description", "canonical", "h1", "h2",
+                 "content", "word_count", "content_hash", "simhash", "text_blocks", "links", "images",
+                 "internal_links", "backlinks_count", "load_time", "crawl_depth")
+    _keys = ("url", "status_code", "title", "meta_description", "canonical", "h1", "h2",
+             "content", "word_count", "content_hash", "simhash", "text_blocks", "internal_links", "external_links",
+             "images", "all_links", "internal_links_detailed", "external_links_detailed",
+             "broken_links_on_page", "backlinks_count", "load_time", "crawl_depth")
+
+    def __init__(self, url: str, status_code: int, title: str, meta_description: str,
+                 canonical: str, h1: List[str], h2: List[str], content: str, word_count: int,
+                 content_hash: str, links: List[LinkRecord], images: List[ImageRecord],
+                 simhash: Optional[int] = None, text_blocks: Optional[List[Tuple[int, int, int]]] = None):
+        self.url = url
+        self.status_code = status_code
+        self.title = title
+        self.meta_description = meta_description
+        self.canonical = canonical
+        self.h1 = h1
+        self.h2 = h2
+        self.content = content
+        self.word_count = word_count
+        self.content_hash = content_hash
+        self.simhash = simhash  # 64-bit SimHash of the full text (None without words), for near-duplicate search
+        # (hash, start, end) of each paragraph-like block of the full text (see BlockIndex)
+        self.text_blocks = text_blocks or []
+        self.links = links
+        self.images = images
+        self.internal_links: List[str] = []  # Unvisited in-site targets when the page was parsed
+        self.backlinks_count = 0  # Backlinks themselves live in the crawl's LinkGraph
+        self.load_time: Optional[float] = None
+        self.crawl_depth: Optional[int] = None
+
+    @property
+    def all_links(self) -> List[LinkRecord]:
+        return self.links
+
+    @property
+    def internal_links_detailed(self) -> List[LinkRecord]:
+        return [link for link in self.links if link.internal]
+
+    @property
+    def external_links_detailed(self) -> List[LinkRecord]:
+        return [link for link in self.links if not link.internal]
+
+    @property
+    def external_links(self) -> List[str]:
+        return [link.url for link in self.links if not link.internal][:50]
+
+    @property
+    def simhash_hex(self) -> Optional[str]:
+        """The fingerprint as hex, since 64-bit integers don't survive JSON in the browser
+        (None for records pickled before fingerprints existed)"""
+        fingerprint = getattr(self, "simhash", None)
+        return f"{fingerprint:016x}" if fingerprint is not None else None
+
+    @property
+    def broken_links_on_page(self) -> List[LinkRecord]:
+        return [link for link in self.links if link.issue]
+
+    def to_dict(self, backlinks: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "status_code": self.status_code,
+            "title": self.title,
+            "meta_description": self.meta_description,
+            "canonical": self.canonical,
+            "h1": self.h1,
+            "h2": self.h2,
+            "content": self.content,
+            "word_count": self.word_count,
+            "content_hash": self.content_hash,
+            "simhash": self.simhash_hex,
+            "internal_links": self.internal_links,
+            "external_links": self.external_links,
+            "images": [image.to_dict() for image in self.images],
+            "all_links": [link.to_dict() for link in self.links],
+            "internal_links_detailed": [link.to_dict() for link in self.internal_links_detailed],
+            "external_links_detailed": [link.to_dict() for link in self.external_links_detailed],
+            "broken_links_on_page": [link.to_broken_dict() for link in self.broken_links_on_page],
+            "backlinks_count": self.backlinks_count,
+            "backlinks": backlinks or [],
+            "load_time": self.load_time,
+            "crawl_depth": self.crawl_depth
+        }
+
+
+def _backlink_dicts(link_graph, url: str) -> List[Dict[str, Any]]:
+    return [
+        {"from_url": from_url, "anchor_text": anchor_text, "title": title}
+        for from_url, anchor_text, title in link_graph.backlinks(url)
+    ]
+
+
+def serialize_crawl_results(crawl_results: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert crawl results built from records into the JSON shape the API returns"""
+    link_analysis = crawl_results.get("link_analysis", {})
+    link_graph = crawl_results.get("link_graph")
+    serialized = {key: value for key, value in crawl_results.items() if key not in ("link_graph", "page_table", "block_index")}
+    return {
+        **serialized,
+        "pages": [
+            page.to_dict(_backlink_dicts(link_graph, page.url) if link_graph else None)
+            for page in crawl_results.get("pages", [])
+        ],
+        "images": [image.to_dict() for image in crawl_results.get("images", [])],
+        "link_analysis": {
+            **link_analysis,
+            "untitled_links": [link.to_dict() for link in link_analysis.get("untitled_links", [])],
+            "broken_links": [link.to_broken_dict() for link in link_analysis.get("broken_links", [])],
+            "internal_links_detailed": [link.to_dict() for link in link_analysis.get("internal_links_detailed", [])],
+            "external_links_detailed": [link.to_dict() for link in link_analysis.get("external_links_detailed", [])]
+        },
+        "backlinks_map": {
+            url: _backlink_dicts(link_graph, url) for url in link_graph.linked_urls()
+        } if link_graph else {}
+    }
@@ -0,0 +1,235 @@
+import asyncio
+import re
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+# Try to import Playwright, but make it optional
+try:
+    from playwright.async_api import async_playwright
+    PLAYWRIGHT_AVAILABLE = True
+except ImportError:
+    PLAYWRIGHT_AVAILABLE = False
+    async_playwright = None
+
+# Resource types that never affect the rendered DOM text
+DEFAULT_BLOCKED_TYPES = ("image", "font", "media")
+
+# Third-party analytics/ads hosts (subdomains match too)
+DEFAULT_TRACKER_HOSTS = (
+    "google-analytics.com", "googletagmanager.com", "googlesyndication.com", "googleadservices.com",
+    "doubleclick.net", "facebook.net", "connect.facebook.net", "hotjar.com", "segment.com", "segment.io",
+    "mixpanel.com", "clarity.ms", "newrelic.com", "nr-data.net", "fullstory.com", "intercom.io",
+    "criteo.com", "taboola.com", "outbrain.com", "scorecardresearch.com", "quantserve.com",
+    "adnxs.com", "amazon-adsystem.com", "bing.com", "linkedin.com", "ads-twitter.com",
+)
+
+# Resolves once the DOM has gone quiet_ms without a mutation, or after timeout_ms
+DOM_STABLE_JS = """
+([quietMs, timeoutMs]) => new Promise(resolve => {
+    let quietTimer = null;
+    const finish = () => {
+        observer.disconnect();
+        clearTimeout(quietTimer);
+        clearTimeout(deadline);
+        resolve(true);
+    };
+    const observer = new MutationObserver(() => {
+        clearTimeout(quietTimer);
+        quietTimer = setTimeout(finish, quietMs);
+    });
+    const deadline = setTimeout(finish, timeoutMs);
+    observer.observe(document, {subtree: true, childList: true, attributes: true, characterData: true});
+    quietTimer = setTimeout(finish, quietMs);
+})
+"""
+
+
+class RenderPool:
+    """Bounded pool of warm Playwright pages for JS rendering
+
+    One browser and context are launched per crawl and `size` pages are
+    reused across URLs. Images, fonts, media and known trackers are
+    aborted at the network layer, and rendering waits for the DOM to stop
+    mutating instead of sleeping for a fixed time.
+    """
+
+    def __init__(self, size: int = 4, blocked_types: Iterable[str] = DEFAULT_BLOCKED_TYPES,
+                 tracker_hosts: Iterable[str] = DEFAULT_TRACKER_HOSTS, navigation_timeout: float = 30.0,
+                 quiet_ms: int = 500, stable_timeout_ms: int = 5000, executable_path: Optional[str] = None):
+        self.size = size
+        self.blocked_types = frozenset(blocked_types)
+        self.tracker_hosts = tuple(tracker_hosts)
+        self.navigation_timeout = navigation_timeout
+        self.quiet_ms = quiet_ms
+        self.stable_timeout_ms = stable_timeout_ms
+        self.executable_path = executable_path  # A system Chrome/Chromium instead of Playwright's download
+        self.playwright = None
+        self.browser = None
+        self.context = None
+        self.pages: Optional[asyncio.Queue] = None
+        self.pages_rendered = 0
+        self.render_seconds = 0.0
+        self.blocked_requests = 0
+
+    async def start(self):
+        """Launch the browser and warm up the page pool"""
+        if not PLAYWRIGHT_AVAILABLE:
+            raise RuntimeError("Playwright is not installed")
+        self.playwright = await async_playwright().start()
+        try:
+            self.browser = await self.playwright.chromium.launch(headless=True, executable_path=self.executable_path)
+            self.context = await self.browser.new_context()
+            self.context.set_default_navigation_timeout(self.navigation_timeout * 1000)
+            await self.context.route("**/*", self._route)
+            self.pages = asyncio.Queue()
+            for _ in range(self.size):
+                self.pages.put_nowait(await self.context.new_page())
+        except Exception:
+            await self.close()
+            raise
+
+    def _is_tracker(self, url: str) -> bool:
+        host = urlparse(url).hostname or ""
+        return any(host == tracker or host.endswith("." + tracker) for tracker in self.tracker_hosts)
+
+    async def _route(self, route):
+        request = route.request
+        if request.resource_type in self.blocked_types or self._is_tracker(request.url):
+            self.blocked_requests += 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def render(self, url: str) -> Optional[Tuple[int, str]]:
+        """Render url on a pooled page; returns (status_code, html) or None"""
+        page = await self.pages.get()
+        start_time = time.monotonic()
+        try:
+            response = await page.goto(url, wait_until="domcontentloaded")
+            if not response:
+                return None
+            await page.evaluate(DOM_STABLE_JS, [self.quiet_ms, self.stable_timeout_ms])
+            html = await page.content()
+            self.pages_rendered += 1
+            self.render_seconds += time.monotonic() - start_time
+            return response.status, html
+        finally:
+            if page.is_closed():
+                # A crashed page is replaced so the pool keeps its size
+                page = await self.context.new_page()
+            self.pages.put_nowait(page)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pages_rendered": self.pages_rendered,
+            "avg_render_seconds": round(self.render_seconds / self.pages_rendered, 3) if self.pages_rendered else 0,
+            "blocked_requests": self.blocked_requests
+        }
+
+    async def close(self):
+        for resource in (self.context, self.browser):
+            if resource is not None:
+                try:
+                    await resource.close()
+                except Exception:
+                    pass
+        if self.playwright is not None:
+            await self.playwright.stop()
+        self.playwright = self.browser = self.context = None
+
+
+# Mount points SPA frameworks render into (React/Vue/Next/Nuxt/Gatsby/Angular)
+EMPTY_ROOT_RE = re.compile(
+    r'<(?:div|main|app-root)\b[^>]*\bid=["\']?(?:app|root|__next|__nuxt|___gatsby|main)(?![\w-])[^>]*>\s*</(?:div|main|app-root)>',
+    re.IGNORECASE
+)
+NOSCRIPT_JS_RE = re.compile(r'<noscript\b[^>]*>(?:(?!</noscript>).){0,500}?javascript', re.IGNORECASE | re.DOTALL)
+SCRIPT_RE = re.compile(r'<script\b', re.IGNORECASE)
+TEMPLATE_ID_RE = re.compile(r'\d')
+
+
+class RenderDecider:
+    """Learns per URL template whether pages need JavaScript rendering
+
+    Pages are fetched over HTTP first. When a page from a template that has
+    not been decided yet looks like a JS shell (little text for its markup,
+    an empty framework root element, a <noscript> "enable JavaScript"
+    notice), it is rendered once as a probe. The template is marked
+    "render" only if the rendered page has substantially more text, so a
+    single probe settles the fetch path for every similar URL.
+    """
+
+    HTTP = "http"
+    RENDER = "render"
+
+    def __init__(self, min_text_ratio: float = 0.02, min_words: int = 50,
+                 min_word_gain: float = 1.5, min_extra_words: int = 30):
+        self.min_text_ratio = min_text_ratio  # Approximate text bytes per markup byte
+        self.min_words = min_words
+        self.min_word_gain = min_word_gain
+        self.min_extra_words = min_extra_words
+        self.decisions: Dict[str, str] = {}
+        self.probes = 0
+
+    @staticmethod
+    def template(url: str) -> str:
+        """Path pattern of url: segments holding digits and the final segment become '*'
+
+        /blog/2024/05/my-post and /blog/2023/11/other-post share /blog/*/*/*.
+        """
+        parsed = urlparse(url)
+        segments = [segment for segment in parsed.path.split("/") if segment]
+        if segments:
+            segments[-1] = "*"
+        pattern = "/".join("*" if TEMPLATE_ID_RE.search(segment) else segment for segment in segments)
+        return f"{parsed.netloc}/{pattern}"
+
+    def decision(self, url: str) -> Optional[str]:
+        """The learned fetch path for url's template, or None while undecided"""
+        return self.decisions.get(self.template(url))
+
+    def shell_signals(self, html: str, word_count: int) -> List[str]:
+        """Reasons html looks like a client-rendered shell (empty when it doesn't)"""
+        signals = []
+        if EMPTY_ROOT_RE.search(html):
+            signals.append("empty_root")
+        if NOSCRIPT_JS_RE.search(html):
+            signals.append("noscript")
+        # ~6 bytes per word including whitespace
+        if html and word_count * 6 / len(html) < self.min_text_ratio:
+            signals.append("low_text_ratio")
+        if word_count < self.min_words and SCRIPT_RE.search(html):
+            signals.append("few_words")
+        return signals
+
+    def needs_probe(self, url: str, html: str, word_count: int) -> bool:
+        """Decide url's template from an HTTP response when it clearly isn't a shell
+
+        Returns True when the page should be rendered to confirm.
+        """
+        template = self.template(url)
+        if template in self.decisions:
+            return False
+        if not self.shell_signals(html, word_count):
+            self.decisions[template] = self.HTTP
+            return False
+        return True
+
+    def record_probe(self, url: str, http_words: int, rendered_words: Optional[int]) -> bool:
+        """Settle url's template from a probe render; True when rendering pays off"""
+        self.probes += 1
+        render = rendered_words is not None and (
+            rendered_words >= http_words * self.min_word_gain
+            and rendered_words - http_words >= self.min_extra_words
+        )
+        self.decisions.setdefault(self.template(url), self.RENDER if render else self.HTTP)
+        return render
+
+    def stats(self) -> Dict[str, Any]:
+        decisions = list(self.decisions.values())
+        return {
+            "templates": len(decisions),
+            "render_templates": decisions.count(self.RENDER),
+            "probes": self.probes
+        }
@@ -0,0 +1,151 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Any, Optional
+
+
+class HostState:
+    """Token bucket and AIMD concurrency window for a single host"""
+
+    def __init__(self, rate: float, concurrency: float):
+        self.rate = rate  # Tokens (requests) added per second
+        self.tokens = 1.0
+        self.last_refill = time.monotonic()
+        self.concurrency = concurrency  # Fractional AIMD window, floored when admitting requests
+        self.in_flight = 0
+        self.latency_ewma: Optional[float] = None
+        self.requests = 0
+        self.throttled = 0
+        self.condition = asyncio.Condition()
+
+
+class RequestOutcome:
+    """What a request admitted by HostScheduler.request() got back, set by its body"""
+
+    def __init__(self):
+        self.status_code: Optional[int] = None
+        self.timed_out = False
+
+
+class HostScheduler:
+    """Per-host politeness scheduler with adaptive (AIMD) concurrency
+
+    Every request waits for a token from its host's bucket and for a free
+    slot in the host's concurrency window. Fast 2xx/304 responses grow the rate
+    and window additively; 429/503 responses, timeouts and latency spikes
+    shrink them multiplicatively. Callers hold a slot with
+    `async with scheduler.request(host) as outcome`, which releases it
+    however the request ends.
+    """
+
+    THROTTLE_STATUS_CODES = (429, 503)
+
+    def __init__(self, initial_rate: float = 10.0, min_rate: float = 0.5, max_rate: float = 100.0,
+                 initial_concurrency: int = 4, max_concurrency: int = 32,
+                 increase_step: float = 1.0, decrease_factor: float = 0.5,
+                 latency_factor: float = 2.0, latency_smoothing: float = 0.2):
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.initial_concurrency = initial_concurrency
+        self.max_concurrency = max_concurrency
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.latency_factor = latency_factor  # Latency above ewma * factor counts as congestion
+        self.latency_smoothing = latency_smoothing
+        self.hosts: Dict[str, HostState] = {}
+
+    def _get_state(self, host: str) -> HostState:
+        state = self.hosts.get(host)
+        if state is None:
+            state = HostState(self.initial_rate, float(self.initial_concurrency))
+            self.hosts[host] = state
+        return state
+
+    def _refill(self, state: HostState):
+        now = time.monotonic()
+        # Bucket capacity equals one second of traffic, so bursts stay bounded
+        capacity = max(1.0, state.rate)
+        state.tokens = min(capacity, state.tokens + (now - state.last_refill) * state.rate)
+        state.last_refill = now
+
+    @asynccontextmanager
+    async def request(self, host: str) -> AsyncIterator[RequestOutcome]:
+        """Hold a request slot for host while the body runs
+
+        The body records the response on the yielded outcome; on exit the
+        slot is released and the host's rate adapted from it, even when the
+        body raises or the task is cancelled.
+        """
+        await self.acquire(host)
+        outcome = RequestOutcome()
+        request_start = time.monotonic()
+        try:
+            yield outcome
+        finally:
+            # Shielded: a cancellation arriving while release waits for the
+            # host's lock must not leave the slot counted as in flight
+            await asyncio.shield(self.release(host, outcome.status_code, time.monotonic() - request_start,
+                                              outcome.timed_out))
+
+    async def acquire(self, host: str):
+        """Wait until a request to host is allowed"""
+        state = self._get_state(host)
+        async with state.condition:
+            while True:
+                self._refill(state)
+                has_slot = state.in_flight < max(1, int(state.concurrency))
+                if has_slot and state.tokens >= 1:
+                    state.tokens -= 1
+                    state.in_flight += 1
+                    return
+                # Out of tokens: sleep until the next one; out of slots: wait for a release
+                timeout = (1 - state.tokens) / state.rate if has_slot else None
+                try:
+                    await asyncio.wait_for(state.condition.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def release(self, host: str, status_code: Optional[int] = None,
+                      latency: Optional[float] = None, timed_out: bool = False):
+        """Release a slot and adapt the host's rate from the response"""
+        state = self._get_state(host)
+        async with state.condition:
+            state.in_flight -= 1
+            state.requests += 1
+
+            slow = False
+            if latency is not None:
+                if state.latency_ewma is not None:
+                    slow = latency > state.latency_ewma * self.latency_factor
+                    state.latency_ewma += self.latency_smoothing * (latency - state.latency_ewma)
+                else:
+                    state.latency_ewma = latency
+
+            if timed_out or status_code in self.THROTTLE_STATUS_CODES or slow:
+                # Multiplicative decrease
+                state.throttled += 1
+                state.rate = max(self.min_rate, state.rate * self.decrease_factor)
+                state.concurrency = max(1.0, state.concurrency * self.decrease_factor)
+                state.tokens = min(state.tokens, 0.0)
+            elif status_code is not None and (200 <= status_code < 300 or status_code == 304):
+                # Additive increase, roughly +1 slot per window's worth of responses
+                state.rate = min(self.max_rate, state.rate + self.increase_step)
+                state.concurrency = min(float(self.max_concurrency),
+                                        state.concurrency + self.increase_step / state.concurrency)
+
+            state.condition.notify_all()
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Current rate, window and in-flight count per host, for monitoring"""
+        return {
+            host: {
+                "rate": round(state.rate, 2),
+                "concurrency": int(state.concurrency),
+                "in_flight": state.in_flight,
+                "avg_latency": round(state.latency_ewma, 3) if state.latency_ewma is not None else None,
+                "requests": state.requests,
+                "throttled": state.throttled
+            }
+            for host, state in self.hosts.items()
+        }
@@ -0,0 +1,219 @@
+import hashlib
+import math
+import os
+import sqlite3
+import tempfile
+from abc import ABC, abstractmethod
+from typing import Iterator, List, Optional, Set, Tuple
+
+
+def _url_hash(url: str) -> bytes:
+    return hashlib.blake2b(url.encode("utf-8"), digest_size=16).digest()
+
+
+class SeenStore(ABC):
+    """Set-like store of URLs already seen during a crawl
+
+    Backends only need add/__contains__/__len__; add returns True when the
+    URL was not seen before.
+    """
+
+    @abstractmethod
+    def add(self, url: str) -> bool:
+        ...
+
+    @abstractmethod
+    def __contains__(self, url: str) -> bool:
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    def close(self):
+        pass
+
+
+class MemorySeenStore(SeenStore):
+    """Exact in-memory set of URL strings (the default)"""
+
+    def __init__(self):
+        self.urls: Set[str] = set()
+
+    def add(self, url: str) -> bool:
+        if url in self.urls:
+            return False
+        self.urls.add(url)
+        return True
+
+    def __contains__(self, url: str) -> bool:
+        return url in self.urls
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.urls)
+
+
+class _BloomFilter:
+    """Fixed-size Bloom filter using double hashing over a bytearray"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, math.ceil(math.log2(1 / error_rate)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def add(self, hashes: Tuple[int, int]):
+        h1, h2 = hashes
+        bits, num_bits = self.bits, self.num_bits
+        for i in range(self.num_hashes):
+            position = (h1 + i * h2) % num_bits
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, hashes: Tuple[int, int]) -> bool:
+        h1, h2 = hashes
+        bits, num_bits = self.bits, self.num_bits
+        for i in range(self.num_hashes):
+            position = (h1 + i * h2) % num_bits
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+
+class BloomSeenStore(SeenStore):
+    """Scalable Bloom filter (Almeida et al. 2007)
+
+    Starts with one filter sized for initial_capacity and adds a larger,
+    tighter filter each time the newest one fills up, so the overall
+    false-positive rate stays below error_rate however many URLs arrive.
+    A false positive means a new URL is treated as already seen and is
+    skipped; there are no false negatives.
+    """
+
+    def __init__(self, initial_capacity: int = 100_000, error_rate: float = 0.001,
+                 growth: int = 2, tightening: float = 0.9):
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+        self.initial_capacity = initial_capacity
+        self.error_rate = error_rate
+        self.growth = growth
+        self.tightening = tightening
+        self.filters: List[_BloomFilter] = []
+        self.count = 0
+        self._add_filter()
+
+    def _add_filter(self):
+        # Filter i gets error_rate * (1 - r) * r^i, which sums to at most error_rate
+        index = len(self.filters)
+        capacity = self.initial_capacity * self.growth ** index
+        error = self.error_rate * (1 - self.tightening) * self.tightening ** index
+        self.filters.append(_BloomFilter(capacity, error))
+
+    @staticmethod
+    def _hashes(url: str) -> Tuple[int, int]:
+        digest = _url_hash(url)
+        # Force h2 odd so it never degenerates to a single probe position
+        return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+    def add(self, url: str) -> bool:
+        hashes = self._hashes(url)
+        if any(hashes in bloom for bloom in self.filters):
+            return False
+        if self.filters[-1].count >= self.filters[-1].capacity:
+            self._add_filter()
+        self.filters[-1].add(hashes)
+        self.count += 1
+        return True
+
+    def __contains__(self, url: str) -> bool:
+        hashes = self._hashes(url)
+        return any(hashes in bloom for bloom in self.filters)
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(len(bloom.bits) for bloom in self.filters)
+
+
+class DiskSeenStore(SeenStore):
+    """Exact store of 64-bit URL hashes in an on-disk SQLite table
+
+    Memory stays flat regardless of crawl size; SQLite's page cache bounds
+    what is held in RAM. Inserts are committed in batches.
+    """
+
+    def __init__(self, path: Optional[str] = None, commit_every: int = 1000, cache_kb: int = 8192):
+        self._owns_file = path is None
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix="seen-", suffix=".sqlite")
+            os.close(fd)
+        self.path = path
+        self.commit_every = commit_every
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=OFF")
+        self.conn.execute(f"PRAGMA cache_size=-{cache_kb}")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS seen (hash INTEGER PRIMARY KEY) WITHOUT ROWID")
+        self.count = self.conn.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+        self._pending = 0
+
+    @staticmethod
+    def _hash(url: str) -> int:
+        return int.from_bytes(_url_hash(url)[:8], "little", signed=True)
+
+    def add(self, url: str) -> bool:
+        cursor = self.conn.execute("INSERT OR IGNORE INTO seen (hash) VALUES (?)", (self._hash(url),))
+        if cursor.rowcount == 0:
+            return False
+        self.count += 1
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self.conn.commit()
+            self._pending = 0
+        return True
+
+    def __contains__(self, url: str) -> bool:
+        # Uncommitted inserts are visible on the same connection
+        return self.conn.execute("SELECT 1 FROM seen WHERE hash = ?", (self._hash(url),)).fetchone() is not None
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def size_bytes(self) -> int:
+        self.conn.commit()
+        return sum(os.path.getsize(self.path + suffix)
+                   for suffix in ("", "-wal") if os.path.exists(self.path + suffix))
+
+    def close(self):
+        if self.conn is None:
+            return
+        self.conn.commit()
+        self.conn.close()
+        self.conn = None
+        if self._owns_file:
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(self.path + suffix):
+                    os.remove(self.path + suffix)
+
+
+SEEN_BACKENDS = {
+    "memory": MemorySeenStore,
+    "bloom": BloomSeenStore,
+    "disk": DiskSeenStore,
+}
+
+
+def create_seen_store(backend: str = "memory", **kwargs) -> SeenStore:
+    """Create a seen-URL store by backend name ('memory', 'bloom' or 'disk')"""
+    try:
+        store_class = SEEN_BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown seen-URL backend: {backend}")
+    return store_class(**kwargs)
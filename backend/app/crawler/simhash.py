@@ -0,0 +1,184 @@
+import hashlib
+import os
+import re
+import sqlite3
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Normalized tokens: lowercase runs of word characters (as the text analyzers use)
+WORD_PATTERN = re.compile(r"\w+")
+
+FINGERPRINT_BITS = 64
+# The fingerprint is split into BLOCKS blocks of BLOCK_BITS bits. Two
+# fingerprints at most BLOCKS - 1 bits apart agree on at least one whole
+# block (pigeonhole), so one lookup table per block finds every match.
+BLOCKS = 4
+BLOCK_BITS = FINGERPRINT_BITS // BLOCKS
+MAX_DISTANCE = BLOCKS - 1
+
+_MASK = (1 << FINGERPRINT_BITS) - 1
+
+
+def simhash(text: str, shingle_size: int = 3) -> Optional[int]:
+    """64-bit SimHash of text's word shingles (None when text has no words)
+
+    Each distinct shingle of shingle_size normalized words is hashed with
+    a stable 64-bit BLAKE2b and votes on every bit, weighted by how often
+    it occurs; bits with a positive total are set. Texts with fewer words
+    than shingle_size form a single shingle. Texts without words get no
+    fingerprint, so empty pages don't all match each other.
+    """
+    tokens = WORD_PATTERN.findall(text.lower())
+    if not tokens:
+        return None
+    if len(tokens) < shingle_size:
+        shingles = Counter([" ".join(tokens)])
+    else:
+        shingles = Counter(" ".join(tokens[i:i + shingle_size]) for i in range(len(tokens) - shingle_size + 1))
+    digests = b"".join(hashlib.blake2b(shingle.encode("utf8"), digest_size=8).digest() for shingle in shingles)
+    hashes = np.frombuffer(digests, dtype="<u8")
+    weights = np.fromiter(shingles.values(), dtype=np.int64, count=len(shingles))
+    # (shingles, 64) matrix whose column i is bit i of each hash
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    votes = 2 * (weights @ bits) - weights.sum()
+    # Bit i of the fingerprint is votes[i]; packbits wants the top bit first
+    return int(np.packbits(votes[::-1] > 0).view(">u8")[0])
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def block_keys(fingerprint: int) -> List[int]:
+    """The fingerprint's BLOCKS blocks, most significant first"""
+    return [(fingerprint >> (FINGERPRINT_BITS - BLOCK_BITS * (block + 1))) & ((1 << BLOCK_BITS) - 1)
+            for block in range(BLOCKS)]
+
+
+def _to_sqlite(fingerprint: int) -> int:
+    """SQLite integers are signed 64-bit"""
+    return fingerprint - (1 << FINGERPRINT_BITS) if fingerprint >> (FINGERPRINT_BITS - 1) else fingerprint
+
+
+class SimHashIndex:
+    """Persistent SimHash index of pages from every scan, for cross-scan near-duplicates
+
+    A SQLite file holds one row per (scan, url) with its fingerprint and
+    the fingerprint's block keys. Each block column has an index on
+    (block, fingerprint), which is the sorted "permuted table" of Manku et
+    al.'s near-duplicate scheme: a query reads only the fingerprints that
+    share a block with it (four index range scans, never a table scan),
+    along with their page details, and checks their Hamming distance in
+    Python, so a query costs well under a millisecond with millions of
+    stored pages.
+
+    Nothing else deletes rows, so callers bound the index with prune().
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30.0)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        block_columns = ", ".join(f"block{block} INTEGER" for block in range(BLOCKS))
+        block_indexes = "\n".join(
+            f"CREATE INDEX IF NOT EXISTS pages_block{block} ON pages (block{block}, fingerprint);"
+            for block in range(BLOCKS)
+        )
+        self.conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS pages (
+                scan_id TEXT, url TEXT, site TEXT, fingerprint INTEGER, indexed_at REAL, {block_columns},
+                UNIQUE (scan_id, url)
+            );
+            {block_indexes}
+        """)
+        self.conn.commit()
+        self._candidates_sql = " UNION ".join(
+            f"SELECT rowid, fingerprint, scan_id, url, site FROM pages WHERE block{block} = ?"
+            for block in range(BLOCKS)
+        )
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def add(self, scan_id: str, site: str, pages: Iterable[Tuple[str, int]]):
+        """Index a scan's (url, fingerprint) pairs, replacing earlier rows for the same scan and url"""
+        now = time.time()
+        self.conn.executemany(
+            f"INSERT OR REPLACE INTO pages (scan_id, url, site, fingerprint, indexed_at, "
+            f"{', '.join(f'block{block}' for block in range(BLOCKS))}) "
+            f"VALUES (?, ?, ?, ?, ?, {', '.join('?' * BLOCKS)})",
+            ((scan_id, url, site, _to_sqlite(fingerprint), now, *block_keys(fingerprint))
+             for url, fingerprint in pages)
+        )
+        self.conn.commit()
+
+    def remove_scan(self, scan_id: str):
+        self.conn.execute("DELETE FROM pages WHERE scan_id = ?", (scan_id,))
+        self.conn.commit()
+
+    def prune(self, keep_scans: Optional[int] = None, max_age: Optional[float] = None) -> int:
+        """Drop all but each site's keep_scans most recently indexed scans,
+        and scans indexed more than max_age seconds ago; returns the rows removed"""
+        stale = set()
+        if max_age is not None:
+            stale.update(scan_id for scan_id, in self.conn.execute(
+                "SELECT scan_id FROM pages GROUP BY scan_id HAVING MAX(indexed_at) < ?", (time.time() - max_age,)
+            ))
+        if keep_scans is not None:
+            kept: Dict[str, int] = {}
+            for scan_id, site in self.conn.execute(
+                "SELECT scan_id, site FROM pages GROUP BY scan_id, site ORDER BY MAX(indexed_at) DESC"
+            ):
+                kept[site] = kept.get(site, 0) + 1
+                if kept[site] > keep_scans:
+                    stale.add(scan_id)
+        removed = 0
+        for scan_id in stale:
+            removed += self.conn.execute("DELETE FROM pages WHERE scan_id = ?", (scan_id,)).rowcount
+        self.conn.commit()
+        return removed
+
+    def query(self, fingerprint: int, max_distance: int = MAX_DISTANCE, exclude_scan: Optional[str] = None,
+              exclude_url: Optional[str] = None, limit: Optional[int] = 10) -> List[Dict[str, Any]]:
+        """Stored pages within max_distance bits of fingerprint, nearest first
+
+        Each match is {"url", "scan_id", "site", "distance"}; pages of
+        exclude_scan and pages at exclude_url (say, the page's own earlier
+        versions) are left out before at most limit matches are kept.
+        """
+        if not 0 <= max_distance <= MAX_DISTANCE:
+            raise ValueError(f"max_distance must be between 0 and {MAX_DISTANCE}")
+        matches = []
+        for _, stored, scan_id, url, site in self.conn.execute(self._candidates_sql, block_keys(fingerprint)):
+            if scan_id == exclude_scan or url == exclude_url:
+                continue
+            distance = hamming_distance(stored & _MASK, fingerprint)
+            if distance <= max_distance:
+                matches.append({"url": url, "scan_id": scan_id, "site": site, "distance": distance})
+        matches.sort(key=lambda match: match["distance"])
+        return matches[:limit] if limit is not None else matches
+
+    def query_many(self, fingerprints: Sequence[int], max_distance: int = MAX_DISTANCE,
+                   exclude_scan: Optional[str] = None, exclude_urls: Optional[Sequence[Optional[str]]] = None,
+                   limit: Optional[int] = 10) -> List[List[Dict[str, Any]]]:
+        """query() for each fingerprint, leaving out exclude_urls[i] for fingerprints[i]"""
+        if exclude_urls is None:
+            exclude_urls = [None] * len(fingerprints)
+        return [self.query(fingerprint, max_distance, exclude_scan, exclude_url, limit)
+                for fingerprint, exclude_url in zip(fingerprints, exclude_urls)]
+
+    def stats(self) -> Dict[str, Any]:
+        pages, scans = self.conn.execute("SELECT COUNT(*), COUNT(DISTINCT scan_id) FROM pages").fetchone()
+        return {"pages": pages, "scans": scans}
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
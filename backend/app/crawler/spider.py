@@ -1,408 +1,595 @@
-import asyncio
-from urllib.parse import urljoin, urlparse
-from typing import Dict, List, Set, Any, Optional
-import time
-from bs4 import BeautifulSoup
-import httpx
-import hashlib
-import re
-
-# Try to import Playwright, but make it optional
-try:
-    from playwright.async_api import async_playwright, Browser, Page
-    PLAYWRIGHT_AVAILABLE = True
-except ImportError:
-    PLAYWRIGHT_AVAILABLE = False
-    Browser = None
-    Page = None
-    async_playwright = None
-
-
-class WebsiteCrawler:
-    def __init__(self, max_pages: int = 100, include_external: bool = False):
-        self.max_pages = max_pages
-        self.include_external = include_external
-        self.visited: Set[str] = set()
-        self.pages: List[Dict[str, Any]] = []
-        self.all_links: Set[str] = set()
-        self.all_images: List[Dict[str, Any]] = []
-        self.base_domain: Optional[str] = None
-        self.browser: Optional[Browser] = None
-        self.url_to_page: Dict[str, Dict[str, Any]] = {}  # Map URL to page data
-        self.backlinks: Dict[str, List[Dict[str, Any]]] = {}  # Map URL to pages that link to it
-        self.broken_links: List[Dict[str, Any]] = []  # List of broken links found
-        
-    async def crawl(self, start_url: str) -> Dict[str, Any]:
-        """Main crawl method"""
-        try:
-            parsed = urlparse(start_url)
-            if not parsed.scheme or not parsed.netloc:
-                raise ValueError(f"Invalid URL: {start_url}")
-            self.base_domain = f"{parsed.scheme}://{parsed.netloc}"
-        except Exception as e:
-            print(f"Error parsing URL {start_url}: {e}")
-            raise
-        
-        # Use HTTP-only mode (Playwright has issues on Windows/Python 3.13)
-        # For most websites, HTTP-only works fine
-        print("Using HTTP-only crawling mode (no JavaScript rendering)")
-        self.browser = None
-        
-        try:
-            await self._crawl_recursive(start_url, depth=0, max_depth=10)
-        except Exception as e:
-            error_msg = str(e) if str(e) else f"{type(e).__name__} occurred during crawling"
-            print(f"Error during crawling: {error_msg}")
-            print(f"Error type: {type(e).__name__}")
-            import traceback
-            traceback.print_exc()
-            # Re-raise with a proper message if empty
-            if not str(e):
-                raise Exception(f"Crawl failed: {type(e).__name__} occurred. Check traceback for details.")
-            raise
-        
-        # Calculate stats
-        stats = self._calculate_stats()
-        
-        # Calculate link statistics
-        all_internal_links = []
-        all_external_links = []
-        untitled_links = []
-        
-        for page in self.pages:
-            for link in page.get("all_links", []):
-                if link.get("internal"):
-                    all_internal_links.append(link)
-                else:
-                    all_external_links.append(link)
-                if link.get("is_untitled"):
-                    untitled_links.append(link)
-        
-        return {
-            "pages": self.pages,
-            "links": list(self.all_links),
-            "images": self.all_images,
-            "stats": stats,
-            "link_analysis": {
-                "total_internal_links": len(all_internal_links),
-                "total_external_links": len(all_external_links),
-                "untitled_links": untitled_links,
-                "broken_links": self.broken_links,
-                "internal_links_detailed": all_internal_links,
-                "external_links_detailed": all_external_links
-            },
-            "backlinks_map": {url: links for url, links in self.backlinks.items() if links}
-        }
-    
-    async def _crawl_recursive(self, url: str, depth: int, max_depth: int):
-        """Recursively crawl pages"""
-        if len(self.visited) >= self.max_pages or depth > max_depth:
-            return
-        
-        # Increased max_depth to support deeper crawling
-        if max_depth < 15:
-            max_depth = 15
-        
-        # Normalize URL
-        normalized_url = self._normalize_url(url)
-        if normalized_url in self.visited:
-            return
-        
-        self.visited.add(normalized_url)
-        
-        try:
-            page_data = await self._fetch_page(normalized_url, depth)
-            if page_data:
-                page_data["crawl_depth"] = depth
-                self.pages.append(page_data)
-                self.url_to_page[normalized_url] = page_data
-                
-                # Extract and follow internal links
-                internal_links = page_data.get("internal_links", [])
-                for link in internal_links[:20]:  # Increased limit
-                    if len(self.visited) < self.max_pages:
-                        await self._crawl_recursive(link, depth + 1, max_depth)
-        except Exception as e:
-            print(f"Error crawling {url}: {e}")
-    
-    async def _fetch_page(self, url: str, depth: int = 0) -> Optional[Dict[str, Any]]:
-        """Fetch and parse a single page"""
-        start_time = time.time()
-        
-        # Try with Playwright first (for JS-rendered pages) - but only if browser is available
-        if self.browser:
-            try:
-                page_data = await self._fetch_with_playwright(url)
-                if page_data:
-                    load_time = time.time() - start_time
-                    page_data["load_time"] = load_time
-                    return page_data
-            except Exception as e:
-                # Silently fall through to HTTP request
-                pass
-        
-        # Fallback to HTTP request (always used if Playwright unavailable)
-        try:
-            async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as client:
-                response = await client.get(url)
-                if response.status_code < 400:  # Accept 2xx and 3xx status codes
-                    load_time = time.time() - start_time
-                    page_data = self._parse_html(url, response.text, response.status_code)
-                    page_data["load_time"] = load_time
-                    return page_data
-                else:
-                    # Still parse error pages to get basic info
-                    load_time = time.time() - start_time
-                    page_data = self._parse_html(url, response.text, response.status_code)
-                    page_data["load_time"] = load_time
-                    return page_data
-        except Exception as e:
-            print(f"HTTP fetch failed for {url}: {e}")
-            return None
-    
-    async def _fetch_with_playwright(self, url: str) -> Optional[Dict[str, Any]]:
-        """Fetch page using Playwright for JS rendering"""
-        if not self.browser:
-            return None
-        
-        # Check if browser is still open
-        try:
-            if self.browser and hasattr(self.browser, 'is_connected'):
-                if not self.browser.is_connected():
-                    return None
-        except:
-            return None
-        
-        context = None
-        page = None
-        try:
-            context = await self.browser.new_context()
-            page = await context.new_page()
-            
-            response = await page.goto(url, wait_until="networkidle", timeout=30000)
-            if not response:
-                return None
-            
-            status_code = response.status
-            html = await page.content()
-            
-            # Wait a bit for any lazy-loaded content
-            await asyncio.sleep(1)
-            
-            page_data = self._parse_html(url, html, status_code)
-            return page_data
-            
-        except Exception as e:
-            error_msg = str(e) if str(e) else f"{type(e).__name__}"
-            # Don't print if browser was closed (expected during shutdown)
-            if "closed" not in error_msg.lower() and "disconnected" not in error_msg.lower():
-                print(f"Playwright error for {url}: {error_msg}")
-            return None
-        finally:
-            if page:
-                try:
-                    await page.close()
-                except:
-                    pass
-            if context:
-                try:
-                    await context.close()
-                except:
-                    pass
-    
-    def _parse_html(self, url: str, html: str, status_code: int) -> Dict[str, Any]:
-        """Parse HTML and extract data"""
-        try:
-            soup = BeautifulSoup(html, 'lxml')
-        except Exception as e:
-            print(f"Error parsing HTML for {url}: {e}")
-            # Fallback to html.parser if lxml fails
-            soup = BeautifulSoup(html, 'html.parser')
-        
-        # Basic metadata
-        title = soup.find('title')
-        title_text = title.get_text(strip=True) if title else ""
-        
-        meta_desc = soup.find('meta', attrs={'name': 'description'})
-        meta_desc_text = meta_desc.get('content', '') if meta_desc else ""
-        
-        canonical = soup.find('link', attrs={'rel': 'canonical'})
-        canonical_url = canonical.get('href', '') if canonical else ""
-        if canonical_url and not canonical_url.startswith('http'):
-            canonical_url = urljoin(url, canonical_url)
-        
-        # Headings
-        h1_tags = [h.get_text(strip=True) for h in soup.find_all('h1')]
-        h2_tags = [h.get_text(strip=True) for h in soup.find_all('h2')]
-        
-        # Content extraction
-        # Remove script and style elements
-        for script in soup(["script", "style", "nav", "footer", "header"]):
-            script.decompose()
-        
-        text_content = soup.get_text(separator=' ', strip=True)
-        word_count = len(text_content.split())
-        
-        # Links - Detailed collection
-        all_links = []
-        internal_links = []
-        external_links = []
-        broken_links = []
-        
-        for link in soup.find_all('a', href=True):
-            href = link.get('href')
-            link_text = link.get_text(strip=True)
-            link_title = link.get('title', '')
-            absolute_url = urljoin(url, href)
-            
-            parsed_link = urlparse(absolute_url)
-            is_internal = parsed_link.netloc == urlparse(self.base_domain).netloc or not parsed_link.netloc
-            
-            # Check if link has no text (untitled)
-            is_untitled = not link_text or link_text.strip() == ""
-            
-            link_data = {
-                "url": absolute_url,
-                "href": href,
-                "anchor_text": link_text,
-                "title": link_title,
-                "is_untitled": is_untitled,
-                "internal": is_internal,
-                "source_page": url,
-                "location": self._get_element_location(link)  # Line number approximation
-            }
-            all_links.append(link_data)
-            self.all_links.add(absolute_url)
-            
-            if is_internal:
-                normalized = self._normalize_url(absolute_url)
-                if normalized.startswith(self.base_domain):
-                    if normalized not in self.visited:
-                        internal_links.append(normalized)
-                    # Track backlink for ALL internal pages (visited or not)
-                    if normalized not in self.backlinks:
-                        self.backlinks[normalized] = []
-                    self.backlinks[normalized].append({
-                        "from_url": url,
-                        "anchor_text": link_text,
-                        "title": link_title
-                    })
-            else:
-                external_links.append(absolute_url)
-            
-            # Check for broken links (empty href, javascript:, mailto:, etc.)
-            if not href or href.startswith(('javascript:', 'mailto:', 'tel:', '#')):
-                if href and href.startswith('#'):
-                    # Anchor link - check if target exists on page
-                    target_id = href[1:]
-                    if not soup.find(id=target_id) and not soup.find(attrs={'name': target_id}):
-                        broken_links.append({
-                            **link_data,
-                            "issue": "Broken anchor link",
-                            "reason": f"Target '{target_id}' not found on page"
-                        })
-                elif not href:
-                    broken_links.append({
-                        **link_data,
-                        "issue": "Empty href",
-                        "reason": "Link has no href attribute"
-                    })
-        
-        # Store broken links
-        for broken in broken_links:
-            self.broken_links.append(broken)
-        
-        # Images
-        images = []
-        for img in soup.find_all('img'):
-            img_src = img.get('src') or img.get('data-src') or img.get('data-lazy-src')
-            if img_src:
-                img_url = urljoin(url, img_src)
-                alt_text = img.get('alt', '')
-                
-                img_data = {
-                    "url": img_url,
-                    "alt": alt_text,
-                    "page_url": url
-                }
-                images.append(img_data)
-                self.all_images.append(img_data)
-        
-        # Content hash for duplicate detection
-        content_hash = hashlib.md5(text_content.encode()).hexdigest()
-        
-        return {
-            "url": url,
-            "status_code": status_code,
-            "title": title_text,
-            "meta_description": meta_desc_text,
-            "canonical": canonical_url,
-            "h1": h1_tags,
-            "h2": h2_tags[:20],  # Increased limit
-            "content": text_content[:10000],  # Increased content length
-            "word_count": word_count,
-            "content_hash": content_hash,
-            "internal_links": list(set(internal_links)),
-            "external_links": external_links[:50],  # Increased limit
-            "images": images,
-            "all_links": all_links,  # Keep all links for detailed analysis
-            "internal_links_detailed": [l for l in all_links if l["internal"]],
-            "external_links_detailed": [l for l in all_links if not l["internal"]],
-            "broken_links_on_page": broken_links,
-            "backlinks_count": len(self.backlinks.get(url, [])),
-            "backlinks": self.backlinks.get(url, [])
-        }
-    
-    def _normalize_url(self, url: str) -> str:
-        """Normalize URL for comparison"""
-        parsed = urlparse(url)
-        # Remove fragment and trailing slash
-        normalized = f"{parsed.scheme}://{parsed.netloc}{parsed.path.rstrip('/')}"
-        if parsed.query:
-            normalized += f"?{parsed.query}"
-        return normalized
-    
-    def _get_element_location(self, element) -> str:
-        """Get approximate location of element in HTML"""
-        try:
-            # Try to get line number from BeautifulSoup
-            if hasattr(element, 'sourceline'):
-                return f"Line {element.sourceline}"
-            # Fallback: get parent tag info
-            parent = element.parent
-            if parent:
-                return f"In <{parent.name}> tag"
-            return "Unknown location"
-        except:
-            return "Unknown location"
-    
-    def _calculate_stats(self) -> Dict[str, Any]:
-        """Calculate crawl statistics"""
-        total_pages = len(self.pages)
-        if total_pages == 0:
-            return {}
-        
-        total_words = sum(p.get("word_count", 0) for p in self.pages)
-        avg_load_time = sum(p.get("load_time", 0) for p in self.pages) / total_pages
-        pages_with_title = sum(1 for p in self.pages if p.get("title"))
-        pages_with_meta = sum(1 for p in self.pages if p.get("meta_description"))
-        total_images = len(self.all_images)
-        total_links = len(self.all_links)
-        
-        status_codes = {}
-        for page in self.pages:
-            code = page.get("status_code", 0)
-            status_codes[code] = status_codes.get(code, 0) + 1
-        
-        return {
-            "total_pages": total_pages,
-            "total_words": total_words,
-            "avg_word_count": total_words / total_pages if total_pages > 0 else 0,
-            "avg_load_time": round(avg_load_time, 2),
-            "pages_with_title": pages_with_title,
-            "pages_with_meta": pages_with_meta,
-            "total_images": total_images,
-            "total_links": total_links,
-            "status_codes": status_codes
-        }
-
+import asyncio
+from urllib.parse import urljoin, urlparse
+from typing import AsyncIterator, Dict, List, Set, Any, Optional, Tuple
+import sys
+import time
+import httpx
+import re
+
+from app.crawler.httpcache import CacheEntry, HttpCache
+from app.crawler.incremental import PreviousScan, fetch_sitemap_lastmod
+from app.crawler.linkgraph import LinkGraph
+from app.crawler.blocks import BlockIndex
+from app.crawler.pagetable import PageTable
+from app.crawler.parsing import ParserPool
+from app.crawler.records import PageRecord, LinkRecord, ImageRecord
+from app.crawler.render import RenderDecider, RenderPool, PLAYWRIGHT_AVAILABLE
+from app.crawler.scheduler import HostScheduler
+from app.crawler.seen import SeenStore, create_seen_store
+from app.crawler.state import CrawlStateStore
+from app.crawler.urlnorm import UrlNormalizer
+
+# HTTP/2 multiplexing needs the optional h2 package (httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class WebsiteCrawler:
+    def __init__(self, max_pages: int = 100, include_external: bool = False,
+                 concurrency: int = 10, max_depth: int = 15,
+                 max_connections: int = 100, max_keepalive_connections: int = 20,
+                 keepalive_expiry: float = 30.0, http2: bool = True,
+                 scheduler: Optional[HostScheduler] = None, parse_workers: Optional[int] = None,
+                 normalizer: Optional[UrlNormalizer] = None, seen_backend: str = "memory",
+                 state: Optional[CrawlStateStore] = None, render_mode: str = "off",
+                 render_pool_size: int = 4, render_decider: Optional[RenderDecider] = None,
+                 http_cache: Optional[HttpCache] = None, previous: Optional[PreviousScan] = None):
+        self.max_pages = max_pages
+        self.include_external = include_external
+        self.concurrency = max(1, concurrency)  # Number of frontier workers
+        self.max_depth = max_depth
+        self.frontier: Optional[asyncio.Queue] = None  # (url, depth) pairs, FIFO for breadth-first order
+        # Connection pool shared by every fetch in a crawl
+        self.pool_limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.client: Optional[httpx.AsyncClient] = None
+        # Per-host politeness between the frontier and the network
+        self.scheduler = scheduler or HostScheduler()
+        # Canonical form used for every visited/frontier/backlink URL
+        self.normalizer = normalizer or UrlNormalizer()
+        # HTML parsing runs in worker processes so the event loop never blocks
+        self.parser = ParserPool(workers=parse_workers, normalizer=self.normalizer)
+        # Seen-URL stores: 'memory' (exact set), 'bloom' or 'disk' keep memory
+        # flat on very large crawls
+        self.visited: SeenStore = create_seen_store(seen_backend)
+        self.pages: List[PageRecord] = []
+        self.all_links: SeenStore = create_seen_store(seen_backend)
+        self.all_images: List[ImageRecord] = []
+        self.base_domain: Optional[str] = None
+        # JS rendering: "off" (HTTP only), "auto" (HTTP first, render URL templates
+        # that turn out to be JS shells) or "always" (render every page, HTTP as fallback)
+        self.render_mode = render_mode
+        self.render_pool_size = render_pool_size
+        self.render_pool: Optional[RenderPool] = None
+        self.render_decider = render_decider or RenderDecider()
+        # Pages fetched and fetch+parse seconds per path, for throughput stats
+        self.fetch_stats: Dict[str, Dict[str, float]] = {
+            "http": {"pages": 0, "seconds": 0.0},
+            "render": {"pages": 0, "seconds": 0.0}
+        }
+        self.crawl_seconds = 0.0
+        self.started_at: Optional[float] = None  # Wall-clock crawl start, what later incremental scans compare lastmod to
+        self.url_to_page: Dict[str, PageRecord] = {}  # Map URL to page data
+        self.link_graph = LinkGraph()  # Internal links as int ids; backlinks are its in-links
+        self.page_table = PageTable()  # Columnar copy of the pages for the vectorized SEO audit
+        self.block_index = BlockIndex()  # Text block -> pages, for boilerplate removal and shared paragraphs
+        self.broken_links: List[LinkRecord] = []  # List of broken links found
+        # Conditional-request cache shared across scans of the same sites
+        self.http_cache = http_cache
+        # Earlier scan of the site to re-crawl incrementally against
+        self.previous = previous
+        # Durable frontier/visited/page store for pause, resume and crash recovery
+        self.state = state
+        self._unpaused = asyncio.Event()
+        self._unpaused.set()
+        self._output: Optional[asyncio.Queue] = None  # Pages waiting for the iter_crawl consumer
+        
+    @property
+    def paused(self) -> bool:
+        return not self._unpaused.is_set()
+    
+    def pause(self):
+        """Stop taking new URLs off the frontier (fetches in flight finish)"""
+        self._unpaused.clear()
+        if self.state:
+            self.state.flush()
+    
+    def resume(self):
+        """Continue a paused crawl"""
+        self._unpaused.set()
+    
+    async def crawl(self, start_url: str) -> Dict[str, Any]:
+        """Main crawl method"""
+        async for _ in self.iter_crawl(start_url):
+            pass
+        return self.build_results()
+    
+    async def iter_crawl(self, start_url: str, buffer_size: int = 64) -> AsyncIterator[PageRecord]:
+        """Crawl start_url, yielding each page record as soon as it is parsed
+        
+        At most buffer_size pages wait for the consumer; beyond that the
+        frontier workers block, so a slow consumer slows the crawl down
+        instead of buffering the whole site. Backlink counts are only final
+        in the results built once the generator is exhausted (see crawl()).
+        Stopping early (break, or aclose()) cancels the crawl.
+        """
+        try:
+            parsed = urlparse(start_url)
+            if not parsed.scheme or not parsed.netloc:
+                raise ValueError(f"Invalid URL: {start_url}")
+            self.base_domain = self.normalizer.origin(start_url)
+        except Exception as e:
+            print(f"Error parsing URL {start_url}: {e}")
+            raise
+        
+        # HTTP-only unless rendering was requested (Playwright has issues on
+        # Windows/Python 3.13, so failing to start it falls back to HTTP)
+        self.render_pool = None
+        if self.render_mode != "off" and PLAYWRIGHT_AVAILABLE:
+            render_pool = RenderPool(size=self.render_pool_size)
+            try:
+                await render_pool.start()
+                self.render_pool = render_pool
+                print(f"Using Playwright rendering ({self.render_mode}) with {self.render_pool_size} pooled pages")
+            except Exception as e:
+                print(f"Playwright unavailable ({e}), falling back to HTTP-only crawling")
+        if self.render_pool is None:
+            print("Using HTTP-only crawling mode (no JavaScript rendering)")
+        
+        self.client = self._create_client()
+        self.parser.start()
+        self._output = asyncio.Queue(maxsize=max(1, buffer_size))
+        crawl_start = time.monotonic()
+        self.started_at = time.time()
+        frontier_task = asyncio.create_task(self._crawl_frontier(start_url))
+        try:
+            while True:
+                next_page = asyncio.ensure_future(self._output.get())
+                done, _ = await asyncio.wait({next_page, frontier_task}, return_when=asyncio.FIRST_COMPLETED)
+                if next_page in done:
+                    yield next_page.result()
+                    continue
+                next_page.cancel()
+                # Frontier drained (or failed): hand over what is still buffered
+                while not self._output.empty():
+                    yield self._output.get_nowait()
+                frontier_task.result()
+                break
+        except Exception as e:
+            error_msg = str(e) if str(e) else f"{type(e).__name__} occurred during crawling"
+            print(f"Error during crawling: {error_msg}")
+            print(f"Error type: {type(e).__name__}")
+            import traceback
+            traceback.print_exc()
+            # Re-raise with a proper message if empty
+            if not str(e):
+                raise Exception(f"Crawl failed: {type(e).__name__} occurred. Check traceback for details.")
+            raise
+        finally:
+            if not frontier_task.done():
+                frontier_task.cancel()
+                await asyncio.gather(frontier_task, return_exceptions=True)
+            self._output = None
+            self.crawl_seconds = time.monotonic() - crawl_start
+            if self.state:
+                self.state.flush()
+            await self.client.aclose()
+            self.client = None
+            if self.render_pool:
+                await self.render_pool.close()
+            self.parser.shutdown()
+            self.visited.close()
+            self.all_links.close()
+    
+    def build_results(self) -> Dict[str, Any]:
+        """Assemble crawl results from the page records"""
+        # Pages finish in arbitrary order across workers, so backlink counts
+        # are only final once the whole frontier has been drained
+        in_degree = self.link_graph.in_degree()
+        for page in self.pages:
+            url_id = self.link_graph.urls.lookup(page.url)
+            page.backlinks_count = int(in_degree[url_id]) if url_id is not None else 0
+        
+        # Calculate stats
+        stats = self._calculate_stats()
+        
+        # Calculate link statistics (lists share the page's link records)
+        all_internal_links = []
+        all_external_links = []
+        untitled_links = []
+        
+        for page in self.pages:
+            for link in page.links:
+                if link.internal:
+                    all_internal_links.append(link)
+                else:
+                    all_external_links.append(link)
+                if link.is_untitled:
+                    untitled_links.append(link)
+        
+        return {
+            "pages": self.pages,
+            # Rebuilt from the page records, since seen stores can't be listed
+            "links": list(dict.fromkeys(link.url for page in self.pages for link in page.links)),
+            "images": self.all_images,
+            "stats": stats,
+            "link_analysis": {
+                "total_internal_links": len(all_internal_links),
+                "total_external_links": len(all_external_links),
+                "untitled_links": untitled_links,
+                "broken_links": self.broken_links,
+                "internal_links_detailed": all_internal_links,
+                "external_links_detailed": all_external_links
+            },
+            "link_graph": self.link_graph,
+            "page_table": self.page_table,
+            "block_index": self.block_index,
+            "host_stats": self.scheduler.snapshot(),
+            "fetch_stats": self._fetch_stats(),
+            "cache_stats": self.http_cache.stats() if self.http_cache else None,
+            "incremental": self.previous.stats(self.url_to_page) if self.previous else None,
+            "crawl_started_at": self.started_at
+        }
+    
+    def _create_client(self) -> httpx.AsyncClient:
+        """Create the pooled HTTP client used for every page in a crawl"""
+        return httpx.AsyncClient(
+            timeout=30.0,
+            follow_redirects=True,
+            limits=self.pool_limits,
+            http2=self.http2
+        )
+    
+    async def _crawl_frontier(self, start_url: str):
+        """Crawl breadth-first from start_url using a bounded pool of workers"""
+        self.frontier = asyncio.Queue()
+        if self.previous:
+            self.previous.lastmod = await fetch_sitemap_lastmod(self._scheduled_get, self.base_domain, self.normalizer)
+        if self.state and self.state.has_progress():
+            await self._restore_state()
+        else:
+            self._enqueue(start_url, 0)
+            if self.previous:
+                # Revisit every known URL, not just those still linked from the start page
+                for page in self.previous.seeds():
+                    self._enqueue(page.url, page.crawl_depth or 0)
+        
+        workers = [asyncio.create_task(self._frontier_worker()) for _ in range(self.concurrency)]
+        try:
+            await self.frontier.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+    
+    async def _frontier_worker(self):
+        """Pull URLs off the frontier until cancelled"""
+        while True:
+            url, depth, seq = await self.frontier.get()
+            try:
+                await self._unpaused.wait()
+                await self._crawl_url(url, depth)
+                if self.state:
+                    self.state.done(seq)
+                    self.state.maybe_flush()
+            finally:
+                self.frontier.task_done()
+    
+    def _enqueue(self, url: str, depth: int):
+        """Add a URL to the frontier (and to the durable queue, if any)"""
+        seq = self.state.enqueue(url, depth) if self.state else None
+        self.frontier.put_nowait((url, depth, seq))
+    
+    async def _restore_state(self):
+        """Rebuild visited URLs, page records and the frontier from the last checkpoint"""
+        for url in self.state.visited_urls():
+            self.visited.add(url)
+        for page in self.state.page_records():
+            # Re-ingesting rebuilds the link graph, broken links and images;
+            # keep the unvisited-at-parse-time links the page was saved with
+            internal_links = page.internal_links
+            self._ingest_page(page)
+            page.internal_links = internal_links
+            await self._emit(page)
+        queued = self.state.queued()
+        for seq, url, depth in queued:
+            self.frontier.put_nowait((url, depth, seq))
+        print(f"Resumed crawl: {len(self.pages)} pages restored, {len(queued)} URLs queued")
+    
+    async def _crawl_url(self, url: str, depth: int):
+        """Fetch a single frontier URL and enqueue its internal links"""
+        if depth > self.max_depth:
+            return
+        
+        # Normalize URL
+        normalized_url = self._normalize_url(url)
+        
+        # Check and reserve with no await in between, so the visited set and
+        # the max_pages budget stay consistent across concurrent workers
+        if normalized_url in self.visited or len(self.visited) >= self.max_pages:
+            return
+        self.visited.add(normalized_url)
+        
+        try:
+            page_data = self.previous.reuse_unfetched(normalized_url) if self.previous else None
+            if page_data:
+                page_data = self._ingest_page(page_data)
+            else:
+                page_data = await self._fetch_page(normalized_url, depth)
+            # httpx can surface a cancel mid-request as an ordinary error that
+            # _fetch_page swallows; don't record that as a finished URL
+            if asyncio.current_task().cancelling():
+                raise asyncio.CancelledError
+            if page_data:
+                page_data.crawl_depth = depth
+            if self.state:
+                self.state.record_visit(normalized_url, page_data)
+            if page_data:
+                await self._emit(page_data)
+                
+                if depth >= self.max_depth:
+                    return
+                
+                # Enqueue internal links for the next breadth-first level
+                for link in page_data.internal_links[:20]:
+                    if len(self.visited) >= self.max_pages:
+                        break
+                    if link not in self.visited:
+                        self._enqueue(link, depth + 1)
+        except Exception as e:
+            print(f"Error crawling {url}: {e}")
+    
+    async def _fetch_page(self, url: str, depth: int = 0) -> Optional[PageRecord]:
+        """Fetch and parse a single page"""
+        start_time = time.time()
+        
+        # Render first when every page is rendered, or when url's template is
+        # already known to be a JS shell - but only if the render pool is running
+        if self.render_pool and (
+            self.render_mode == "always" or self.render_decider.decision(url) == RenderDecider.RENDER
+        ):
+            try:
+                page_data = await self._fetch_with_playwright(url)
+                if page_data:
+                    load_time = time.time() - start_time
+                    page_data.load_time = load_time
+                    self._record_fetch("render", load_time)
+                    return page_data
+            except Exception as e:
+                # Silently fall through to HTTP request
+                pass
+        
+        # HTTP request (always used if Playwright unavailable); error pages are
+        # still parsed to get basic info
+        try:
+            response, page_data = await self._fetch_http(url)
+            load_time = time.time() - start_time
+            html = response.text
+            if page_data is None:
+                page_data = await self.parser.parse(url, html, response.status_code, self.base_domain)
+                if self.http_cache:
+                    # Before ingesting, which rewrites the record's link lists
+                    self.http_cache.store_record(url, page_data, self.base_domain)
+            path = "http"
+            if (self.render_pool and self.render_mode == "auto" and response.status_code < 400
+                    and self.render_decider.needs_probe(url, html, page_data.word_count)):
+                rendered = await self._probe_render(url, page_data)
+                if rendered:
+                    page_data, path = rendered, "render"
+                    load_time = time.time() - start_time
+            page_data = self._ingest_page(self._reuse_previous(page_data))
+            page_data.load_time = load_time
+            self._record_fetch(path, load_time)
+            return page_data
+        except Exception as e:
+            print(f"HTTP fetch failed for {url}: {e}")
+            return None
+    
+    async def _probe_render(self, url: str, http_page: PageRecord) -> Optional[PageRecord]:
+        """Render a suspected JS shell and settle its URL template
+
+        Returns the rendered page when it beats the HTTP one, else None.
+        """
+        rendered = await self._render(url)
+        rendered_page = None
+        if rendered:
+            status_code, html = rendered
+            rendered_page = await self.parser.parse(url, html, status_code, self.base_domain)
+        rendered_words = rendered_page.word_count if rendered_page else None
+        if self.render_decider.record_probe(url, http_page.word_count, rendered_words):
+            print(f"Rendering {self.render_decider.template(url)} pages: "
+                  f"{http_page.word_count} words over HTTP, {rendered_words} rendered")
+            return rendered_page
+        return None
+    
+    async def _fetch_http(self, url: str) -> Tuple[httpx.Response, Optional[PageRecord]]:
+        """GET url through the HTTP cache when one is configured
+
+        Fresh entries are served without a request and stale ones are
+        revalidated with If-None-Match / If-Modified-Since. On a cache hit
+        or 304 the previously parsed record is returned too (None when
+        the body still has to be parsed).
+        """
+        if not self.http_cache:
+            return await self._scheduled_get(url), None
+        
+        entry = self.http_cache.lookup(url)
+        body = self.http_cache.read_body(entry) if entry else None
+        if body is not None and entry.fresh:
+            self.http_cache.hit(entry, len(body))
+            return self._cached_response(entry, body), self.http_cache.read_record(entry, self.base_domain)
+        
+        response = await self._scheduled_get(url, entry.validators() if body is not None else None)
+        if body is not None and response.status_code == 304:
+            self.http_cache.refresh(entry, response.headers, len(body))
+            return self._cached_response(entry, body), self.http_cache.read_record(entry, self.base_domain)
+        
+        self.http_cache.miss()
+        self.http_cache.store(url, response.status_code, response.headers, response.content)
+        return response, None
+    
+    @staticmethod
+    def _cached_response(entry: CacheEntry, body: bytes) -> httpx.Response:
+        # Rebuilt as a response so text decoding matches a live fetch
+        headers = {"content-type": entry.headers["content-type"]} if "content-type" in entry.headers else None
+        return httpx.Response(entry.status_code, headers=headers, content=body)
+    
+    async def _scheduled_get(self, url: str, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        """GET url once the host scheduler admits it, then report the outcome back"""
+        host = urlparse(url).netloc
+        async with self.scheduler.request(host) as outcome:
+            try:
+                response = await self.client.get(url, headers=headers)
+            except httpx.TimeoutException:
+                outcome.timed_out = True
+                raise
+            outcome.status_code = response.status_code
+            return response
+    
+    async def _fetch_with_playwright(self, url: str) -> Optional[PageRecord]:
+        """Fetch page by rendering it on a pooled Playwright page"""
+        rendered = await self._render(url)
+        if not rendered:
+            return None
+        status_code, html = rendered
+        return await self._parse_html(url, html, status_code)
+    
+    async def _render(self, url: str) -> Optional[Tuple[int, str]]:
+        """Render url in the pool; returns (status_code, html) or None on failure"""
+        if not self.render_pool:
+            return None
+        
+        # Rendering counts against the host's politeness budget like any fetch
+        host = urlparse(url).netloc
+        async with self.scheduler.request(host) as outcome:
+            try:
+                rendered = await self.render_pool.render(url)
+                if rendered:
+                    outcome.status_code = rendered[0]
+                return rendered
+            except Exception as e:
+                error_msg = str(e) if str(e) else f"{type(e).__name__}"
+                # Don't print if browser was closed (expected during shutdown)
+                if "closed" not in error_msg.lower() and "disconnected" not in error_msg.lower():
+                    print(f"Playwright error for {url}: {error_msg}")
+                return None
+    
+    async def _parse_html(self, url: str, html: str, status_code: int) -> PageRecord:
+        """Parse HTML in the parser pool and record the result"""
+        page = await self.parser.parse(url, html, status_code, self.base_domain)
+        return self._ingest_page(self._reuse_previous(page))
+    
+    def _reuse_previous(self, page: PageRecord) -> PageRecord:
+        """Keep the previous scan's record for a page whose content hasn't changed"""
+        return self.previous.reuse_unchanged(page) if self.previous else page
+    
+    async def add_page(self, page: PageRecord):
+        """Add a page fetched outside this crawler (e.g. by a distributed worker)
+        
+        It gets the same bookkeeping as the crawler's own pages: link graph,
+        broken links, page table, block index and the iter_crawl output, with
+        internal_links computed against this crawl's visited URLs.
+        """
+        self.visited.add(page.url)
+        await self._emit(self._ingest_page(page))
+    
+    async def _emit(self, page: PageRecord):
+        """Add a finished page to the crawl and hand it to the iter_crawl consumer"""
+        self.pages.append(page)
+        self.page_table.append(page)
+        self.block_index.append(page)
+        self.url_to_page[page.url] = page
+        if self._output is not None:
+            await self._output.put(page)
+    
+    def _ingest_page(self, page: PageRecord) -> PageRecord:
+        """Feed a parsed page record into the crawl-wide link and backlink bookkeeping"""
+        # Records come back from worker processes as fresh objects, so intern
+        # URLs here to share one string across every page that mentions them
+        url = page.url = sys.intern(page.url)
+        
+        internal_links = []
+        for link in page.links:
+            link.intern()
+            self.all_links.add(link.url)
+            
+            if link.target:
+                if link.target not in self.visited:
+                    internal_links.append(link.target)
+                # Track backlink for ALL internal pages (visited or not)
+                self.link_graph.add_edge(url, link.target, link.anchor_text, link.title)
+            
+            # Store broken links
+            if link.issue:
+                self.broken_links.append(link)
+        
+        # Images
+        for image in page.images:
+            image.page_url = url
+            self.all_images.append(image)
+        
+        page.internal_links = list(set(internal_links))
+        return page
+    
+    def _record_fetch(self, path: str, seconds: float):
+        stats = self.fetch_stats[path]
+        stats["pages"] += 1
+        stats["seconds"] += seconds
+    
+    def _fetch_stats(self) -> Dict[str, Any]:
+        """Pages, mean latency and throughput for the HTTP and render paths"""
+        result = {}
+        for path, stats in self.fetch_stats.items():
+            pages = stats["pages"]
+            result[path] = {
+                "pages": pages,
+                "avg_seconds": round(stats["seconds"] / pages, 3) if pages else 0,
+                "pages_per_second": round(pages / self.crawl_seconds, 2) if self.crawl_seconds else 0
+            }
+        if self.render_pool:
+            result["render"].update(self.render_pool.stats())
+        if self.render_mode == "auto":
+            result["render_decisions"] = self.render_decider.stats()
+        return result
+    
+    def _normalize_url(self, url: str) -> str:
+        """Normalize URL for comparison"""
+        return self.normalizer.normalize(url)
+    
+    def _calculate_stats(self) -> Dict[str, Any]:
+        """Calculate crawl statistics"""
+        total_pages = len(self.pages)
+        if total_pages == 0:
+            return {}
+        
+        total_words = sum(p.get("word_count", 0) for p in self.pages)
+        avg_load_time = sum(p.get("load_time", 0) for p in self.pages) / total_pages
+        pages_with_title = sum(1 for p in self.pages if p.get("title"))
+        pages_with_meta = sum(1 for p in self.pages if p.get("meta_description"))
+        total_images = len(self.all_images)
+        total_links = len(self.all_links)
+        
+        status_codes = {}
+        for page in self.pages:
+            code = page.get("status_code", 0)
+            status_codes[code] = status_codes.get(code, 0) + 1
+        
+        return {
+            "total_pages": total_pages,
+            "total_words": total_words,
+            "avg_word_count": total_words / total_pages if total_pages > 0 else 0,
+            "avg_load_time": round(avg_load_time, 2),
+            "pages_with_title": pages_with_title,
+            "pages_with_meta": pages_with_meta,
+            "total_images": total_images,
+            "total_links": total_links,
+            "status_codes": status_codes
+        }
+
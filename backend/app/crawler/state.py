@@ -0,0 +1,138 @@
+import json
+import os
+import pickle
+import sqlite3
+import time
+import zlib
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.crawler.records import PageRecord
+
+# Bump when the tables, the meta keys or the pickled PageRecord layout
+# change; state written under another version is discarded, not resumed
+STATE_FORMAT_VERSION = 1
+
+
+class CrawlStateStore:
+    """Durable crawl state (frontier, visited URLs, page records) in SQLite
+
+    Runs in WAL mode and buffers writes, flushing them in one transaction
+    every flush_every operations or flush_interval seconds. A flush is the
+    checkpoint a crawl resumes from: queue rows are only deleted once the
+    URL's outcome is recorded, so anything in flight at a crash is simply
+    fetched again. A file from another STATE_FORMAT_VERSION is emptied
+    when opened.
+    """
+
+    def __init__(self, path: str, flush_every: int = 200, flush_interval: float = 5.0):
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS queue (seq INTEGER PRIMARY KEY, url TEXT, depth INTEGER);
+            CREATE TABLE IF NOT EXISTS visited (url TEXT PRIMARY KEY);
+            CREATE TABLE IF NOT EXISTS pages (url TEXT PRIMARY KEY, record BLOB);
+        """)
+        self.conn.commit()
+        self._check_format()
+        self._next_seq = (self.conn.execute("SELECT MAX(seq) FROM queue").fetchone()[0] or 0) + 1
+        self._queued: List[Tuple[int, str, int]] = []
+        self._visited: List[Tuple[str]] = []
+        self._pages: List[Tuple[str, bytes]] = []
+        self._done: List[Tuple[int]] = []
+        self._last_flush = time.monotonic()
+
+    # Metadata
+
+    def _check_format(self):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'format_version'").fetchone()
+        if row is not None and json.loads(row[0]) == STATE_FORMAT_VERSION:
+            return
+        if row is not None or self.conn.execute("SELECT EXISTS (SELECT 1 FROM meta)").fetchone()[0]:
+            print(f"Discarding crawl state in {self.path} (written by another version)")
+        with self.conn:
+            for table in ("meta", "queue", "visited", "pages"):
+                self.conn.execute(f"DELETE FROM {table}")
+            self.conn.execute("INSERT INTO meta (key, value) VALUES ('format_version', ?)",
+                              (json.dumps(STATE_FORMAT_VERSION),))
+
+    def set_meta(self, **values: Any):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            [(key, json.dumps(value)) for key, value in values.items()]
+        )
+        self.conn.commit()
+
+    def get_meta(self) -> Dict[str, Any]:
+        return {key: json.loads(value) for key, value in self.conn.execute("SELECT key, value FROM meta")}
+
+    # Buffered writes
+
+    def enqueue(self, url: str, depth: int) -> int:
+        """Record a frontier entry and return its sequence number"""
+        seq = self._next_seq
+        self._next_seq += 1
+        self._queued.append((seq, url, depth))
+        return seq
+
+    def record_visit(self, url: str, page: Optional[PageRecord]):
+        """Record a fetched URL and its page record (None when the fetch failed)"""
+        self._visited.append((url,))
+        if page is not None:
+            self._pages.append((url, zlib.compress(pickle.dumps(page, pickle.HIGHEST_PROTOCOL), 1)))
+
+    def done(self, seq: int):
+        """Mark a frontier entry as processed"""
+        self._done.append((seq,))
+
+    @property
+    def pending(self) -> int:
+        return len(self._queued) + len(self._visited) + len(self._done)
+
+    def maybe_flush(self):
+        if self.pending >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Write all buffered operations in a single transaction"""
+        with self.conn:
+            # Inserts before deletes, so an entry queued and finished within
+            # one batch leaves no row behind
+            self.conn.executemany("INSERT OR REPLACE INTO queue (seq, url, depth) VALUES (?, ?, ?)", self._queued)
+            self.conn.executemany("INSERT OR IGNORE INTO visited (url) VALUES (?)", self._visited)
+            self.conn.executemany("INSERT OR REPLACE INTO pages (url, record) VALUES (?, ?)", self._pages)
+            self.conn.executemany("DELETE FROM queue WHERE seq = ?", self._done)
+        self._queued, self._visited, self._pages, self._done = [], [], [], []
+        self._last_flush = time.monotonic()
+
+    # Recovery
+
+    def has_progress(self) -> bool:
+        return self.conn.execute("SELECT EXISTS (SELECT 1 FROM visited)").fetchone()[0] == 1
+
+    def queued(self) -> List[Tuple[int, str, int]]:
+        """Unfinished frontier entries as (seq, url, depth), in crawl order"""
+        return self.conn.execute("SELECT seq, url, depth FROM queue ORDER BY seq").fetchall()
+
+    def visited_urls(self) -> Iterator[str]:
+        for (url,) in self.conn.execute("SELECT url FROM visited"):
+            yield url
+
+    def page_records(self) -> Iterator[PageRecord]:
+        for (record,) in self.conn.execute("SELECT record FROM pages ORDER BY rowid"):
+            yield pickle.loads(zlib.decompress(record))
+
+    def close(self, remove: bool = False):
+        if self.conn is None:
+            return
+        self.flush()
+        self.conn.close()
+        self.conn = None
+        if remove:
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(self.path + suffix):
+                    os.remove(self.path + suffix)
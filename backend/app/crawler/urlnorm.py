@@ -0,0 +1,141 @@
+import re
+from fnmatch import fnmatchcase
+from functools import lru_cache
+from typing import Iterable, Tuple
+from urllib.parse import SplitResult, urlsplit, unquote
+
+# Tracking and session parameters that never change page content.
+# Entries are case-insensitive glob patterns matched against the key.
+DEFAULT_STRIP_PARAMS = (
+    "utm_*", "fbclid", "gclid", "dclid", "gbraid", "wbraid", "msclkid", "yclid",
+    "mc_cid", "mc_eid", "_ga", "_gl", "igshid", "srsltid",
+    "phpsessid", "jsessionid", "sessionid", "sid",
+)
+
+DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+_PERCENT_ESCAPE = re.compile(r"%([0-9A-Fa-f]{2})")
+_UNRESERVED = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~")
+# ;jsessionid=... style session ids embedded in the path
+_PATH_SESSION = re.compile(r";(?:jsessionid|phpsessid|sid)=[^/?#]*", re.IGNORECASE)
+
+
+def _normalize_escapes(component: str) -> str:
+    """Decode escapes of unreserved characters and uppercase the rest
+
+    Reserved characters such as %2F or %26 stay encoded, since decoding
+    them would change what the URL means.
+    """
+    def replace(match):
+        char = chr(int(match.group(1), 16))
+        return char if char in _UNRESERVED else "%" + match.group(1).upper()
+    return _PERCENT_ESCAPE.sub(replace, component)
+
+
+def _remove_dot_segments(path: str) -> str:
+    """Resolve '.' and '..' path segments (RFC 3986 section 5.2.4)"""
+    if "." not in path:
+        return path
+    output = []
+    for segment in path.split("/"):
+        if segment == "..":
+            if len(output) > 1:
+                output.pop()
+        elif segment != ".":
+            output.append(segment)
+    if path.endswith(("/.", "/..")):
+        output.append("")
+    return "/".join(output)
+
+
+class UrlNormalizer:
+    """Canonical URL normalizer with a bounded LRU cache
+
+    Lowercases scheme and host, drops default ports, fragments, path
+    session ids and denylisted query parameters, resolves dot segments,
+    decodes unreserved percent-escapes, sorts the query and strips the
+    trailing slash. Two URLs that normalize equal are fetched once.
+    """
+
+    def __init__(self, strip_params: Iterable[str] = DEFAULT_STRIP_PARAMS, sort_query: bool = True,
+                 strip_trailing_slash: bool = True, cache_size: int = 100_000):
+        self.strip_params = tuple(pattern.lower() for pattern in strip_params)
+        self.sort_query = sort_query
+        self.strip_trailing_slash = strip_trailing_slash
+        self.cache_size = cache_size
+        self._build_cache()
+
+    def _build_cache(self):
+        self.normalize = lru_cache(maxsize=self.cache_size)(self._normalize)
+
+    def __getstate__(self):
+        # The cache wrapper can't be pickled; worker processes build their own
+        state = self.__dict__.copy()
+        del state["normalize"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._build_cache()
+
+    def cache_info(self):
+        return self.normalize.cache_info()
+
+    def _split_origin(self, parsed: SplitResult) -> Tuple[str, str]:
+        """Lowercased scheme and [userinfo@]host[:port] with any default port dropped"""
+        scheme = parsed.scheme.lower()
+        if not parsed.netloc:
+            return scheme, ""
+        try:
+            port = parsed.port
+        except ValueError:
+            # Malformed port: leave the authority alone apart from case
+            return scheme, parsed.netloc.lower()
+        host = parsed.hostname or ""
+        if ":" in host:
+            host = f"[{host}]"  # IPv6 literal
+        if port is not None and str(port) != DEFAULT_PORTS.get(scheme):
+            host = f"{host}:{port}"
+        userinfo = parsed.netloc.rpartition("@")[0]
+        return scheme, f"{userinfo}@{host}" if userinfo else host
+
+    def origin(self, url: str) -> str:
+        """Normalized scheme://host[:port] of url"""
+        scheme, netloc = self._split_origin(urlsplit(url))
+        return f"{scheme}://{netloc}"
+
+    def netloc(self, url: str) -> str:
+        """Normalized host[:port] of url ('' for relative URLs)"""
+        return self._split_origin(urlsplit(url))[1]
+
+    def _is_stripped(self, key: str) -> bool:
+        key = unquote(key).lower()
+        return any(fnmatchcase(key, pattern) for pattern in self.strip_params)
+
+    def _normalize_query(self, query: str) -> str:
+        params = []
+        for param in query.split("&"):
+            if not param:
+                continue
+            if self._is_stripped(param.split("=", 1)[0]):
+                continue
+            params.append(_normalize_escapes(param))
+        if self.sort_query:
+            params.sort()
+        return "&".join(params)
+
+    def _normalize(self, url: str) -> str:
+        parsed = urlsplit(url.strip())
+        scheme, netloc = self._split_origin(parsed)
+
+        path = _PATH_SESSION.sub("", parsed.path)
+        path = _remove_dot_segments(_normalize_escapes(path))
+        if self.strip_trailing_slash:
+            path = path.rstrip("/")
+
+        # Remove fragment
+        normalized = f"{scheme}://{netloc}{path}"
+        query = self._normalize_query(parsed.query) if parsed.query else ""
+        if query:
+            normalized += f"?{query}"
+        return normalized
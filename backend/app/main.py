@@ -1,357 +1,604 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
-from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, HttpUrl
-from typing import Optional, Dict, Any
-import asyncio
-from datetime import datetime
-import uuid
-
-from app.crawler.spider import WebsiteCrawler
-from app.audit.seo_audit import SEOAuditor
-from app.analysis.keywords import KeywordAnalyzer
-from app.analysis.duplicates import DuplicateDetector
-from app.analysis.page_power import PagePowerAnalyzer
-from app.performance.pagespeed import PageSpeedAnalyzer
-
-app = FastAPI(title="Website Analysis Tool", version="1.0.0")
-
-# CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:3000", "http://127.0.0.1:3000"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# In-memory storage for scan results
-scan_results: Dict[str, Dict[str, Any]] = {}
-scan_status: Dict[str, str] = {}  # 'pending', 'processing', 'completed', 'error'
-
-
-class ScanRequest(BaseModel):
-    url: HttpUrl
-    max_pages: Optional[int] = 200  # Increased to 200
-    include_external: Optional[bool] = False
-
-
-class ScanResponse(BaseModel):
-    scan_id: str
-    status: str
-    message: str
-
-
-async def process_scan(scan_id: str, url: str, max_pages: int, include_external: bool):
-    """Background task to process the full scan"""
-    print(f"\n[PROCESS_SCAN] Starting scan {scan_id} for {url}")
-    try:
-        scan_status[scan_id] = "processing"
-        print(f"[PROCESS_SCAN] Status set to processing for {scan_id}")
-        
-        # Validate URL
-        if not url or not url.startswith(('http://', 'https://')):
-            raise ValueError(f"Invalid URL format: {url}. URL must start with http:// or https://")
-        
-        # Step 1: Crawl website
-        print(f"Starting crawl for {url} (max_pages: {max_pages})")
-        try:
-            crawler = WebsiteCrawler(max_pages=max_pages, include_external=include_external)
-            crawl_results = await crawler.crawl(url)
-            print(f"Crawl completed. Found {len(crawl_results.get('pages', []))} pages")
-        except Exception as e:
-            error_detail = str(e) if str(e) else f"{type(e).__name__} occurred"
-            print(f"[PROCESS_SCAN] Crawl failed: {error_detail}")
-            print(f"[PROCESS_SCAN] Error type: {type(e).__name__}")
-            print(f"[PROCESS_SCAN] Error repr: {repr(e)}")
-            import traceback
-            tb = traceback.format_exc()
-            print(f"[PROCESS_SCAN] Traceback:\n{tb}")
-            # Always raise with a message
-            if not error_detail or error_detail.strip() == "":
-                error_detail = f"Crawl failed with {type(e).__name__} exception"
-            raise Exception(f"Failed to crawl website: {error_detail}") from e
-        
-        # Check if we got any pages
-        if not crawl_results.get('pages'):
-            raise Exception("No pages were crawled. The website might be blocking crawlers, unreachable, or have no crawlable links.")
-        
-        # Step 2: SEO Audit
-        print("Running SEO audit...")
-        try:
-            auditor = SEOAuditor(crawl_results)
-            seo_audit = auditor.audit()
-        except Exception as e:
-            print(f"SEO audit failed: {e}")
-            seo_audit = {"score": 0, "issues": [], "warnings": [], "summary": {"total_issues": 0, "total_warnings": 0, "total_pages": 0}}
-        
-        # Step 3: Keyword Analysis
-        print("Analyzing keywords...")
-        try:
-            keyword_analyzer = KeywordAnalyzer(crawl_results)
-            keywords = keyword_analyzer.analyze()
-        except Exception as e:
-            print(f"Keyword analysis failed: {e}")
-            keywords = {"keywords": {"rake": [], "ngrams": {"unigrams": [], "bigrams": [], "trigrams": []}, "tfidf": []}, "keyword_clusters": [], "total_keywords": 0}
-        
-        # Step 4: Duplicate Detection
-        print("Detecting duplicates...")
-        try:
-            duplicate_detector = DuplicateDetector(crawl_results)
-            duplicates = duplicate_detector.detect()
-        except Exception as e:
-            print(f"Duplicate detection failed: {e}")
-            duplicates = {"duplicates": [], "total_duplicates": 0, "methods_used": []}
-        
-        # Step 5: Page Power Analysis
-        print("Analyzing page power...")
-        try:
-            page_power_analyzer = PagePowerAnalyzer(crawl_results)
-            page_power = page_power_analyzer.analyze()
-        except Exception as e:
-            print(f"Page power analysis failed: {e}")
-            page_power = {"page_power": {}, "top_pages": [], "average_power": 0}
-        
-        # Step 6: Performance Analysis (sample pages)
-        print("Analyzing performance...")
-        try:
-            pagespeed_analyzer = PageSpeedAnalyzer()
-            performance = await pagespeed_analyzer.analyze_sample(crawl_results, sample_size=5)
-        except Exception as e:
-            print(f"Performance analysis failed: {e}")
-            performance = {"error": str(e), "results": []}
-        
-        print("Analysis complete!")
-        
-        # Combine all results
-        result = {
-            "crawl_results": crawl_results,
-            "seo_audit": seo_audit,
-            "keywords": keywords,
-            "duplicates": duplicates,
-            "page_power": page_power,
-            "performance": performance,
-            "scan_id": scan_id,
-            "timestamp": datetime.now().isoformat()
-        }
-        
-        scan_results[scan_id] = result
-        scan_status[scan_id] = "completed"
-        
-    except Exception as e:
-        import traceback
-        import sys
-        error_trace = traceback.format_exc()
-        error_type = type(e).__name__
-        
-        # Try multiple ways to get error message
-        error_msg = ""
-        
-        # Method 1: Direct string conversion
-        try:
-            error_msg = str(e).strip()
-        except:
-            pass
-        
-        # Method 2: Get from exception args
-        if not error_msg and hasattr(e, 'args') and e.args:
-            try:
-                error_msg = str(e.args[0]).strip() if e.args[0] else ""
-            except:
-                pass
-        
-        # Method 3: Extract from traceback
-        if not error_msg:
-            traceback_lines = error_trace.split('\n')
-            for i, line in enumerate(traceback_lines):
-                # Look for exception type followed by message
-                if error_type in line and i + 1 < len(traceback_lines):
-                    next_line = traceback_lines[i + 1].strip()
-                    if next_line and not next_line.startswith('File'):
-                        error_msg = next_line
-                        break
-                # Look for common error patterns
-                if any(pattern in line for pattern in ['Error:', 'Exception:', 'Failed', 'cannot', 'unable', 'invalid']):
-                    if line.strip() and not line.strip().startswith('File'):
-                        error_msg = line.strip()
-                        break
-        
-        # Method 4: Use repr if available
-        if not error_msg:
-            try:
-                error_repr = repr(e)
-                if error_repr and error_repr != f"{error_type}()":
-                    error_msg = error_repr
-            except:
-                pass
-        
-        # Final fallback - construct meaningful message
-        if not error_msg or error_msg.strip() == "":
-            # Get the last few lines of traceback for context
-            traceback_lines = error_trace.split('\n')
-            last_lines = [l for l in traceback_lines[-10:] if l.strip() and not l.strip().startswith('File')]
-            context = last_lines[0] if last_lines else "Unknown location"
-            error_msg = f"{error_type} occurred: {context[:200]}"
-        
-        # Ensure we have something
-        if not error_msg or len(error_msg.strip()) == 0:
-            error_msg = f"An error of type {error_type} occurred during scan processing. Please check the traceback for details."
-        
-        print(f"\n{'=' * 80}")
-        print(f"ERROR processing scan {scan_id}")
-        print(f"Error Type: {error_type}")
-        print(f"Error Message: {error_msg}")
-        print(f"Error Repr: {repr(e)}")
-        print(f"{'=' * 80}")
-        print("Full Traceback:")
-        print(error_trace)
-        print(f"{'=' * 80}\n")
-        
-        # Store error - ALWAYS with a message
-        error_data = {
-            "error": error_msg,
-            "error_type": error_type,
-            "traceback": error_trace,
-            "scan_id": scan_id
-        }
-        
-        scan_status[scan_id] = "error"
-        scan_results[scan_id] = error_data
-        
-        # Verify storage
-        stored = scan_results.get(scan_id, {})
-        print(f"VERIFICATION: Stored error data for {scan_id}")
-        print(f"  - Has error key: {'error' in stored}")
-        print(f"  - Error value: '{stored.get('error', 'MISSING')}'")
-        print(f"  - Error value length: {len(stored.get('error', ''))}")
-        print(f"  - Full stored data keys: {list(stored.keys())}")
-
-
-async def safe_process_scan_wrapper(scan_id: str, url: str, max_pages: int, include_external: bool):
-    """Wrapper to ensure all errors are caught and stored"""
-    try:
-        await process_scan(scan_id, url, max_pages, include_external)
-    except Exception as outer_e:
-        # Final safety net
-        import traceback
-        error_trace = traceback.format_exc()
-        error_type = type(outer_e).__name__
-        error_msg = str(outer_e) if str(outer_e) else f"{error_type} occurred"
-        
-        if not error_msg or error_msg.strip() == "":
-            error_msg = f"An unexpected error occurred: {error_type}. Please check backend logs."
-        
-        print(f"\n[SAFETY NET] Unhandled exception in wrapper for {scan_id}")
-        print(f"Error: {error_msg}")
-        print(error_trace)
-        
-        scan_status[scan_id] = "error"
-        scan_results[scan_id] = {
-            "error": error_msg,
-            "error_type": error_type,
-            "traceback": error_trace,
-            "scan_id": scan_id
-        }
-
-@app.post("/api/scan", response_model=ScanResponse)
-async def start_scan(request: ScanRequest, background_tasks: BackgroundTasks):
-    """Start a new website scan"""
-    scan_id = str(uuid.uuid4())
-    scan_status[scan_id] = "pending"
-    scan_results[scan_id] = {}  # Initialize
-    
-    # Start background task with safety wrapper
-    background_tasks.add_task(
-        safe_process_scan_wrapper,
-        scan_id,
-        str(request.url),
-        request.max_pages,
-        request.include_external
-    )
-    
-    return ScanResponse(
-        scan_id=scan_id,
-        status="pending",
-        message="Scan started successfully"
-    )
-
-
-@app.get("/api/scan/{scan_id}/status")
-async def get_scan_status(scan_id: str):
-    """Get the status of a scan"""
-    if scan_id not in scan_status:
-        raise HTTPException(status_code=404, detail="Scan not found")
-    
-    return {
-        "scan_id": scan_id,
-        "status": scan_status[scan_id]
-    }
-
-
-@app.get("/api/scan/{scan_id}/results")
-async def get_scan_results(scan_id: str):
-    """Get the results of a completed scan"""
-    if scan_id not in scan_status:
-        raise HTTPException(status_code=404, detail="Scan not found")
-    
-    current_status = scan_status[scan_id]
-    
-    # If error, return error details immediately
-    if current_status == "error":
-        error_data = scan_results.get(scan_id, {})
-        
-        # Debug logging
-        print(f"\n[DEBUG] get_scan_results for {scan_id}")
-        print(f"  - Status: {current_status}")
-        print(f"  - Has results: {scan_id in scan_results}")
-        print(f"  - Error data keys: {list(error_data.keys()) if error_data else 'None'}")
-        print(f"  - Error value: '{error_data.get('error', 'MISSING')}'")
-        
-        # Ensure we have valid error data
-        if not error_data:
-            error_data = {}
-        
-        # Ensure error message exists and is not empty
-        if "error" not in error_data or not error_data.get("error") or error_data.get("error").strip() == "":
-            error_type = error_data.get("error_type", "UnknownError")
-            error_data["error"] = f"An error occurred during the scan (Type: {error_type}). Check backend terminal logs for full details."
-            error_data["error_type"] = error_type
-            error_data["scan_id"] = scan_id
-            print(f"  - [FIXED] Set default error message: {error_data['error'][:100]}")
-        
-        print(f"  - Returning error: '{error_data.get('error', 'MISSING')[:100]}...'")
-        return error_data
-    
-    # If still processing, return 202
-    if current_status != "completed":
-        raise HTTPException(status_code=202, detail="Scan still in progress")
-    
-    # Return completed results
-    return scan_results.get(scan_id, {})
-
-
-@app.get("/api/health")
-async def health_check():
-    """Health check endpoint"""
-    return {"status": "healthy", "timestamp": datetime.now().isoformat()}
-
-
-@app.get("/api/debug/scan/{scan_id}")
-async def debug_scan(scan_id: str):
-    """Debug endpoint to see scan status and results"""
-    if scan_id not in scan_status:
-        raise HTTPException(status_code=404, detail="Scan not found")
-    
-    return {
-        "scan_id": scan_id,
-        "status": scan_status.get(scan_id, "not_found"),
-        "has_results": scan_id in scan_results,
-        "results_keys": list(scan_results.get(scan_id, {}).keys()) if scan_id in scan_results else [],
-        "error_data": scan_results.get(scan_id, {}) if scan_status.get(scan_id) == "error" else None,
-        "full_results": scan_results.get(scan_id, {})
-    }
-
-
-if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
-
+from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi.middleware.cors import CORSMiddleware
+from pydantic import BaseModel, HttpUrl
+from typing import Literal, Optional, Dict, Any
+import asyncio
+from datetime import datetime
+from urllib.parse import urlparse
+import os
+import time
+import uuid
+
+from app.crawler.spider import WebsiteCrawler
+from app.crawler.httpcache import HttpCache
+from app.crawler.incremental import PreviousScan
+from app.crawler.records import serialize_crawl_results
+from app.crawler.simhash import MAX_DISTANCE, SimHashIndex
+from app.crawler.state import CrawlStateStore
+from app.crawler.distributed import DistributedCrawl, get_redis
+from app.analysis.executor import AnalysisExecutor
+from app.performance.pagespeed import PageSpeedAnalyzer
+
+app = FastAPI(title="Website Analysis Tool", version="1.0.0")
+
+# CORS middleware
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["http://localhost:3000", "http://127.0.0.1:3000"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+# Worker processes used to parse HTML during a crawl (unset = crawler default)
+parse_workers = int(os.getenv("PARSE_WORKERS")) if os.getenv("PARSE_WORKERS") else None
+# Seen-URL store for crawls: 'memory', 'bloom' or 'disk' (for very large sites)
+seen_backend = os.getenv("SEEN_BACKEND", "memory")
+# Directory for durable crawl state (pause/resume and restart recovery); unset disables it
+crawl_state_dir = os.getenv("CRAWL_STATE_DIR")
+# Directory for the HTTP response cache reused across rescans; unset disables it
+http_cache_dir = os.getenv("HTTP_CACHE_DIR")
+http_cache_max_bytes = int(os.getenv("HTTP_CACHE_MAX_MB", "512")) * 1024 * 1024
+# SQLite file indexing page fingerprints of every scan, for cross-scan near-duplicates; unset disables it
+simhash_index_path = os.getenv("SIMHASH_INDEX_PATH")
+simhash_max_distance = min(int(os.getenv("SIMHASH_MAX_DISTANCE", str(MAX_DISTANCE))), MAX_DISTANCE)
+# Scans kept in that index per site, and for how long (older ones are pruned after each scan)
+simhash_keep_scans = int(os.getenv("SIMHASH_KEEP_SCANS", "10"))
+simhash_max_age = float(os.getenv("SIMHASH_MAX_AGE_DAYS", "90")) * 24 * 3600
+# Processes running the post-crawl analyzers side by side (0 = threads in the API process)
+analysis_workers = int(os.getenv("ANALYSIS_WORKERS")) if os.getenv("ANALYSIS_WORKERS") else None
+analysis_executor = AnalysisExecutor(workers=analysis_workers)
+
+# In-memory storage for scan results
+scan_results: Dict[str, Dict[str, Any]] = {}
+scan_status: Dict[str, str] = {}  # 'pending', 'processing', 'completed', 'error'
+active_crawlers: Dict[str, WebsiteCrawler] = {}  # Crawlers still running, for live monitoring
+resumed_scan_tasks = set()  # Keeps scans restarted at startup from being garbage collected
+duplicate_states: Dict[str, Dict[str, Any]] = {}  # DuplicateDetector state per scan, for incremental re-scans
+
+
+def crawl_state_path(scan_id: str) -> str:
+    return os.path.join(crawl_state_dir, f"{scan_id}.sqlite")
+
+
+def serialize_scan_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a stored scan result (page/link records) to plain JSON for the API"""
+    if "crawl_results" not in result:
+        return result
+    return {**result, "crawl_results": serialize_crawl_results(result["crawl_results"])}
+
+
+class ScanRequest(BaseModel):
+    url: HttpUrl
+    max_pages: Optional[int] = 200  # Increased to 200
+    include_external: Optional[bool] = False
+    concurrency: Optional[int] = 10  # Parallel fetch workers
+    distributed: Optional[bool] = False  # Crawl on Celery workers through the Redis frontier
+    workers: Optional[int] = 4  # Celery crawl tasks to start in distributed mode
+    render_mode: Literal["off", "auto", "always"] = "off"  # JS rendering
+    previous_scan_id: Optional[str] = None  # Re-crawl incrementally against this completed scan
+
+
+class ScanResponse(BaseModel):
+    scan_id: str
+    status: str
+    message: str
+
+
+async def run_distributed_crawl(scan_id: str, url: str, max_pages: int, concurrency: int, workers: int) -> Dict[str, Any]:
+    """Crawl on Celery workers via the Redis frontier and collect the results here"""
+    # Imported lazily so the API only needs Celery when distributed mode is used
+    from app.tasks.crawl_tasks import crawl_frontier_worker
+    
+    coordinator = DistributedCrawl(get_redis(), scan_id, max_pages=max_pages)
+    coordinator.start(url)
+    for _ in range(max(1, workers)):
+        crawl_frontier_worker.delay(scan_id, concurrency)
+    return await coordinator.collect()
+
+
+def load_previous_scan(previous_scan_id: Optional[str]) -> Optional[Dict[str, Any]]:
+    """A completed earlier scan to re-crawl incrementally against, if it still exists"""
+    if not previous_scan_id:
+        return None
+    previous_result = scan_results.get(previous_scan_id)
+    if scan_status.get(previous_scan_id) != "completed" or not previous_result or "crawl_results" not in previous_result:
+        print(f"[PROCESS_SCAN] Previous scan {previous_scan_id} not available, running a full scan")
+        return None
+    return previous_result
+
+
+async def analyze_performance(crawl_results: Dict[str, Any]) -> Dict[str, Any]:
+    """PageSpeed metrics for a sample of the crawled pages"""
+    print("Analyzing performance...")
+    try:
+        pagespeed_analyzer = PageSpeedAnalyzer()
+        return await pagespeed_analyzer.analyze_sample(crawl_results, sample_size=5)
+    except Exception as e:
+        print(f"Performance analysis failed: {e}")
+        return {"error": str(e), "results": []}
+
+
+def find_cross_scan_duplicates(scan_id: str, url: str, pages) -> Optional[Dict[str, Any]]:
+    """Pages of this scan that nearly duplicate pages of other scans, then add this scan to the index
+
+    Looks every page's SimHash up in the persistent index (within
+    simhash_max_distance bits). Matches on the same URL - the page's own
+    earlier versions - are left out. Then prunes the index down to the
+    newest simhash_keep_scans scans per site within simhash_max_age.
+    Blocking; run it in a thread.
+    """
+    if not simhash_index_path:
+        return None
+    index = None
+    try:
+        index = SimHashIndex(simhash_index_path)
+        fingerprinted = [(page.get("url"), page.get("simhash")) for page in pages if page.get("simhash") is not None]
+        start = time.perf_counter()
+        matches = index.query_many([fingerprint for _, fingerprint in fingerprinted], simhash_max_distance,
+                                   exclude_scan=scan_id, exclude_urls=[page_url for page_url, _ in fingerprinted])
+        query_seconds = time.perf_counter() - start
+        duplicates = [{"page": page_url, "matches": page_matches}
+                      for (page_url, _), page_matches in zip(fingerprinted, matches) if page_matches]
+        index.add(scan_id, urlparse(url).netloc, fingerprinted)
+        index.prune(keep_scans=simhash_keep_scans, max_age=simhash_max_age)
+        return {
+            "pages_checked": len(fingerprinted),
+            "pages_with_matches": len(duplicates),
+            "max_distance": simhash_max_distance,
+            "indexed_pages": len(index),
+            "query_seconds": round(query_seconds, 3),
+            "duplicates": duplicates[:100]  # Limit to 100
+        }
+    except Exception as e:
+        print(f"Cross-scan duplicate search failed: {e}")
+        return {"error": str(e), "duplicates": []}
+    finally:
+        if index:
+            index.close()
+
+
+async def process_scan(scan_id: str, url: str, max_pages: int, include_external: bool, concurrency: int = 10,
+                       distributed: bool = False, workers: int = 4, render_mode: str = "off",
+                       previous_scan_id: Optional[str] = None, http_cache_settings: Optional[Dict[str, Any]] = None):
+    """Background task to process the full scan
+
+    http_cache_settings ({"dir", "max_bytes"}; dir None disables the cache)
+    defaults to HTTP_CACHE_DIR and HTTP_CACHE_MAX_MB; scans resumed after a
+    restart pass the settings they started with.
+    """
+    print(f"\n[PROCESS_SCAN] Starting scan {scan_id} for {url}")
+    try:
+        scan_status[scan_id] = "processing"
+        print(f"[PROCESS_SCAN] Status set to processing for {scan_id}")
+        
+        # Validate URL
+        if not url or not url.startswith(('http://', 'https://')):
+            raise ValueError(f"Invalid URL format: {url}. URL must start with http:// or https://")
+        
+        # Step 1: Crawl website
+        print(f"Starting crawl for {url} (max_pages: {max_pages})")
+        previous_result = load_previous_scan(previous_scan_id)
+        previous = None
+        if previous_result and not distributed:
+            previous_crawl = previous_result["crawl_results"]
+            crawled_at = previous_crawl.get("crawl_started_at") or datetime.fromisoformat(previous_result["timestamp"]).timestamp()
+            previous = PreviousScan(previous_crawl["pages"], crawled_at)
+        state = None
+        http_cache = None
+        if http_cache_settings is None:
+            http_cache_settings = {"dir": http_cache_dir, "max_bytes": http_cache_max_bytes}
+        crawl_start = time.perf_counter()
+        try:
+            if distributed:
+                crawl_results = await run_distributed_crawl(scan_id, url, max_pages, concurrency, workers)
+            else:
+                if crawl_state_dir:
+                    # Reopening an existing file resumes from its last checkpoint
+                    os.makedirs(crawl_state_dir, exist_ok=True)
+                    state = CrawlStateStore(crawl_state_path(scan_id))
+                    # Everything needed to restart the scan as it was requested
+                    state.set_meta(
+                        request={"url": url, "max_pages": max_pages, "include_external": include_external,
+                                 "concurrency": concurrency, "render_mode": render_mode,
+                                 "previous_scan_id": previous_scan_id},
+                        http_cache=http_cache_settings
+                    )
+                if http_cache_settings["dir"]:
+                    http_cache = HttpCache(http_cache_settings["dir"], max_bytes=http_cache_settings["max_bytes"])
+                crawler = WebsiteCrawler(
+                    max_pages=max_pages,
+                    include_external=include_external,
+                    concurrency=concurrency,
+                    parse_workers=parse_workers,
+                    seen_backend=seen_backend,
+                    state=state,
+                    render_mode=render_mode,
+                    http_cache=http_cache,
+                    previous=previous
+                )
+                active_crawlers[scan_id] = crawler
+                try:
+                    crawl_results = await crawler.crawl(url)
+                finally:
+                    active_crawlers.pop(scan_id, None)
+                    if http_cache:
+                        http_cache.close()
+                if state:
+                    state.close(remove=True)
+            crawl_seconds = time.perf_counter() - crawl_start
+            print(f"Crawl completed. Found {len(crawl_results.get('pages', []))} pages")
+        except Exception as e:
+            if state:
+                state.close(remove=True)
+            error_detail = str(e) if str(e) else f"{type(e).__name__} occurred"
+            print(f"[PROCESS_SCAN] Crawl failed: {error_detail}")
+            print(f"[PROCESS_SCAN] Error type: {type(e).__name__}")
+            print(f"[PROCESS_SCAN] Error repr: {repr(e)}")
+            import traceback
+            tb = traceback.format_exc()
+            print(f"[PROCESS_SCAN] Traceback:\n{tb}")
+            # Always raise with a message
+            if not error_detail or error_detail.strip() == "":
+                error_detail = f"Crawl failed with {type(e).__name__} exception"
+            raise Exception(f"Failed to crawl website: {error_detail}") from e
+        
+        # Check if we got any pages
+        if not crawl_results.get('pages'):
+            raise Exception("No pages were crawled. The website might be blocking crawlers, unreachable, or have no crawlable links.")
+        
+        # Steps 2-6: analyzers run side by side in worker processes, PageSpeed alongside them
+        analysis_start = time.perf_counter()
+        cross_scan_task = asyncio.get_running_loop().run_in_executor(
+            None, find_cross_scan_duplicates, scan_id, url, crawl_results["pages"]
+        )
+        incremental = crawl_results.get("incremental")
+        if incremental and not (incremental["changed"] or incremental["new"] or incremental["removed"]):
+            # Same pages with the same content give the same audit and analysis
+            print(f"No pages changed since scan {previous_scan_id}, reusing its analysis")
+            analysis = {key: previous_result[key] for key in ("seo_audit", "keywords", "duplicates", "page_power")}
+            analysis["duplicate_state"] = duplicate_states.get(previous_scan_id)
+            analysis["timings"] = None
+            performance = await analyze_performance(crawl_results)
+        else:
+            duplicate_state = duplicate_states.get(previous_scan_id) if previous_result else None
+            analysis, performance = await asyncio.gather(
+                analysis_executor.analyze(crawl_results, duplicate_state),
+                analyze_performance(crawl_results)
+            )
+        if analysis["duplicate_state"] is not None:
+            duplicate_states[scan_id] = analysis["duplicate_state"]
+        
+        cross_scan_duplicates = await cross_scan_task
+        
+        print("Analysis complete!")
+        
+        # Combine all results
+        result = {
+            "crawl_results": crawl_results,
+            "seo_audit": analysis["seo_audit"],
+            "keywords": analysis["keywords"],
+            "duplicates": analysis["duplicates"],
+            "page_power": analysis["page_power"],
+            "cross_scan_duplicates": cross_scan_duplicates,
+            "performance": performance,
+            "scan_id": scan_id,
+            "previous_scan_id": previous_scan_id if previous_result else None,
+            "timings": {
+                "crawl_seconds": round(crawl_seconds, 3),
+                "analysis_seconds": round(time.perf_counter() - analysis_start, 3),
+                "analysis": analysis["timings"]
+            },
+            "timestamp": datetime.now().isoformat()
+        }
+        
+        scan_results[scan_id] = result
+        scan_status[scan_id] = "completed"
+        
+    except Exception as e:
+        import traceback
+        import sys
+        error_trace = traceback.format_exc()
+        error_type = type(e).__name__
+        
+        # Try multiple ways to get error message
+        error_msg = ""
+        
+        # Method 1: Direct string conversion
+        try:
+            error_msg = str(e).strip()
+        except:
+            pass
+        
+        # Method 2: Get from exception args
+        if not error_msg and hasattr(e, 'args') and e.args:
+            try:
+                error_msg = str(e.args[0]).strip() if e.args[0] else ""
+            except:
+                pass
+        
+        # Method 3: Extract from traceback
+        if not error_msg:
+            traceback_lines = error_trace.split('\n')
+            for i, line in enumerate(traceback_lines):
+                # Look for exception type followed by message
+                if error_type in line and i + 1 < len(traceback_lines):
+                    next_line = traceback_lines[i + 1].strip()
+                    if next_line and not next_line.startswith('File'):
+                        error_msg = next_line
+                        break
+                # Look for common error patterns
+                if any(pattern in line for pattern in ['Error:', 'Exception:', 'Failed', 'cannot', 'unable', 'invalid']):
+                    if line.strip() and not line.strip().startswith('File'):
+                        error_msg = line.strip()
+                        break
+        
+        # Method 4: Use repr if available
+        if not error_msg:
+            try:
+                error_repr = repr(e)
+                if error_repr and error_repr != f"{error_type}()":
+                    error_msg = error_repr
+            except:
+                pass
+        
+        # Final fallback - construct meaningful message
+        if not error_msg or error_msg.strip() == "":
+            # Get the last few lines of traceback for context
+            traceback_lines = error_trace.split('\n')
+            last_lines = [l for l in traceback_lines[-10:] if l.strip() and not l.strip().startswith('File')]
+            context = last_lines[0] if last_lines else "Unknown location"
+            error_msg = f"{error_type} occurred: {context[:200]}"
+        
+        # Ensure we have something
+        if not error_msg or len(error_msg.strip()) == 0:
+            error_msg = f"An error of type {error_type} occurred during scan processing. Please check the traceback for details."
+        
+        print(f"\n{'=' * 80}")
+        print(f"ERROR processing scan {scan_id}")
+        print(f"Error Type: {error_type}")
+        print(f"Error Message: {error_msg}")
+        print(f"Error Repr: {repr(e)}")
+        print(f"{'=' * 80}")
+        print("Full Traceback:")
+        print(error_trace)
+        print(f"{'=' * 80}\n")
+        
+        # Store error - ALWAYS with a message
+        error_data = {
+            "error": error_msg,
+            "error_type": error_type,
+            "traceback": error_trace,
+            "scan_id": scan_id
+        }
+        
+        scan_status[scan_id] = "error"
+        scan_results[scan_id] = error_data
+        
+        # Verify storage
+        stored = scan_results.get(scan_id, {})
+        print(f"VERIFICATION: Stored error data for {scan_id}")
+        print(f"  - Has error key: {'error' in stored}")
+        print(f"  - Error value: '{stored.get('error', 'MISSING')}'")
+        print(f"  - Error value length: {len(stored.get('error', ''))}")
+        print(f"  - Full stored data keys: {list(stored.keys())}")
+
+
+async def safe_process_scan_wrapper(scan_id: str, url: str, max_pages: int, include_external: bool, concurrency: int = 10,
+                                    distributed: bool = False, workers: int = 4, render_mode: str = "off",
+                                    previous_scan_id: Optional[str] = None,
+                                    http_cache_settings: Optional[Dict[str, Any]] = None):
+    """Wrapper to ensure all errors are caught and stored"""
+    try:
+        await process_scan(scan_id, url, max_pages, include_external, concurrency, distributed, workers, render_mode,
+                           previous_scan_id, http_cache_settings)
+    except Exception as outer_e:
+        # Final safety net
+        import traceback
+        error_trace = traceback.format_exc()
+        error_type = type(outer_e).__name__
+        error_msg = str(outer_e) if str(outer_e) else f"{error_type} occurred"
+        
+        if not error_msg or error_msg.strip() == "":
+            error_msg = f"An unexpected error occurred: {error_type}. Please check backend logs."
+        
+        print(f"\n[SAFETY NET] Unhandled exception in wrapper for {scan_id}")
+        print(f"Error: {error_msg}")
+        print(error_trace)
+        
+        scan_status[scan_id] = "error"
+        scan_results[scan_id] = {
+            "error": error_msg,
+            "error_type": error_type,
+            "traceback": error_trace,
+            "scan_id": scan_id
+        }
+
+@app.post("/api/scan", response_model=ScanResponse)
+async def start_scan(request: ScanRequest, background_tasks: BackgroundTasks):
+    """Start a new website scan"""
+    if request.distributed:
+        # Celery workers only fetch over plain HTTP within the site, from scratch
+        unsupported = [name for name, used in (("render_mode", request.render_mode != "off"),
+                                               ("include_external", bool(request.include_external)),
+                                               ("previous_scan_id", bool(request.previous_scan_id))) if used]
+        if unsupported:
+            raise HTTPException(status_code=400,
+                                detail=f"Not supported in distributed mode: {', '.join(unsupported)}")
+    
+    scan_id = str(uuid.uuid4())
+    scan_status[scan_id] = "pending"
+    scan_results[scan_id] = {}  # Initialize
+    
+    # Start background task with safety wrapper
+    background_tasks.add_task(
+        safe_process_scan_wrapper,
+        scan_id,
+        str(request.url),
+        request.max_pages,
+        request.include_external,
+        request.concurrency,
+        request.distributed,
+        request.workers,
+        request.render_mode,
+        request.previous_scan_id
+    )
+    
+    return ScanResponse(
+        scan_id=scan_id,
+        status="pending",
+        message="Scan started successfully"
+    )
+
+
+@app.get("/api/scan/{scan_id}/status")
+async def get_scan_status(scan_id: str):
+    """Get the status of a scan"""
+    if scan_id not in scan_status:
+        raise HTTPException(status_code=404, detail="Scan not found")
+    
+    response = {
+        "scan_id": scan_id,
+        "status": scan_status[scan_id]
+    }
+    
+    # Live per-host rate and in-flight counts while the crawl is running
+    crawler = active_crawlers.get(scan_id)
+    if crawler:
+        response["pages_crawled"] = len(crawler.pages)
+        response["hosts"] = crawler.scheduler.snapshot()
+    
+    return response
+
+
+@app.post("/api/scan/{scan_id}/pause")
+async def pause_scan(scan_id: str):
+    """Pause a crawl in progress (its state is checkpointed if persistence is enabled)"""
+    crawler = active_crawlers.get(scan_id)
+    if not crawler:
+        raise HTTPException(status_code=409, detail="Scan is not crawling")
+    crawler.pause()
+    scan_status[scan_id] = "paused"
+    return {"scan_id": scan_id, "status": "paused"}
+
+
+@app.post("/api/scan/{scan_id}/resume")
+async def resume_scan(scan_id: str):
+    """Resume a paused crawl"""
+    crawler = active_crawlers.get(scan_id)
+    if not crawler:
+        raise HTTPException(status_code=409, detail="Scan is not crawling")
+    crawler.resume()
+    scan_status[scan_id] = "processing"
+    return {"scan_id": scan_id, "status": "processing"}
+
+
+@app.get("/api/scan/{scan_id}/results")
+async def get_scan_results(scan_id: str):
+    """Get the results of a completed scan"""
+    if scan_id not in scan_status:
+        raise HTTPException(status_code=404, detail="Scan not found")
+    
+    current_status = scan_status[scan_id]
+    
+    # If error, return error details immediately
+    if current_status == "error":
+        error_data = scan_results.get(scan_id, {})
+        
+        # Debug logging
+        print(f"\n[DEBUG] get_scan_results for {scan_id}")
+        print(f"  - Status: {current_status}")
+        print(f"  - Has results: {scan_id in scan_results}")
+        print(f"  - Error data keys: {list(error_data.keys()) if error_data else 'None'}")
+        print(f"  - Error value: '{error_data.get('error', 'MISSING')}'")
+        
+        # Ensure we have valid error data
+        if not error_data:
+            error_data = {}
+        
+        # Ensure error message exists and is not empty
+        if "error" not in error_data or not error_data.get("error") or error_data.get("error").strip() == "":
+            error_type = error_data.get("error_type", "UnknownError")
+            error_data["error"] = f"An error occurred during the scan (Type: {error_type}). Check backend terminal logs for full details."
+            error_data["error_type"] = error_type
+            error_data["scan_id"] = scan_id
+            print(f"  - [FIXED] Set default error message: {error_data['error'][:100]}")
+        
+        print(f"  - Returning error: '{error_data.get('error', 'MISSING')[:100]}...'")
+        return error_data
+    
+    # If still processing, return 202
+    if current_status != "completed":
+        raise HTTPException(status_code=202, detail="Scan still in progress")
+    
+    # Return completed results
+    return serialize_scan_result(scan_results.get(scan_id, {}))
+
+
+@app.on_event("startup")
+async def warm_up_analysis_workers():
+    analysis_executor.warm_up()
+
+
+@app.on_event("startup")
+async def resume_interrupted_scans():
+    """Restart crawls that were still running when the process last stopped"""
+    if not crawl_state_dir or not os.path.isdir(crawl_state_dir):
+        return
+    for name in os.listdir(crawl_state_dir):
+        if not name.endswith(".sqlite"):
+            continue
+        scan_id = name[:-len(".sqlite")]
+        state = CrawlStateStore(crawl_state_path(scan_id))
+        meta = state.get_meta()
+        state.close(remove="request" not in meta)
+        if "request" not in meta:
+            # Discarded (written by another version) or never started
+            continue
+        request = meta["request"]
+        print(f"Resuming interrupted scan {scan_id} for {request['url']}")
+        scan_status[scan_id] = "pending"
+        scan_results[scan_id] = {}
+        task = asyncio.create_task(safe_process_scan_wrapper(
+            scan_id, request["url"], request["max_pages"], request["include_external"], request["concurrency"],
+            render_mode=request["render_mode"], previous_scan_id=request["previous_scan_id"],
+            http_cache_settings=meta["http_cache"]
+        ))
+        resumed_scan_tasks.add(task)
+        task.add_done_callback(resumed_scan_tasks.discard)
+
+
+@app.on_event("shutdown")
+async def checkpoint_active_crawls():
+    """Pause running crawls so their state is flushed before the process exits"""
+    for crawler in active_crawlers.values():
+        crawler.pause()
+    analysis_executor.shutdown()
+
+
+@app.get("/api/health")
+async def health_check():
+    """Health check endpoint"""
+    return {"status": "healthy", "timestamp": datetime.now().isoformat()}
+
+
+@app.get("/api/debug/scan/{scan_id}")
+async def debug_scan(scan_id: str):
+    """Debug endpoint to see scan status and results"""
+    if scan_id not in scan_status:
+        raise HTTPException(status_code=404, detail="Scan not found")
+    
+    return {
+        "scan_id": scan_id,
+        "status": scan_status.get(scan_id, "not_found"),
+        "has_results": scan_id in scan_results,
+        "results_keys": list(scan_results.get(scan_id, {}).keys()) if scan_id in scan_results else [],
+        "error_data": scan_results.get(scan_id, {}) if scan_status.get(scan_id) == "error" else None,
+        "full_results": serialize_scan_result(scan_results.get(scan_id, {}))
+    }
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=8000)
+
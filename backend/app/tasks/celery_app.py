@@ -1,22 +1,23 @@
-# Celery configuration for async task processing
-# Currently using FastAPI BackgroundTasks, but keeping this for future scaling
-
-from celery import Celery
-import os
-
-redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
-
-celery_app = Celery(
-    "website_analyzer",
-    broker=redis_url,
-    backend=redis_url
-)
-
-celery_app.conf.update(
-    task_serializer="json",
-    accept_content=["json"],
-    result_serializer="json",
-    timezone="UTC",
-    enable_utc=True,
-)
-
+# Celery configuration for async task processing
+# Scans run in FastAPI BackgroundTasks; distributed crawls fan out to these workers
+
+from celery import Celery
+import os
+
+redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+celery_app = Celery(
+    "website_analyzer",
+    broker=redis_url,
+    backend=redis_url,
+    include=["app.tasks.crawl_tasks"]
+)
+
+celery_app.conf.update(
+    task_serializer="json",
+    accept_content=["json"],
+    result_serializer="json",
+    timezone="UTC",
+    enable_utc=True,
+)
+
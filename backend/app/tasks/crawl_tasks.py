@@ -0,0 +1,19 @@
+# Celery tasks for distributed crawling
+# Start workers with: celery -A app.tasks.celery_app worker --concurrency=4
+
+import asyncio
+
+from app.crawler.distributed import FrontierWorker, RedisFrontier, get_redis
+from app.tasks.celery_app import celery_app, redis_url
+
+
+@celery_app.task(name="crawl.frontier_worker")
+def crawl_frontier_worker(crawl_id: str, concurrency: int = 10) -> int:
+    """Pull URL batches for a distributed crawl until its frontier drains"""
+    frontier = RedisFrontier(get_redis(redis_url), crawl_id)
+    try:
+        frontier.config
+    except KeyError:
+        # The crawl already finished and its keys were cleaned up
+        return 0
+    return asyncio.run(FrontierWorker(frontier, concurrency=concurrency).run())
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Time the SEO audit on a synthetic crawl
+
+Usage: python benchmarks/bench_audit.py [pages] [issue_rate]
+Builds N page records, about issue_rate of them failing each check, then
+reports how long filling the page table takes (the crawler does this as
+pages arrive) and how long the audit takes with the table already built.
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.audit.seo_audit import SEOAuditor
+from app.crawler.pagetable import PageTable
+from app.crawler.records import ImageRecord, PageRecord
+
+
+def make_pages(count: int, issue_rate: float):
+    rng = random.Random(0)
+    pages = []
+    for i in range(count):
+        bad = rng.random() < issue_rate
+        url = f"https://example.com/section-{i % 97}/article-{i}"
+        pages.append(PageRecord(
+            url=url,
+            status_code=rng.choice([404, 301]) if bad else 200,
+            title="" if bad else f"Article {i}",
+            meta_description=f"Section {i % 97}" if bad else f"About article {i}",
+            canonical="",
+            h1=[] if bad else [f"Article {i}"],
+            h2=[],
+            content="",
+            word_count=120 if bad else 800,
+            content_hash=str(i),
+            links=[],
+            images=[ImageRecord(f"{url}/hero.png", "" if bad else "Hero", url)]
+        ))
+    return pages
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    issue_rate = float(sys.argv[2]) if len(sys.argv) > 2 else 0.01
+    pages = make_pages(count, issue_rate)
+
+    start = time.perf_counter()
+    table = PageTable.from_pages(pages)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = SEOAuditor({"pages": pages, "page_table": table}).audit()
+    audit_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    SEOAuditor({"pages": pages}).audit()
+    full_time = time.perf_counter() - start
+
+    print(f"{count:,} pages, {result['summary']['total_issues']:,} issues, "
+          f"{result['summary']['total_warnings']:,} warnings")
+    print(f"table build {build_time:.3f}s  audit with crawler table {audit_time:.3f}s  "
+          f"audit building its own table {full_time:.3f}s")
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Run a distributed crawl locally with several worker processes
+
+Usage: python benchmarks/bench_distributed.py START_URL [max_pages] [workers]
+Uses the Redis at REDIS_URL when set; otherwise starts an in-process
+fakeredis TCP server (pip install fakeredis) that the workers share.
+Prints crawl time and compares the page set with a single-process crawl.
+"""
+import asyncio
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.crawler.distributed import DistributedCrawl, FrontierWorker, RedisFrontier, get_redis
+from app.crawler.spider import WebsiteCrawler
+
+
+def start_fake_redis(port: int = 6390) -> str:
+    from fakeredis import TcpFakeServer
+    server = TcpFakeServer(("127.0.0.1", port), server_type="redis")
+    server.daemon_threads = True
+    # Without TCP_NODELAY every pipelined reply waits out a delayed ACK
+    server.RequestHandlerClass.disable_nagle_algorithm = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"redis://127.0.0.1:{port}/0"
+
+
+def run_worker(redis_url: str, crawl_id: str):
+    pages = asyncio.run(FrontierWorker(RedisFrontier(get_redis(redis_url), crawl_id)).run())
+    print(f"worker {os.getpid()}: {pages} pages", flush=True)
+
+
+if __name__ == "__main__":
+    start_url = sys.argv[1]
+    max_pages = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    redis_url = os.getenv("REDIS_URL") or start_fake_redis()
+
+    coordinator = DistributedCrawl(get_redis(redis_url), "bench", max_pages=max_pages)
+    start = time.perf_counter()
+    coordinator.start(start_url)
+    processes = [multiprocessing.Process(target=run_worker, args=(redis_url, "bench")) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    distributed = asyncio.run(coordinator.collect())
+    for process in processes:
+        process.join()
+    print(f"distributed: {len(distributed['pages'])} pages in {time.perf_counter() - start:.2f}s with {workers} workers")
+
+    start = time.perf_counter()
+    local = asyncio.run(WebsiteCrawler(max_pages=max_pages).crawl(start_url))
+    print(f"single process: {len(local['pages'])} pages in {time.perf_counter() - start:.2f}s")
+    same = {page.url for page in distributed["pages"]} == {page.url for page in local["pages"]}
+    print(f"same page set: {same}")
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Benchmark the single-pass lxml extractor against the old BeautifulSoup passes
+
+Usage: python benchmarks/bench_extractor.py page1.html [page2.html | dir ...]
+Saved copies of large real-world pages make the most useful input.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from bs4 import BeautifulSoup
+
+from app.crawler.extractor import extract_html, has_anchor_target
+
+
+def bs4_extract(html: str):
+    """The multi-pass BeautifulSoup extraction _parse_html used to do"""
+    soup = BeautifulSoup(html, 'lxml')
+    soup.find('title')
+    soup.find('meta', attrs={'name': 'description'})
+    soup.find('link', attrs={'rel': 'canonical'})
+    [h.get_text(strip=True) for h in soup.find_all('h1')]
+    [h.get_text(strip=True) for h in soup.find_all('h2')]
+    for tag in soup(["script", "style", "nav", "footer", "header"]):
+        tag.decompose()
+    soup.get_text(separator=' ', strip=True)
+    for link in soup.find_all('a', href=True):
+        link.get_text(strip=True)
+        href = link.get('href')
+        if href and href.startswith('#'):
+            soup.find(id=href[1:]) or soup.find(attrs={'name': href[1:]})
+    soup.find_all('img')
+
+
+def lxml_extract(html: str):
+    extraction = extract_html(html)
+    for href, _, _, _ in extraction["links"]:
+        if href and href.startswith('#'):
+            has_anchor_target(extraction, href[1:])
+
+
+def collect_files(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                for name in names:
+                    if name.endswith(('.html', '.htm')):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+
+def bench(name, func, documents, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for html in documents:
+            func(html)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    total_mb = sum(len(html) for html in documents) / 1e6
+    print(f"{name:<14} {best:8.3f}s  {len(documents) / best:9.1f} pages/s  {total_mb / best:7.2f} MB/s")
+    return best
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    documents = []
+    for path in collect_files(sys.argv[1:]):
+        with open(path, encoding='utf-8', errors='replace') as f:
+            documents.append(f.read())
+    print(f"{len(documents)} pages, {sum(len(d) for d in documents) / 1e6:.1f} MB")
+    old = bench("beautifulsoup", bs4_extract, documents)
+    new = bench("lxml single", lxml_extract, documents)
+    print(f"speedup: {old / new:.1f}x")
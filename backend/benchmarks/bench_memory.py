@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Measure crawl-state memory per 1k pages without touching the network
+
+Usage: python benchmarks/bench_memory.py [pages] [links_per_page]
+Synthetic pages share a site-wide navigation block and link to random
+other pages, so URLs repeat across pages the way they do on real sites.
+"""
+import os
+import random
+import resource
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.crawler.parsing import parse_page
+from app.crawler.spider import WebsiteCrawler
+
+BASE = "https://example.com"
+
+
+def make_page(index: int, pages: int, links_per_page: int, rng: random.Random) -> str:
+    nav = "".join(f'<a href="/section-{i}/">Section {i}</a>' for i in range(20))
+    links = "".join(
+        f'<a href="/page-{rng.randrange(pages)}" title="Related">Related page {rng.randrange(1000)}</a>'
+        for _ in range(links_per_page)
+    )
+    words = " ".join(rng.choice(("alpha", "beta", "gamma", "delta", "omega")) for _ in range(600))
+    return (f"<html><head><title>Page {index}</title><meta name=\"description\" content=\"Page {index}\"></head>"
+            f"<body><div class=\"menu\">{nav}</div><h1>Page {index}</h1><p>{words}</p>{links}"
+            f"<img src=\"/img/{index}.png\" alt=\"\"><a href=\"#missing\">jump</a></body></html>")
+
+
+def max_rss_mb() -> float:
+    # ru_maxrss is KB on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+if __name__ == "__main__":
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    links_per_page = int(sys.argv[2]) if len(sys.argv) > 2 else 80
+    rng = random.Random(42)
+
+    crawler = WebsiteCrawler(max_pages=pages, parse_workers=0)
+    crawler.base_domain = BASE
+    baseline = max_rss_mb()
+
+    for index in range(pages):
+        url = f"{BASE}/page-{index}"
+        crawler.visited.add(url)
+        page = crawler._ingest_page(parse_page(url, make_page(index, pages, links_per_page, rng), 200, BASE))
+        crawler.pages.append(page)
+    results = crawler._build_results()
+
+    peak = max_rss_mb()
+    print(f"{pages} pages x {links_per_page + 22} links: peak RSS {peak:.0f} MB "
+          f"({(peak - baseline) / pages * 1000:.1f} MB per 1k pages above baseline {baseline:.0f} MB)")
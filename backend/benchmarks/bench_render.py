@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""Compare HTTP-only and rendered crawl throughput
+
+Usage: python benchmarks/bench_render.py START_URL [max_pages] [pool_size]
+Set CHROMIUM_PATH to render with a system Chrome/Chromium instead of
+Playwright's bundled browser.
+"""
+import asyncio
+import functools
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.crawler import spider
+from app.crawler.render import RenderPool
+from app.crawler.spider import WebsiteCrawler
+
+
+async def run(start_url: str, max_pages: int, render_mode: str, pool_size: int):
+    crawler = WebsiteCrawler(max_pages=max_pages, render_mode=render_mode, render_pool_size=pool_size)
+    results = await crawler.crawl(start_url)
+    words = sum(page.word_count for page in results["pages"])
+    print(f"{render_mode}: {len(results['pages'])} pages, {words} words, {results['fetch_stats']}")
+
+
+if __name__ == "__main__":
+    start_url = sys.argv[1]
+    max_pages = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    pool_size = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    if os.getenv("CHROMIUM_PATH"):
+        spider.RenderPool = functools.partial(RenderPool, executable_path=os.getenv("CHROMIUM_PATH"))
+    for render_mode in ("off", "always"):
+        asyncio.run(run(start_url, max_pages, render_mode, pool_size))
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Compare memory and throughput of the seen-URL store backends
+
+Usage: python benchmarks/bench_seen.py [urls]
+Adds N synthetic URLs to each backend, then looks up N seen and N unseen
+URLs. Memory is measured with tracemalloc (plus file size for the disk
+store); the Bloom filter's observed false-positive rate is reported too.
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.crawler.seen import BloomSeenStore, DiskSeenStore, MemorySeenStore
+
+
+def make_urls(count: int, offset: int = 0):
+    return (f"https://example.com/section-{i % 97}/article-{i}?page={i % 7}" for i in range(offset, offset + count))
+
+
+def bench(name: str, factory, count: int):
+    # Memory pass: URL strings are created here, so only the stores that
+    # keep them (the plain set) pay for them
+    tracemalloc.start()
+    store = factory()
+    for url in make_urls(count):
+        store.add(url)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    disk = store.size_bytes if isinstance(store, DiskSeenStore) else 0
+    store.close()
+
+    # Timing pass without tracemalloc overhead
+    urls, unseen = list(make_urls(count)), list(make_urls(count, offset=count))
+    store = factory()
+    start = time.perf_counter()
+    for url in urls:
+        store.add(url)
+    add_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    hits = sum(1 for url in urls if url in store)
+    false_positives = sum(1 for url in unseen if url in store)
+    lookup_time = time.perf_counter() - start
+    store.close()
+
+    print(f"{name:<7} memory {memory / 1e6:8.1f} MB  disk {disk / 1e6:6.1f} MB  "
+          f"add {count / add_time:10,.0f}/s  lookup {2 * count / lookup_time:10,.0f}/s  "
+          f"hits {hits}/{count}  false positives {false_positives / count:.4%}")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    bench("memory", MemorySeenStore, count)
+    bench("bloom", lambda: BloomSeenStore(initial_capacity=count // 4, error_rate=0.001), count)
+    bench("disk", DiskSeenStore, count)
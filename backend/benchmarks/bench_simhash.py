@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Time cross-scan near-duplicate lookups in the SimHash index
+
+Usage: python benchmarks/bench_simhash.py [stored_pages] [queries]
+Fills a fresh index with random fingerprints, then queries it with
+copies of stored fingerprints that have 0-3 bits flipped (which must all
+be found) and with unrelated ones, reporting the time per query.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.crawler.simhash import MAX_DISTANCE, SimHashIndex, simhash
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    rng = random.Random(0)
+    fingerprints = [rng.getrandbits(64) for _ in range(count)]
+
+    text = " ".join(f"word{rng.randrange(5000)}" for _ in range(1000))
+    start = time.perf_counter()
+    for _ in range(100):
+        simhash(text)
+    fingerprint_time = (time.perf_counter() - start) / 100
+
+    with tempfile.TemporaryDirectory() as directory:
+        index = SimHashIndex(os.path.join(directory, "simhash.sqlite"))
+        start = time.perf_counter()
+        batch = 100_000
+        for offset in range(0, count, batch):
+            index.add(f"scan-{offset // batch}", "example.com",
+                      ((f"https://example.com/page-{i}", fingerprints[i]) for i in range(offset, min(offset + batch, count))))
+        add_time = time.perf_counter() - start
+
+        planted = []
+        for _ in range(queries):
+            i = rng.randrange(count)
+            fingerprint = fingerprints[i]
+            for bit in rng.sample(range(64), rng.randint(0, MAX_DISTANCE)):
+                fingerprint ^= 1 << bit
+            planted.append((i, fingerprint))
+        start = time.perf_counter()
+        results = index.query_many([fingerprint for _, fingerprint in planted])
+        planted_time = time.perf_counter() - start
+        found = sum(any(match["url"] == f"https://example.com/page-{i}" for match in matches)
+                    for (i, _), matches in zip(planted, results))
+
+        start = time.perf_counter()
+        index.query_many([rng.getrandbits(64) for _ in range(queries)])
+        random_time = time.perf_counter() - start
+        index.close()
+
+    print(f"fingerprint of a 1,000-word page: {fingerprint_time * 1000:.2f}ms")
+    print(f"indexed {count:,} pages in {add_time:.1f}s")
+    print(f"near-duplicate queries: {found}/{queries} found, {planted_time / queries * 1000:.3f}ms each")
+    print(f"unrelated queries: {random_time / queries * 1000:.3f}ms each")
@@ -0,0 +1,20 @@
+import pytest
+
+from app.crawler.httpcache import freshness_lifetime, parse_cache_control
+
+
+@pytest.mark.parametrize("cache_control", ["max-age", "public, max-age", "s-maxage", "max-age=", "max-age=abc"])
+def test_directive_without_a_value_counts_as_absent(cache_control):
+    assert freshness_lifetime({"cache-control": cache_control}) == 0.0
+
+
+def test_valueless_max_age_falls_back_to_expires():
+    headers = {"cache-control": "s-maxage", "date": "Sat, 17 Oct 2026 10:00:00 GMT",
+               "expires": "Sat, 17 Oct 2026 10:01:00 GMT"}
+    assert freshness_lifetime(headers) == 60.0
+
+
+def test_max_age():
+    assert parse_cache_control('public, Max-Age="120"') == {"public": None, "max-age": "120"}
+    assert freshness_lifetime({"cache-control": "public, s-maxage=30, max-age=120"}) == 30.0
+    assert freshness_lifetime({"cache-control": "no-store, max-age=120"}) is None